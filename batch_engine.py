@@ -0,0 +1,269 @@
+# File: batch_engine.py
+# Description: This file contains the lockstep batched simulation engine for the Pac-Bot game.
+# A GameBatch holds N independent games of one matchup in flat arrays (Pac-Bot and ghost cells by flat
+# index, step, food and tick counters, alive flags) and advances every game still running by one tick per
+# call; finished games are dropped from the active list until the batch drains. Each game draws from its
+# own random.Random(seed), which gives the same stream as random.seed(seed) in simulations.run_game, and
+# takes the same steps, so the per-game results match the scalar engine for the same seeds.
+# The work shared between games is what makes a batch faster: BFS distance fields only depend on the
+# maze and the cell they are rooted at, so one full field per cell is kept for the whole batch, and the
+# BFS moves of Pac-Bot (toward its food) and of the BFS ghosts (toward Pac-Bot) become neighbor lookups.
+# A*, JPS and DFS still search per game, A* and JPS on the game's own cost field, which is only rebuilt
+# when food is eaten or respawned, as in game.step_game.
+import random
+import time
+from array import array
+from collections import deque
+import game
+import memory_tracker
+import replay
+from cost_field import CostField
+from game import FOOD_COUNT, FPS, GHOST_MOVE_DELAY, algorithm, game_duration, levels
+
+FIELD_CACHE_ENTRIES = 16_000_000  # distances kept by the shared field cache (4 bytes each), cleared when full
+
+
+class DistanceFields: # Full BFS distance fields of a maze by root cell, shared by every game played on it
+    def __init__(self, maze, max_entries=FIELD_CACHE_ENTRIES):
+        self.maze = maze
+        self.max_entries = max_entries
+        self.fields = {}  # root cell -> distance of every cell to it, -1 unreachable
+        self.entries = 0
+
+    def field(self, root): # Distance field rooted at a cell, computed on first use
+        field = self.fields.get(root)
+        if field is not None:
+            return field
+        size = self.maze.rows * self.maze.cols
+        if self.entries + size > self.max_entries:
+            self.fields.clear()
+            self.entries = 0
+        neighbors = self.maze.neighbors
+        field = array("i", [-1]) * size
+        field[root] = 0
+        queue = deque([root])
+        while queue:
+            current = queue.popleft()
+            step = field[current] + 1
+            for neighbor in neighbors[current]:
+                if field[neighbor] < 0:
+                    field[neighbor] = step
+                    queue.append(neighbor)
+        self.fields[root] = field
+        self.entries += size
+        return field
+
+    def step(self, start, goal): # Next cell of bfs(start, goal) from the field of goal, None when there is none
+        # Same rule as game.bfs_step_from_field: the first neighbor in DIRECTIONS order closest to the goal.
+        if start == goal:
+            return None
+        field = self.field(goal)
+        step, best = None, -1
+        for neighbor in self.maze.neighbors[start]:
+            distance = field[neighbor]
+            if distance >= 0 and (step is None or distance < best):
+                step, best = neighbor, distance
+        return step
+
+
+class GameBatch: # N games of one matchup advanced in lockstep
+    def __init__(self, pac_algo_index, ghost_level, seeds, max_ticks=game_duration * FPS, record=False):
+        # The batch plays on game.maze with game.nearest_food and game.bfs_table, like the scalar engine. The incremental
+        # planner, the path cache, Pac-Bot policies, the anytime search and shared-field A* ghosts pick moves
+        # differently and are not supported.
+        # record keeps a replay.ReplayRecorder per game, the same replays simulations.run_game records.
+        if (
+            game.pacman_planner is not None or game.path_cache is not None or game.pacman_policy is not None
+            or game.anytime_budget is not None or not game.EXACT_A_STAR_TIES
+        ):
+            raise ValueError(
+                "the batch engine needs the incremental planner, the path cache, Pac-Bot policies and the anytime "
+                "search off and EXACT_A_STAR_TIES on"
+            )
+        maze = game.maze
+        self.maze = maze
+        self.pac_algo_index = pac_algo_index
+        self.ghost_level = ghost_level
+        self.seeds = list(seeds)
+        self.max_ticks = max_ticks
+        self.nearest = game.nearest_food
+        count = len(self.seeds)
+        cols = maze.cols
+        ghost_starts = [row * cols + col for row, col in maze.ghost_starts]
+        self.ghost_count = len(ghost_starts)
+
+        self.rngs = [random.Random(seed) for seed in self.seeds]  # one random stream per game
+        self.pacman = array("i", [maze.pacman_start[0] * cols + maze.pacman_start[1]]) * count  # Pac-Bot cell
+        self.ghosts = array("i", ghost_starts) * count  # ghost cells, ghost_count per game
+        self.steps = array("i", [0]) * count  # steps taken
+        self.food_eaten = array("i", [0]) * count
+        self.ticks = array("i", [0]) * count
+        self.alive = bytearray(b"\x01") * count  # 0 once a game is over
+        self.food = [game.generate_food(FOOD_COUNT, maze, rng) for rng in self.rngs]  # [row, col] pellets per game
+        self.cost_fields = [CostField(maze) for _ in range(count)]  # each game's ghost proximity costs
+        for index in range(count):
+            self._rebuild_costs(index)
+        self.active = list(range(count))  # games still running
+        self.tick = 0
+        self.fields = DistanceFields(maze)  # BFS distance fields shared by every game of the batch
+        self.recorders = None
+        if record:
+            self.recorders = [replay.ReplayRecorder(maze, pac_algo_index, ghost_level, seed) for seed in self.seeds]
+            for index, recorder in enumerate(self.recorders):
+                self._record_frame(index)
+                recorder.food(0, self.food[index])
+
+    def _ghost_positions(self, index): # [row, col] of the ghosts of a game
+        cols = self.maze.cols
+        start = index * self.ghost_count
+        return [list(divmod(cell, cols)) for cell in self.ghosts[start:start + self.ghost_count]]
+
+    def _record_frame(self, index):
+        first = index * self.ghost_count
+        self.recorders[index].frame(self.pacman[index], self.ghosts[first:first + self.ghost_count])
+
+    def _rebuild_costs(self, index):
+        self.cost_fields[index].rebuild(self._ghost_positions(index))
+
+    def _pacman_step(self, index, food): # Pac-Bot's next cell toward its food, as game.pacman_next_step
+        maze = self.maze
+        cols = maze.cols
+        cell = self.pacman[index]
+        position = list(divmod(cell, cols))
+        pac_algo_index = self.pac_algo_index
+        if pac_algo_index == 1 and not self.nearest:
+            return self.fields.step(cell, food[0][0] * cols + food[0][1])
+        if pac_algo_index == 0:
+            grid = self.cost_fields[index].grid
+            if self.nearest:
+                path = game.a_star_search_nearest(position, food, maze, grid)[1]
+            else:
+                path = game.a_star_search(position, food[0], maze, grid)
+        elif pac_algo_index == 1:
+            # with a loaded path table, the table branch of bfs_nearest and its tie rule, as the scalar engine
+            path = game.bfs_nearest(position, food, None if game.bfs_table is not None else maze)[1]
+        elif pac_algo_index == 3:
+            path = game.jps_search(position, food[0], maze, self.cost_fields[index].costs)
+        else:
+            path = game.dfs(position, food[0], maze, self.rngs[index])
+        if not path:
+            return None
+        return path[0][0] * cols + path[0][1]
+
+    def _move_ghosts(self, index): # Move the ghosts of a game toward Pac-Bot, as game.move_enemies
+        maze = self.maze
+        cols = maze.cols
+        ghosts = self.ghosts
+        pacman_cell = self.pacman[index]
+        first = index * self.ghost_count
+        if self.ghost_level == 1:  # Intermediate: BFS, one shared field rooted at Pac-Bot
+            if not maze.passable[pacman_cell]:
+                return
+            for i in range(first, first + self.ghost_count):
+                step = self.fields.step(ghosts[i], pacman_cell)
+                if step is not None:
+                    ghosts[i] = step
+            return
+        target = list(divmod(pacman_cell, cols))
+        field = self.cost_fields[index]
+        rng = self.rngs[index]
+        moves = {}  # A* and JPS ghost cell -> next cell: ghosts on the same cell get the same search this tick
+        for i in range(first, first + self.ghost_count):
+            cell = ghosts[i]
+            if cell in moves:
+                ghosts[i] = moves[cell]
+                continue
+            start = list(divmod(cell, cols))
+            if self.ghost_level == 0:  # Beginner: DFS, every ghost draws its own directions
+                path = game.dfs(start, target, maze, rng)
+            else:
+                if self.ghost_level == 3:  # Expert: JPS
+                    path = game.jps_search(start, target, maze, field.costs)
+                else:  # Advanced: A*
+                    path = game.a_star_search(start, target, maze, field.grid)
+                moves[cell] = path[0][0] * cols + path[0][1] if path else cell
+            if path:
+                ghosts[i] = path[0][0] * cols + path[0][1]
+
+    def step(self): # Advance every running game by one tick, returns the indices of the games that ended
+        self.tick += 1
+        ghosts_move = self.tick % GHOST_MOVE_DELAY == 0
+        cols = self.maze.cols
+        pacman, ghosts, ghost_count = self.pacman, self.ghosts, self.ghost_count
+        finished = []
+        for index in self.active:
+            food = self.food[index]
+            if food:
+                step = self._pacman_step(index, food)
+                if step is not None:
+                    pacman[index] = step
+                    self.steps[index] += 1
+            if ghosts_move:
+                self._move_ghosts(index)
+
+            cell = pacman[index]
+            first = index * ghost_count
+            collided = cell in ghosts[first:first + ghost_count]
+
+            position = list(divmod(cell, cols))
+            eaten = food.count(position)
+            if eaten:
+                food[:] = [pellet for pellet in food if pellet != position]
+                self.food_eaten[index] += eaten
+                self._rebuild_costs(index)
+            respawned = not food
+            if respawned: # Respawn food
+                self.food[index] = game.generate_food(FOOD_COUNT, self.maze, self.rngs[index])
+                self._rebuild_costs(index)
+
+            self.ticks[index] += 1
+            if self.recorders is not None:
+                self._record_frame(index)
+                if respawned:
+                    self.recorders[index].food(self.ticks[index], self.food[index])
+            if collided or self.ticks[index] >= self.max_ticks:
+                self.alive[index] = 0
+                finished.append(index)
+        if finished:
+            self.active = [index for index in self.active if self.alive[index]]
+        return finished
+
+    def run(self): # Advance the batch until every game has ended
+        while self.active:
+            self.step()
+            memory_tracker.sample()
+
+    def result(self, index): # Result row of a finished game, with the columns of simulations.run_game
+        return {
+            "Pac-Bot AI": algorithm[self.pac_algo_index],
+            "Ghost AI": levels[self.ghost_level].split(" - ")[-1],
+            "Seed": self.seeds[index],
+            "Steps Taken": self.steps[index],
+            "Food Eaten": self.food_eaten[index],
+            "Time Survived": self.ticks[index] // FPS,
+            "Ticks": self.ticks[index],
+        }
+
+
+def run_batch(pac_algo_index, ghost_level, seeds, memory_backend="rss", record=False): # Play seeded games in one batch
+    # Returns (results, replay records), the records are empty unless record is set. The wall time and
+    # memory columns are measured for the whole batch and shared by its games: wall time is the batch
+    # time divided by the number of games.
+    memory_tracker.start_tracking(memory_backend)
+    wall_start = time.perf_counter()
+    batch = GameBatch(pac_algo_index, ghost_level, seeds, record=record)
+    batch.run()
+    wall_time_ms = (time.perf_counter() - wall_start) * 1000
+    current_memory, peak_memory = memory_tracker.get_memory_usage()
+    memory_tracker.stop_tracking()
+
+    results = []
+    for index in range(len(batch.seeds)):
+        result = batch.result(index)
+        result["Wall Time (ms)"] = round(wall_time_ms / len(batch.seeds), 2)
+        result["RAM (KB)"] = current_memory
+        result["Peak RAM (KB)"] = peak_memory
+        result["Memory Backend"] = memory_backend
+        results.append(result)
+    records = [recorder.to_bytes() for recorder in batch.recorders] if record else []
+    return results, records
@@ -0,0 +1,200 @@
+# File: benchmark.py
+# Description: This file contains the benchmark suite for the pathfinding core.
+# It drives a_star_search, jps_search, bfs, dfs, update_costs_based_on_ghosts_and_food, generate_food and the game_state
+# rollouts on the stock maze and on generated mazes from 27x40 up to 1000x1000. Every maze, ghost set and start/goal set comes
+# from a fixed seed, so two runs do exactly the same work, and every benchmark gets its own cost field, so
+# update_costs never changes what the searches read. Each benchmark runs a few untimed warmup operations,
+# then reports ops/sec, p50 and p99 latency and the peak memory allocated per operation (measured on the
+# first operations in a separate tracemalloc pass, so it does not slow the timed pass). Results can be
+# saved as a JSON baseline, and later runs flag every benchmark whose p50 latency regressed against it by
+# more than the threshold.
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import game
+import jps
+from cost_field import CostField
+from game_state import GameRules, GameState
+from maze import generate_maze
+
+SEED = 2024  # seed of the mazes, ghosts, start/goal pairs and DFS choices
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.20  # p50 slowdown that counts as a regression
+
+# Generated mazes: (name, rows, cols, corridor density, queries per benchmark), see maze.generate_maze
+MAZES = [
+    ("gen-27x40-d30", 27, 40, 0.3, 200),
+    ("gen-100x100-d0", 100, 100, 0.0, 50),
+    ("gen-100x100-d60", 100, 100, 0.6, 50),
+    ("gen-300x300-d30", 300, 300, 0.3, 40),
+    ("gen-1000x1000-d30", 1000, 1000, 0.3, 20),
+]
+QUICK_MAZES = 2  # generated mazes used by --quick
+STOCK_QUERIES = 500  # queries per benchmark on the stock maze
+WARMUP_OPS = 3  # untimed operations before each timed pass
+ALLOC_OPS = 20  # operations of each benchmark measured by the tracemalloc pass
+
+
+def build_cases(quick=False): # (name, maze, queries) of every maze the suite runs on
+    cases = [("stock-27x40", game.maze, STOCK_QUERIES)]
+    for name, rows, cols, density, queries in MAZES[:QUICK_MAZES] if quick else MAZES:
+        cases.append((name, generate_maze(rows, cols, SEED, density), queries))
+    return cases
+
+
+def make_operations(maze, queries): # Benchmark name -> list of zero-argument calls, one per operation
+    rng = random.Random(SEED)
+    cells = maze.open_cells
+    pairs = [(list(divmod(rng.choice(cells), maze.cols)), list(divmod(rng.choice(cells), maze.cols))) for _ in range(queries)]
+    ghost_count = max(4, len(cells) // 250)  # about as many ghosts per open cell as the stock game
+    ghost_sets = [[list(divmod(rng.choice(cells), maze.cols)) for _ in range(ghost_count)] for _ in range(queries)]
+
+    def ghost_field(): # Cost field of a fixed set of ghosts, for the searches
+        field = CostField(maze)
+        field.rebuild(ghost_sets[0])
+        return field
+
+    a_star_field, jps_field = ghost_field(), ghost_field()
+    update_field = CostField(maze)  # rewritten by every update_costs operation
+    jps.bitboard(maze)  # built once per maze, outside the timed calls
+
+    def dfs_call(start, goal, seed): # DFS shuffles its directions, seed it so every run does the same work
+        random.seed(seed)
+        game.dfs(start, goal, maze)
+
+    def food_call(seed):
+        random.seed(seed)
+        game.generate_food(game.FOOD_COUNT, maze)
+
+    # Rollouts: one RolloutPolicy rollout per operation (ops/sec = rollouts/sec) from a seeded state with
+    # the stock game's 4 ghosts, against BFS and A* ghosts
+    rules = {level: GameRules(maze, level) for level in (1, 2)}
+    states = [
+        GameState(
+            rng.choice(cells), [row * maze.cols + col for row, col in ghost_sets[i][:4]],
+            [rng.choice(cells) for _ in range(game.FOOD_COUNT)],
+        )
+        for i in range(queries)
+    ]
+
+    def rollout_call(level, state, seed):
+        rules[level].rollout(state.clone(), rng=random.Random(seed))
+
+    def make_unmake_call(state): # clone, then play and take back one tick of every Pac-Bot move
+        state = state.clone()
+        level_rules = rules[1]
+        for move in level_rules.moves(state):
+            level_rules.unmake(state, level_rules.make(state, move))
+
+    return {
+        "a_star_search": [lambda s=s, g=g: game.a_star_search(s, g, maze, a_star_field.grid) for s, g in pairs],
+        "jps_search": [lambda s=s, g=g: game.jps_search(s, g, maze, jps_field.costs) for s, g in pairs],
+        "jps_search_no_costs": [lambda s=s, g=g: game.jps_search(s, g, maze) for s, g in pairs],
+        "bfs": [lambda s=s, g=g: game.bfs(s, g, maze) for s, g in pairs],
+        "dfs": [lambda s=s, g=g, i=i: dfs_call(s, g, SEED + i) for i, (s, g) in enumerate(pairs)],
+        "update_costs": [
+            lambda ghosts=ghosts: game.update_costs_based_on_ghosts_and_food([], update_field, ghosts) for ghosts in ghost_sets
+        ],
+        "generate_food": [lambda i=i: food_call(SEED + i) for i in range(queries)],
+        "state_make_unmake": [lambda state=state: make_unmake_call(state) for state in states],
+        "rollout_bfs_ghosts": [lambda state=state, i=i: rollout_call(1, state, SEED + i) for i, state in enumerate(states)],
+        "rollout_a_star_ghosts": [lambda state=state, i=i: rollout_call(2, state, SEED + i) for i, state in enumerate(states)],
+    }
+
+
+def percentile(sorted_values, fraction): # Nearest-rank percentile of a sorted list
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_benchmark(operations): # Time every operation, then measure its allocations in a second pass
+    for operation in operations[:WARMUP_OPS]:  # lazily built tables and caches are not part of the timings
+        operation()
+    latencies = []
+    for operation in operations:
+        start = time.perf_counter_ns()
+        operation()
+        latencies.append(time.perf_counter_ns() - start)
+    latencies.sort()
+
+    tracemalloc.start()
+    peak_total = 0
+    measured = operations[:ALLOC_OPS]
+    for operation in measured:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        operation()
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    total_ns = sum(latencies)
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / (total_ns / 1e9), 2) if total_ns else 0,
+        "p50_us": round(percentile(latencies, 0.50) / 1000, 2),
+        "p99_us": round(percentile(latencies, 0.99) / 1000, 2),
+        "alloc_kb_per_op": round(peak_total / len(measured) / 1024, 2),
+    }
+
+
+def run_suite(quick=False, only=None): # Run every benchmark, returns {"maze/benchmark": result}
+    results = {}
+    for maze_name, maze, queries in build_cases(quick):
+        for name, operations in make_operations(maze, queries).items():
+            if only and only not in name:
+                continue
+            key = f"{maze_name}/{name}"
+            results[key] = run_benchmark(operations)
+            result = results[key]
+            print(
+                f"{key:<36}{result['ops_per_sec']:>12.1f}{result['p50_us']:>12.1f}"
+                f"{result['p99_us']:>12.1f}{result['alloc_kb_per_op']:>12.1f}"
+            )
+    return results
+
+
+def find_regressions(results, baseline, threshold): # (key, baseline p50, new p50) of every regressed benchmark
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old and old["p50_us"] and result["p50_us"] > old["p50_us"] * (1 + threshold):
+            regressions.append((key, old["p50_us"], result["p50_us"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Pac-Bot pathfinding core.")
+    parser.add_argument("--quick", action="store_true", help="only the stock maze and the smallest generated mazes")
+    parser.add_argument("--only", help="only benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file to compare with")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="p50 slowdown that is a regression")
+    args = parser.parse_args()
+
+    print(f"{'Benchmark':<36}{'ops/sec':>12}{'p50 (us)':>12}{'p99 (us)':>12}{'alloc KB/op':>12}")
+    results = run_suite(args.quick, args.only)
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline["results"], args.threshold)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: p50 {old:.1f} us -> {new:.1f} us ({new / old - 1:+.0%})")
+        if not regressions:
+            print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "seed": SEED,
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(1 if regressions else 0)
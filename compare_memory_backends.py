@@ -0,0 +1,33 @@
+# File: compare_memory_backends.py
+# Description: This file measures the overhead of each memory_tracker backend on simulator games.
+# The same seeded games of every matchup are played once per backend in this process, and the wall time
+# of each backend is compared with the "off" backend. The backends take turns game by game, so
+# slow drifts of the machine affect all of them alike.
+import argparse
+import memory_tracker
+import simulations
+from game import algorithm, levels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the overhead of the memory tracking backends.")
+    parser.add_argument("--games", type=int, default=5, help="games per matchup")
+    args = parser.parse_args()
+
+    backends = memory_tracker.BACKENDS
+    wall = {backend: 0.0 for backend in backends}  # total game wall time (ms)
+    peaks = {backend: [] for backend in backends}  # peak memory reported by each game (KB)
+    for seed in range(args.games):
+        for pac in range(len(algorithm)):
+            for ghost in range(len(levels)):
+                for backend in backends:
+                    simulations.memory_backend = backend
+                    result = simulations.run_game(pac, ghost, seed)
+                    wall[backend] += result["Wall Time (ms)"]
+                    peaks[backend].append(result["Peak RAM (KB)"])
+
+    print(f"{'Backend':<14}{'Wall (ms)':>12}{'Overhead':>10}{'Mean peak (KB)':>16}")
+    for backend in backends:
+        overhead = wall[backend] / wall["off"] - 1
+        mean_peak = sum(peaks[backend]) / len(peaks[backend])
+        print(f"{backend:<14}{wall[backend]:>12.0f}{overhead:>10.1%}{mean_peak:>16.0f}")
@@ -0,0 +1,64 @@
+# File: compare_planners.py
+# Description: This file compares the incremental D* Lite planner with a_star_search on simulator games.
+# Every tick of a seeded A* Pac-Bot game asks both for Pac-Bot's next move on the same state and counts
+# the nodes each one expands. a_star_search expansions are read from search_stats, counted under an agent
+# of their own so the game's searches are not mixed in.
+import argparse
+import random
+import game
+import search_stats
+from game import FOOD_COUNT, GHOST_MOVE_DELAY, algorithm, levels, game_duration, FPS
+
+
+COMPARE_AGENT = "Comparison"  # search_stats agent of the a_star_search calls made here
+
+
+def a_star_expansions(): # Nodes expanded by the a_star_search calls of this module so far
+    total = search_stats.totals.get((COMPARE_AGENT, "A*"))
+    return total[1] if total else 0
+
+
+def compare_game(ghost_level, seed, ghost_move_delay=GHOST_MOVE_DELAY): # Play one game with the planner, counting both planners
+    random.seed(seed)
+    game.reset_game()
+    planner = game.pacman_planner
+    food = game.generate_food(FOOD_COUNT)
+    game.update_costs_based_on_ghosts_and_food(food)
+    a_star_nodes = 0
+    planner_start = planner.expansions
+    ghost_move_counter = 0
+
+    for tick in range(game_duration * FPS):
+        if food:
+            nodes = a_star_expansions()
+            search_stats.agent = COMPARE_AGENT
+            game.a_star_search(game.pacman_pos, food[0])  # what the planner replaces, same state
+            a_star_nodes += a_star_expansions() - nodes
+
+        ghost_move_counter += 1
+        ghosts_move = ghost_move_counter >= ghost_move_delay
+        if ghosts_move:
+            ghost_move_counter = 0
+        food, eaten, collided = game.step_game(food, 0, ghost_level, ghosts_move)  # Pac-Bot moves with the planner
+        if collided:
+            break
+    return a_star_nodes, planner.expansions - planner_start, tick + 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare D* Lite with a_star_search node expansions.")
+    parser.add_argument("--games", type=int, default=20, help="games per ghost level")
+    args = parser.parse_args()
+
+    search_stats.start_tracking()
+    game.use_incremental_planner()
+    print(f"{'Matchup':<12}{'Ticks':>8}{'A* nodes':>12}{'D* Lite nodes':>15}{'Saved':>8}")
+    for level in range(len(levels)):
+        totals = [0, 0, 0]
+        for seed in range(args.games):
+            for i, value in enumerate(compare_game(level, seed)):
+                totals[i] += value
+        a_star_nodes, planner_nodes, ticks = totals
+        saved = 1 - planner_nodes / a_star_nodes if a_star_nodes else 0
+        name = f"{algorithm[0]} vs {levels[level].split(' - ')[-1]}"
+        print(f"{name:<12}{ticks:>8}{a_star_nodes:>12}{planner_nodes:>15}{saved:>8.0%}")
@@ -0,0 +1,122 @@
+# File: cost_field.py
+# Description: This file contains the ghost proximity cost field used by A* to keep Pac-Bot away from ghosts.
+# Open cells within GHOST_COST_RADIUS steps (Manhattan distance) of a ghost cost max(1, 10 - d) extra,
+# where d is the distance to the closest ghost. Instead of measuring every cell of the grid against every
+# ghost, a precomputed diamond stencil is stamped around each ghost, so a rebuild costs about
+# 25 cells per ghost no matter how large the maze is.
+#
+# Every cell also counts how many ghosts are at each distance from it. That lets update() patch only
+# the diamonds of the ghosts that moved: when diamonds overlap, removing one ghost falls back to the
+# next closest ghost that still covers the cell. The counts are kept only for cells near a ghost, packed
+# into one int per cell, so apart from the cost grid the field does not grow with the maze.
+
+GHOST_COST_RADIUS = 3  # cells further than this from every ghost have no additional cost
+
+
+def ghost_cost(distance): # Additional cost of a cell at a distance from the closest ghost
+    return max(1, 10 - distance)
+
+
+COUNT_BITS = 16  # bits of each per-distance ghost count in a packed cell count
+COUNT_MASK = (1 << COUNT_BITS) - 1
+DISTANCE_COSTS = [ghost_cost(distance) for distance in range(GHOST_COST_RADIUS + 1)]
+
+# Diamond stencil: (row offset, col offset, Manhattan distance) of every cell within the radius
+GHOST_STENCIL = [
+    (d_row, d_col, abs(d_row) + abs(d_col))
+    for d_row in range(-GHOST_COST_RADIUS, GHOST_COST_RADIUS + 1)
+    for d_col in range(-GHOST_COST_RADIUS, GHOST_COST_RADIUS + 1)
+    if abs(d_row) + abs(d_col) <= GHOST_COST_RADIUS
+]
+
+
+class CostField: # Additional path costs of a maze, stored both as a flat grid and as a dict
+    def __init__(self, maze):
+        self.maze = maze
+        self.grid = bytearray(maze.rows * maze.cols)  # cost by flat cell index, 0 = no additional cost
+        self.costs = {}  # flat cell index -> cost, only the cells with a cost
+        # counts[index]: number of ghosts at each distance d from the cell, packed COUNT_BITS bits per
+        # distance into one int; only cells with a cost have counts
+        self.counts = {}
+        self.ghosts = []  # (row, col) of the ghosts currently stamped
+        self.pending = {}  # cell index -> cost at the last take_changes(), for cells touched since
+
+    def clear(self): # Remove every cost, touching only the cells that have one
+        grid, pending = self.grid, self.pending
+        for index in self.costs:
+            if index not in pending:
+                pending[index] = grid[index]
+            grid[index] = 0
+        self.costs.clear()
+        self.counts.clear()
+        self.ghosts = []
+
+    def take_changes(self): # Cells whose cost changed since the last call, by any clear, rebuild or update
+        grid = self.grid
+        changed = {index for index, cost in self.pending.items() if grid[index] != cost}
+        self.pending = {}
+        return changed
+
+    def _stamp(self, ghost, delta, changed): # Add (delta=1) or remove (delta=-1) one ghost's diamond
+        rows, cols = self.maze.rows, self.maze.cols
+        passable = self.maze.passable
+        grid, costs, counts = self.grid, self.costs, self.counts
+        ghost_row, ghost_col = ghost
+        for d_row, d_col, distance in GHOST_STENCIL:
+            row, col = ghost_row + d_row, ghost_col + d_col
+            if not (0 <= row < rows and 0 <= col < cols):
+                continue
+            index = row * cols + col
+            if not passable[index]:
+                continue
+            shift = COUNT_BITS * distance
+            cell_counts = counts.get(index, 0) + (delta << shift)
+            counts[index] = cell_counts
+            count = (cell_counts >> shift) & COUNT_MASK
+            cost = grid[index]
+            if delta > 0:
+                if DISTANCE_COSTS[distance] <= cost:
+                    continue  # a ghost at least as close already sets the cost
+                cost = DISTANCE_COSTS[distance]
+            else:
+                if count or DISTANCE_COSTS[distance] != cost:
+                    continue  # another ghost still sets the same or a higher cost
+                cost = 0
+                for d in range(distance + 1, GHOST_COST_RADIUS + 1):  # fall back to the next closest ghost
+                    if (cell_counts >> (COUNT_BITS * d)) & COUNT_MASK:
+                        cost = DISTANCE_COSTS[d]
+                        break
+            if index not in changed:
+                changed[index] = grid[index]  # remember the cost before this update
+            grid[index] = cost
+            if cost:
+                costs[index] = cost
+            else:
+                del costs[index]
+                del counts[index]  # no ghost within the radius any more
+
+    def rebuild(self, ghosts): # Recompute the field for a list of [row, col] ghost positions
+        self.clear()
+        for ghost in ghosts:
+            self._stamp(ghost, 1, self.pending)
+        self.ghosts = [tuple(ghost) for ghost in ghosts]
+        return self.costs
+
+    def update(self, old_ghosts, new_ghosts): # Patch the field after ghosts moved from old_ghosts to new_ghosts
+        # Only the diamonds of ghosts whose position changed are touched, so the work scales with the
+        # number of moved ghosts instead of the grid area. Returns the set of cells whose cost changed.
+        changed = {}  # cell index -> cost before the update
+        for old, new in zip(old_ghosts, new_ghosts):
+            if old[0] != new[0] or old[1] != new[1]:
+                self._stamp(old, -1, changed)
+                self._stamp(new, 1, changed)
+        for old in old_ghosts[len(new_ghosts):]:  # ghosts that were removed
+            self._stamp(old, -1, changed)
+        for new in new_ghosts[len(old_ghosts):]:  # ghosts that were added
+            self._stamp(new, 1, changed)
+        self.ghosts = [tuple(ghost) for ghost in new_ghosts]
+        for index, cost in changed.items():
+            if index not in self.pending:
+                self.pending[index] = cost
+        grid = self.grid
+        return {index for index, cost in changed.items() if grid[index] != cost}
@@ -0,0 +1,868 @@
+# File: game.py
+# Description: This file contains the headless game core: maze, food, path costs, searches and movement.
+# It does not import pygame, so the simulator and other tools can use it without a display.
+import heapq
+import random
+from collections import deque
+from maze import DIRECTIONS, build_default_maze
+import path_table
+import jps
+from cost_field import CostField
+from planner import DStarLitePlanner
+from path_cache import PathCache, MAX_PATH_AGE
+import search_stats
+
+# ==== Game settings ==============================================================================
+#
+# =================================================================================================
+levels = ["Beginner Ghost - DFS", "Intermediate Ghost - BFS", "Advanced Ghost - A*", "Expert Ghost - JPS"]
+algorithm = ["A*", "BFS", "DFS", "JPS"]
+ROLLOUT_PAC_INDEX = 255 # Pac-Bot AI index of the games a pacman_policy plays, in replays and the result store
+ROLLOUT_NAME = "Rollout" # Pac-Bot AI name of those games
+
+game_duration = 60 # seconds
+FPS = 5 # game ticks per second, the interactive loop runs at this frame rate
+FOOD_COUNT = 3 # food pellets on the map at a time
+GHOST_MOVE_DELAY = 3 # headless games (step_game callers) move the ghosts every this many ticks
+
+# Screen dimensions, the maze size is derived from them
+WIDTH, HEIGHT = 800, 600  # Updated dimensions
+TILE_SIZE = 20
+METRICS_HEIGHT = 50  # Height of the metrics area
+
+# Create a grid/map size, use_maze switches the game to another maze
+ROWS, COLS = (HEIGHT - METRICS_HEIGHT) // TILE_SIZE, WIDTH // TILE_SIZE
+maze = build_default_maze(ROWS, COLS)  # grid-backed maze with O(1) wall lookups
+passable = maze.passable  # passability bitmap, indexed by row * COLS + col
+PACMAN_START = maze.pacman_start
+pacman_pos = list(PACMAN_START)  # pacman position
+
+center_row = ROWS // 2
+center_col = COLS // 2
+
+steps_taken = 0 # initialize the steps counter for Pacman
+bfs_table = None # optional memory-mapped all-pairs table that answers bfs queries, see use_path_table
+pacman_planner = None # optional incremental A* planner for Pac-Bot, see use_incremental_planner
+path_cache = None # optional per-agent path reuse cache, see use_path_cache
+nearest_food = False # Pac-Bot heads for the nearest pellet instead of the first one, see use_nearest_food
+pacman_policy = None # optional lookahead policy that picks Pac-Bot's steps in step_game, see game_state.use_rollout_policy
+ticks_played = 0 # ticks played by step_game since the last reset_game
+anytime_budget = None # (ns, expansions) per-tick budget of the anytime A* searches, see use_anytime_search
+last_anytime = {} # agent -> (budget hit, suboptimality bound) of its last anytime search, shown by pacbot.py
+
+def pacbot_name(pac_algo_index): # Pac-Bot AI name of an algorithm index or of ROLLOUT_PAC_INDEX
+    return ROLLOUT_NAME if pac_algo_index == ROLLOUT_PAC_INDEX else algorithm[pac_algo_index]
+
+def generate_food(num_food, layout=None, rng=random):  # Generate food in valid positions, on the game maze unless layout is given
+    # rng draws the positions, a random.Random gives a game its own random stream (see batch_engine.py)
+    if layout is None:
+        layout = maze
+    rows, cols, cells = layout.rows, layout.cols, layout.passable
+    food = []
+    while len(food) < num_food:
+        pos = [rng.randint(0, rows - 1), rng.randint(0, cols - 1)]
+        if (
+            cells[pos[0] * cols + pos[1]] and pos not in food
+        ):  # ensure food is not in a wall or duplicate
+            food.append(pos)
+    return food
+
+ENEMY_STARTS = maze.ghost_starts # Enemies spawn in the center box
+enemies = [list(enemy) for enemy in ENEMY_STARTS]
+
+cost_field = CostField(maze)  # ghost proximity costs, stamped around each ghost
+cost_grid = cost_field.grid  # additional cost by flat cell index (row * COLS + col), read by A*
+additional_costs = cost_field.costs # Initialize additional costs, keyed by flat cell index
+
+def update_costs_based_on_ghosts(): # Update path costs based only on proximity to ghosts
+    global additional_costs
+    # Closer to ghosts = higher cost: 10 - distance within 3 tiles of a ghost (Cost: 9, 8, 7)
+    additional_costs = cost_field.rebuild(enemies)
+
+def update_costs_based_on_ghosts_and_food(food, field=None, ghosts=None): # Update path costs based on proximity to ghosts and food
+    # field and ghosts rebuild the cost field of another maze instead of the game's
+    global additional_costs
+    if field is not None:
+        return field.rebuild(ghosts)
+    # Assign a cost inversely proportional to the distance, closer to ghosts = higher cost
+    additional_costs = cost_field.rebuild(enemies)  # max(1, 10 - distance) within 3 tiles of a ghost
+
+def update_costs_for_moved_ghosts(): # Patch the path costs around the ghosts that moved since the last update
+    # Same costs as a full update, but only the cells near moved ghosts are touched.
+    # Returns the set of flat cell indices whose cost changed.
+    return cost_field.update(cost_field.ghosts, enemies)
+
+# ==== Search Algorithms ==========================================================================
+#
+# =================================================================================================
+def heuristic(a, b):  # Calculate the Manhattan distance between two points
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def build_path(came_from, current, cols=None): # Walk came_from back from current and return the [row, col] path
+    if cols is None:
+        cols = COLS
+    path = []
+    while current is not None:
+        path.append(list(divmod(current, cols)))
+        current = came_from[current]
+    path.reverse()
+    return path[1:]  # return the path skipping the starting point
+
+def a_star_search( # start, goal):  # A* search algorithm
+    start, goal, layout=None, costs=None
+):  
+    # layout and costs search another maze and its cost grid instead of the game's (no costs: no additional costs)
+    if layout is None:
+        layout, costs = maze, cost_grid
+    elif costs is None:
+        costs = bytes(layout.rows * layout.cols)
+    neighbors = layout.neighbors
+    cols = layout.cols
+    goal_row, goal_col = goal
+    start_index = start[0] * cols + start[1]  # cells are tracked by flat index
+    goal_index = goal_row * cols + goal_col
+    open_set = []
+    heapq.heappush(open_set, (0, start_index))
+    came_from = {start_index: None}
+    g_score = {start_index: 0}
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    expanded = peak = 0
+    path = []
+
+    while open_set:  # Pop the node with the lowest f_score
+        if track and len(open_set) > peak:
+            peak = len(open_set)
+        _, current = heapq.heappop(open_set)
+        expanded += 1
+
+        if current == goal_index:
+            path = build_path(came_from, current, cols)
+            break
+
+        for neighbor in neighbors[current]:  # Only open, in-bounds neighbors are in the table
+            # Add the additional cost of the neighbor, read from the cost grid
+            tentative_g_score = g_score[current] + 1 + costs[neighbor]
+
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                n_row, n_col = divmod(neighbor, cols)
+                f_score = tentative_g_score + abs(n_row - goal_row) + abs(n_col - goal_col)
+                heapq.heappush(open_set, (f_score, neighbor))
+    if track:
+        search_stats.record("A*", expanded, peak, len(path), start_ns, len(came_from))
+    return path
+
+def dfs(start, goal, layout=None, rng=random): # DFS algo lvl0 to find a path from start to goal, on the game maze unless layout is given
+    # rng shuffles the directions, as in generate_food
+    if layout is None:
+        layout = maze
+    rows, cols, cells = layout.rows, layout.cols, layout.passable
+    start_index = start[0] * cols + start[1]
+    goal_index = goal[0] * cols + goal[1]
+    stack = [start_index]  # starting point on the stack
+    came_from = {start_index: None}  # tracking the path
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    expanded = peak = 0
+    path = []
+    
+    while stack:
+        if track and len(stack) > peak:
+            peak = len(stack)
+        current = stack.pop()  # get the most recently added node (LIFO)
+        expanded += 1
+        
+        if current == goal_index:
+            path = build_path(came_from, current, cols)
+            break
+        
+        # Randomize directions to make ghost movement less predictable
+        directions_copy = DIRECTIONS.copy()
+        rng.shuffle(directions_copy)
+        row, col = divmod(current, cols)
+        
+        for d in directions_copy: # Move in all directions
+            n_row, n_col = row + d[0], col + d[1]
+            
+            if 0 <= n_row < rows and 0 <= n_col < cols:
+                neighbor = n_row * cols + n_col
+                if cells[neighbor] and neighbor not in came_from:
+                    came_from[neighbor] = current
+                    stack.append(neighbor)
+    
+    if track:
+        search_stats.record("DFS", expanded, peak, len(path), start_ns, len(came_from))
+    return path  # empty when no path was found
+
+def bfs(start, goal, layout=None): # BFS algorithm lvl1 to find the shortest path from start to goal, on the game maze unless layout is given
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    if bfs_table is not None and layout is None:  # precomputed table: walk the stored next moves, same path as the search
+        path = [list(divmod(index, COLS)) for index in bfs_table.path(start[0] * COLS + start[1], goal[0] * COLS + goal[1])]
+        if track:
+            search_stats.record("BFS table", 0, 0, len(path), start_ns)  # lookups, no nodes expanded
+        return path
+    if layout is None:
+        layout = maze
+    neighbors = layout.neighbors
+    cols = layout.cols
+    start_index = start[0] * cols + start[1]
+    goal_index = goal[0] * cols + goal[1]
+    queue = deque([start_index])     #starting point in the queue
+    came_from = {start_index: None}  # Keeping track
+    peak = 0
+    path = []
+
+    while queue:
+        if track and len(queue) > peak:
+            peak = len(queue)
+        current = queue.popleft() # get the next place to check
+
+        if current == goal_index:  
+            path = build_path(came_from, current, cols)  # path taken, skipping the starting point
+            break
+
+        for neighbor in neighbors[current]: # Move in all open directions
+            if neighbor not in came_from:
+                came_from[neighbor] = current
+                queue.append(neighbor)
+    if track:  # every cell in came_from was queued once, the ones still queued were not expanded
+        search_stats.record("BFS", len(came_from) - len(queue), peak, len(path), start_ns, len(came_from))
+    return path  # empty when no path was found
+
+def jps_search(start, goal, layout=None, costs=None): # Jump Point Search: paths as cheap as A*'s, fewer nodes expanded
+    # layout and costs (flat cell index -> cost, as CostField.costs) search another maze instead of the
+    # game's (no costs: no additional costs). The scans run on the maze's bitboards, see jps.py.
+    if layout is None:
+        layout, costs = maze, cost_field.costs
+    return jps.jps_search(start, goal, layout, costs)
+
+# ==== Nearest food searches ======================================================================
+# One search toward every pellet at once: it stops at the first pellet it settles, which is the cheapest
+# (A*) or closest (BFS) one to reach. Both return (target, path), target is None when no pellet is reachable.
+# =================================================================================================
+def a_star_search_nearest(start, goals, layout=None, costs=None): # A* toward the cheapest of several goals
+    # The heuristic is the Manhattan distance to the closest goal. The minimum of consistent heuristics
+    # is consistent, so the first goal popped is the cheapest to reach. With one goal this is a_star_search.
+    if layout is None:
+        layout, costs = maze, cost_grid
+    elif costs is None:
+        costs = bytes(layout.rows * layout.cols)
+    neighbors = layout.neighbors
+    cols = layout.cols
+    goal_cells = {goal[0] * cols + goal[1] for goal in goals}
+    goal_positions = [(goal[0], goal[1]) for goal in goals]
+    start_index = start[0] * cols + start[1]
+    open_set = []
+    heapq.heappush(open_set, (0, start_index))
+    came_from = {start_index: None}
+    g_score = {start_index: 0}
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    expanded = peak = 0
+    target, path = None, []
+
+    while open_set:  # Pop the node with the lowest f_score
+        if track and len(open_set) > peak:
+            peak = len(open_set)
+        _, current = heapq.heappop(open_set)
+        expanded += 1
+
+        if current in goal_cells:
+            target, path = list(divmod(current, cols)), build_path(came_from, current, cols)
+            break
+
+        for neighbor in neighbors[current]:
+            tentative_g_score = g_score[current] + 1 + costs[neighbor]
+
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                n_row, n_col = divmod(neighbor, cols)
+                closest = None
+                for goal_row, goal_col in goal_positions:
+                    distance = abs(n_row - goal_row) + abs(n_col - goal_col)
+                    if closest is None or distance < closest:
+                        closest = distance
+                heapq.heappush(open_set, (tentative_g_score + closest, neighbor))
+    if track:
+        search_stats.record("A* nearest", expanded, peak, len(path), start_ns, len(came_from))
+    return target, path
+
+def bfs_nearest(start, goals, layout=None): # BFS toward the closest of several goals
+    # With the path table, the closest goal is read from the table's distances. Ties go to the goal the
+    # search reaches first: BFS discovers a cell when it pops the cell's parent, in neighbor order, so
+    # among equally close goals the first one is the one whose path takes the earliest neighbors.
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    if bfs_table is not None and layout is None:
+        start_index = start[0] * COLS + start[1]
+        target, best, path = None, None, []
+        order = None  # position of every step of path among its cell's neighbors
+        for goal in goals:
+            goal_index = goal[0] * COLS + goal[1]
+            goal_path = bfs_table.path(start_index, goal_index)  # also right from a wall cell, unlike the distances
+            steps = len(goal_path)
+            if (not goal_path and goal_index != start_index) or (best is not None and steps > best):
+                continue
+            goal_order, previous = [], start_index
+            for cell in goal_path:
+                goal_order.append(maze.neighbors[previous].index(cell))
+                previous = cell
+            if best is None or steps < best or goal_order < order:
+                target, best, path, order = goal, steps, goal_path, goal_order
+        path = [list(divmod(index, COLS)) for index in path]
+        if track:
+            search_stats.record("BFS table nearest", 0, 0, len(path), start_ns)
+        return (list(target) if target is not None else None), path
+    if layout is None:
+        layout = maze
+    neighbors = layout.neighbors
+    cols = layout.cols
+    goal_cells = {goal[0] * cols + goal[1] for goal in goals}
+    start_index = start[0] * cols + start[1]
+    queue = deque([start_index])
+    came_from = {start_index: None}
+    peak = 0
+    target, path = None, []
+
+    while queue:
+        if track and len(queue) > peak:
+            peak = len(queue)
+        current = queue.popleft()
+
+        if current in goal_cells:
+            target, path = list(divmod(current, cols)), build_path(came_from, current, cols)
+            break
+
+        for neighbor in neighbors[current]:
+            if neighbor not in came_from:
+                came_from[neighbor] = current
+                queue.append(neighbor)
+    if track:  # as in bfs
+        search_stats.record("BFS nearest", len(came_from) - len(queue), peak, len(path), start_ns, len(came_from))
+    return target, path
+
+# ==== Anytime search ==============================================================================
+# ARA*: a series of weighted A* passes with falling heuristic weights. Each pass reuses the g values of the
+# last one and only re-expands the cells whose g dropped, so a first path is found quickly and improved
+# while the budget lasts. It returns the best path so far when the budget runs out.
+# =================================================================================================
+ANYTIME_WEIGHTS = (3.0, 2.0, 1.5, 1.25, 1.0)  # heuristic weights of the successive passes, the last gives the optimal path
+ANYTIME_BUDGET_US = 150_000  # default per-tick planning budget, below the 200 ms of a frame at 5 fps
+ANYTIME_CLOCK_EVERY = 64  # expansions between two clock reads of a time budget
+
+def anytime_a_star_search( # ARA* from start to goal within a time or expansion budget
+    start, goal, layout=None, costs=None, deadline_ns=None, max_expansions=None, weights=ANYTIME_WEIGHTS
+):
+    # layout and costs as in a_star_search. The search stops at deadline_ns (a time.perf_counter_ns value)
+    # or after max_expansions, whichever comes first; None means no limit.
+    # Returns (path, bound, budget hit). bound is the proven suboptimality of the path: its cost is at most
+    # bound times the optimal cost, 1.0 when it is optimal. When no path to the goal was found in the budget,
+    # bound is None and path leads to the reached cell closest to the goal (the best partial plan).
+    if layout is None:
+        layout, costs = maze, cost_grid
+    elif costs is None:
+        costs = bytes(layout.rows * layout.cols)
+    neighbors = layout.neighbors
+    cols = layout.cols
+    goal_row, goal_col = goal
+    start_index = start[0] * cols + start[1]
+    goal_index = goal_row * cols + goal_col
+    came_from = {start_index: None}
+    g_score = {start_index: 0}
+    open_cells = {start_index}  # cells to expand in this pass, stale heap entries are skipped
+    inconsistent = set()  # cells whose g dropped after this pass expanded them, expanded by the next pass
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+    expanded = peak = 0
+    budget_hit = False
+    bound = None
+    done_weight = None  # weight of the last pass that ran to completion
+
+    def h(index):
+        row, col = divmod(index, cols)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+    for weight in weights:
+        if deadline_ns is not None and done_weight is not None and search_stats.now() >= deadline_ns:
+            budget_hit = True  # out of time before the next pass rebuilds its heap
+            break
+        open_cells |= inconsistent
+        inconsistent = set()
+        open_set = [(g_score[cell] + weight * h(cell), cell, g_score[cell]) for cell in open_cells]  # (f, cell, g)
+        heapq.heapify(open_set)
+        closed = set()
+        while open_set:
+            if track and len(open_set) > peak:
+                peak = len(open_set)
+            f_score, current, pushed_g = open_set[0]
+            if current not in open_cells or pushed_g != g_score[current]:
+                heapq.heappop(open_set)  # stale entry
+                continue
+            if goal_index in g_score and g_score[goal_index] <= f_score:
+                break  # no open cell can improve the path found at this weight
+            if (max_expansions is not None and expanded >= max_expansions) or (
+                deadline_ns is not None and expanded % ANYTIME_CLOCK_EVERY == 0 and search_stats.now() >= deadline_ns
+            ):
+                budget_hit = True
+                break
+            heapq.heappop(open_set)
+            open_cells.discard(current)
+            closed.add(current)
+            expanded += 1
+            for neighbor in neighbors[current]:
+                tentative_g_score = g_score[current] + 1 + costs[neighbor]
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    if neighbor in closed:
+                        inconsistent.add(neighbor)
+                    else:
+                        open_cells.add(neighbor)
+                        n_row, n_col = divmod(neighbor, cols)
+                        f_score = tentative_g_score + weight * (abs(n_row - goal_row) + abs(n_col - goal_col))
+                        heapq.heappush(open_set, (f_score, neighbor, tentative_g_score))
+        if not budget_hit:
+            done_weight = weight
+        if goal_index in g_score:
+            # the optimal cost is at least the smallest g + h of a cell still to expand
+            lower = min((g_score[cell] + h(cell) for cell in open_cells | inconsistent), default=None)
+            bound = 1.0 if not lower else max(1.0, g_score[goal_index] / lower)
+            if done_weight is not None:
+                bound = min(bound, done_weight)
+            if bound == 1.0:
+                break
+        if budget_hit:
+            break
+
+    if goal_index in g_score:
+        path = build_path(came_from, goal_index, cols)
+    else:  # best partial plan: toward the reached cell closest to the goal, the cheaper one on ties
+        closest = min(g_score, key=lambda cell: (h(cell), g_score[cell]))
+        path = build_path(came_from, closest, cols)
+    if track:
+        search_stats.record("ARA*", expanded, peak, len(path), start_ns, len(came_from))
+        search_stats.record_anytime(budget_hit, bound)
+    return path, bound, budget_hit
+
+# ==== Shared ghost searches =====================================================================
+# All ghosts chase the same target, so one reverse search rooted at Pacman serves every ghost.
+# =================================================================================================
+def bfs_distance_field(goal, targets): # Reverse BFS from goal, stops once every target cell index is reached
+    neighbors = maze.neighbors
+    goal_index = goal[0] * COLS + goal[1]
+    dist = {goal_index: 0}  # steps from each reached cell to goal
+    remaining = set(targets)
+    remaining.discard(goal_index)
+    queue = deque([goal_index])
+    track = search_stats.enabled  # instrumentation, see search_stats.py; a field has no path length
+    if track:
+        start_ns = search_stats.now()
+    peak = 0
+
+    while queue and remaining:
+        if track and len(queue) > peak:
+            peak = len(queue)
+        current = queue.popleft()
+        step = dist[current] + 1
+        for neighbor in neighbors[current]:
+            if neighbor not in dist:
+                dist[neighbor] = step
+                remaining.discard(neighbor)
+                queue.append(neighbor)
+    if track:
+        search_stats.record("BFS field", len(dist) - len(queue), peak, 0, start_ns, len(dist))  # as in bfs
+    return dist
+
+def cost_distance_field(goal, targets): # Reverse Dijkstra from goal over the A* path costs
+    # Moving into a cell costs 1 + its additional cost, the same edge costs a_star_search uses.
+    # Costs are small integers, so the frontier is a list of buckets indexed by path cost.
+    # Stops once every target cell index is settled; cells that are not settled keep an upper bound.
+    neighbors = maze.neighbors
+    goal_index = goal[0] * COLS + goal[1]
+    dist = {goal_index: 0}  # cheapest path cost from each reached cell to goal
+    remaining = set(targets)
+    buckets = [[goal_index]]
+    cost = 0
+    queued = 1
+    track = search_stats.enabled  # instrumentation, see search_stats.py; a field has no path length
+    if track:
+        start_ns = search_stats.now()
+    expanded = peak = 0
+
+    while queued and remaining:
+        if track and queued > peak:
+            peak = queued
+        while not buckets[cost]:
+            cost += 1
+        current = buckets[cost].pop()
+        queued -= 1
+        if cost > dist[current]:
+            continue  # stale entry, current was settled with a lower cost
+        expanded += 1
+        remaining.discard(current)
+        step = cost + 1 + cost_grid[current]  # cost of moving from a neighbor into current
+        for neighbor in neighbors[current]:
+            if neighbor not in dist or step < dist[neighbor]:
+                dist[neighbor] = step
+                while len(buckets) <= step:
+                    buckets.append([])
+                buckets[step].append(neighbor)
+                queued += 1
+    if track:
+        search_stats.record("A* field", expanded, peak, 0, start_ns, len(dist))
+    return dist
+
+# a_star_search breaks ties between equally cheap first steps by its heap order, which a shared field
+# cannot reproduce: about two thirds of A* ghost moves have a tie. With this set, A* ghosts keep running
+# their own a_star_search so moves stay identical; turn it off to move every A* ghost from one shared
+# cost field, resolving ties in DIRECTIONS order (the same cost, a different but equally cheap move).
+EXACT_A_STAR_TIES = True
+
+def field_targets(cells): # Cells a distance field has to reach so every cell in cells can pick its step
+    # An open cell needs itself. Ghosts can also stand on a wall cell (they spawn in the walls around
+    # the ghost box), which the reverse search never enters, so those need all of their open neighbors.
+    targets = set()
+    for index in cells:
+        if passable[index]:
+            targets.add(index)
+        else:
+            targets.update(maze.neighbors[index])
+    return targets
+
+def bfs_step_from_field(start_index, goal_index, dist): # Next cell of bfs(start, goal) read from a bfs_distance_field
+    # bfs returns the shortest path whose moves come first in DIRECTIONS order, so its first step is
+    # the first neighbor in DIRECTIONS order that is closest to the goal.
+    if start_index == goal_index:
+        return None  # already at the goal
+    step = None
+    for neighbor in maze.neighbors[start_index]:
+        if neighbor in dist and (step is None or dist[neighbor] < dist[step]):
+            step = neighbor
+    return step  # None when there is no path
+
+def a_star_steps_from_field(start_index, goal_index, dist): # First steps of the cheapest paths to goal, from a cost_distance_field
+    # More than one step means a tie, which a_star_search breaks by its heap order.
+    if start_index == goal_index:
+        return []
+    best = None
+    steps = []
+    for neighbor in maze.neighbors[start_index]:
+        if neighbor in dist:
+            cost = 1 + cost_grid[neighbor] + dist[neighbor]
+            if best is None or cost < best:
+                best = cost
+                steps = [neighbor]
+            elif cost == best:
+                steps.append(neighbor)
+    return steps
+
+# ==== Movement/Collision logic ===================================================================
+#
+# =================================================================================================
+recent_positions = deque(maxlen=5)  # Keep track of the last 5 positions
+
+def a_star_within_budget(start, goal): # a_star_search, or the anytime search within its share of the tick budget
+    # Pacman and every ghost can search in the same tick, so each search gets an equal share of the budget.
+    if anytime_budget is None:
+        return a_star_search(start, goal)
+    budget_ns, max_expansions = anytime_budget
+    searchers = 1 + len(enemies)
+    path, bound, budget_hit = anytime_a_star_search(
+        start, goal, deadline_ns=search_stats.now() + budget_ns // searchers if budget_ns else None,
+        max_expansions=max(1, max_expansions // searchers) if max_expansions else None
+    )
+    last_anytime[search_stats.agent] = (budget_hit, bound)
+    return path
+
+def search_with_algorithm(algo_index, start, goal): # Run the search for an algorithm index: 0 = A*, 1 = BFS, 2 = DFS, 3 = JPS
+    if algo_index == 0:
+        return a_star_within_budget(start, goal)
+    elif algo_index == 1:
+        return bfs(start, goal)
+    elif algo_index == 3:
+        return jps_search(start, goal)
+    return dfs(start, goal)
+
+def pacman_next_step(selected_bot, target, food=None): # Next [row, col] for Pacman toward target, None when there is no path
+    # With use_nearest_food and the food list given, A* and BFS head for the nearest pellet instead of
+    # target, found in the same single search. DFS keeps target: its first path is not the shortest. JPS
+    # keeps target too: its jumps stop at a single goal.
+    search_stats.agent = "Pac-Bot"
+    goals = food if nearest_food and food and selected_bot in (0, 1) else None
+    if selected_bot == 0 and pacman_planner is not None:  # A* with the incremental planner
+        if not search_stats.enabled:
+            return pacman_planner.next_step(pacman_pos, target, cost_field.take_changes(), goals)
+        start_ns, expansions = search_stats.now(), pacman_planner.expansions
+        step = pacman_planner.next_step(pacman_pos, target, cost_field.take_changes(), goals)
+        # the planner returns one step instead of a path, and keeps its heap between calls: its size
+        # after the repair stands in for the peak frontier
+        search_stats.record(
+            "D* Lite", pacman_planner.expansions - expansions, len(pacman_planner.queue), 1 if step else 0, start_ns,
+            len(pacman_planner.g)
+        )
+        return step
+    if path_cache is not None:
+        if goals is None:
+            goal = target[0] * COLS + target[1]
+        else:
+            goal = tuple(cell[0] * COLS + cell[1] for cell in goals)
+        return cached_step("Pac-Bot", pacman_pos, goal, selected_bot, lambda: pacman_path(selected_bot, target, goals))
+    path = pacman_path(selected_bot, target, goals)
+    return path[0] if path else None
+
+def pacman_path(selected_bot, target, goals=None): # Pacman's search toward target, or toward the nearest of goals
+    if goals is not None:
+        if selected_bot == 0:
+            return a_star_search_nearest(pacman_pos, goals)[1]
+        return bfs_nearest(pacman_pos, goals)[1]
+    return search_with_algorithm(selected_bot, pacman_pos, target)
+
+def cached_step(key, position, goal, algo_index, search): # Next step of an agent from the path cache, running search() on a miss
+    # A* and JPS paths are checked against the path costs. DFS paths get a random age limit from the game's
+    # random stream, so DFS agents still re-roll their path at random points of a seeded game.
+    step, evicted = path_cache.next_step(key, position, goal)
+    if search_stats.counting:
+        search_stats.record_cache(step is not None, evicted is not None)
+    if step is not None:
+        return step
+    path = search()
+    if path and not isinstance(goal, tuple) and path[-1][0] * COLS + path[-1][1] != goal:
+        return path[0]  # partial plan of an anytime search that ran out of budget, not cached
+    age_limit = random.randint(1, path_cache.max_age) if algo_index == 2 else None
+    path_cache.store(key, position, path, goal, algo_index in (0, 3), age_limit)
+    return path[0] if path else None
+
+def move_pacman_with_algorithm(target, selected_bot, food=None):  # Move Pacman using the selected algorithm
+    global steps_taken, recent_positions
+    recent_positions.append(tuple(pacman_pos))  # store the current position
+
+    # Check if Pacman is oscillating between positions
+    if len(recent_positions) == recent_positions.maxlen and len(set(recent_positions)) <= 2: 
+        if pacman_pos[0] < target[0]:  # Move in the direction of the target
+            pacman_pos[0] += 1
+        elif pacman_pos[0] > target[0]:
+            pacman_pos[0] -= 1
+        elif pacman_pos[1] < target[1]:
+            pacman_pos[1] += 1
+        elif pacman_pos[1] > target[1]:
+            pacman_pos[1] -= 1
+        steps_taken += 1
+        return
+
+    step = pacman_next_step(selected_bot, target, food)  # Use the selected algorithm to find a path
+
+    if step:  # Path found
+        pacman_pos[0], pacman_pos[1] = step  # Move to the next position in the path
+        steps_taken += 1  # Increment the steps counter
+
+def move_enemy_with_bfs(enemy, target):  # Move a single enemy using BFS
+    path = bfs(enemy, target)
+    if path:
+        return path[0]  # return the next position in the path
+    return enemy  # if no path is found, stay in the same position
+
+def move_enemy_with_dfs(enemy, target):  # Move a single enemy using DFS
+    path = dfs(enemy, target)
+    if path:
+        return path[0]  # return the next position in the path
+    return enemy  # if no path is found, stay in the same position
+
+def move_enemy_with_a_star(enemy, target):  # Move a single enemy using A*
+    path = a_star_within_budget(enemy, target)
+    if path:
+        return path[0]  # return the next position in the path
+    return enemy  # if no path is found, stay in the same position
+
+def move_enemy_with_jps(enemy, target):  # Move a single enemy using JPS
+    path = jps_search(enemy, target)
+    if path:
+        return path[0]  # return the next position in the path
+    return enemy  # if no path is found, stay in the same position
+
+def check_collision_with_enemies(): # Check for collision with enemies
+    for enemy in enemies:
+        if pacman_pos[0] == enemy[0] and pacman_pos[1] == enemy[1]: # Check if pacman and enemy are in the same position
+            return True  # Collision detected
+    return False  # No collision
+
+def move_enemies(selected_level):  # Move enemies based on the selected level
+    search_stats.agent = "Ghosts"
+    if selected_level in (0, 3) or (selected_level == 2 and EXACT_A_STAR_TIES):
+        for i, enemy in enumerate(enemies): # every ghost runs its own search
+            if path_cache is not None:  # cached_step takes the Pac-Bot algorithm index: 2 = DFS, 0 = A*, 3 = JPS
+                pacman_index = pacman_pos[0] * COLS + pacman_pos[1]
+                if selected_level == 0:
+                    step = cached_step(i, enemy, pacman_index, 2, lambda: dfs(enemy, pacman_pos))
+                elif selected_level == 3:
+                    step = cached_step(i, enemy, pacman_index, 3, lambda: jps_search(enemy, pacman_pos))
+                else:
+                    step = cached_step(i, enemy, pacman_index, 0, lambda: a_star_within_budget(enemy, pacman_pos))
+                new_pos = step if step else enemy
+            elif selected_level == 0:  # Beginner: DFS
+                new_pos = move_enemy_with_dfs(enemy, pacman_pos)
+            elif selected_level == 3:  # Expert: JPS
+                new_pos = move_enemy_with_jps(enemy, pacman_pos)
+            else:  # Advanced: A*
+                new_pos = move_enemy_with_a_star(enemy, pacman_pos)
+            enemies[i] = [new_pos[0], new_pos[1]]
+        return
+
+    # Intermediate (BFS) and shared-field Advanced (A*): one search rooted at Pacman, read by every ghost
+    pacman_index = pacman_pos[0] * COLS + pacman_pos[1]
+    if not passable[pacman_index]:
+        return  # the searches never enter a wall cell, so no ghost has a path
+    ghost_cells = [enemy[0] * COLS + enemy[1] for enemy in enemies]
+    if selected_level == 1 and bfs_table is not None:  # Intermediate with a table: O(1) lookup per ghost
+        track = search_stats.enabled
+        for i, cell in enumerate(ghost_cells):
+            if track:
+                start_ns = search_stats.now()
+            step = bfs_table.next_step(cell, pacman_index)
+            if step is not None:
+                enemies[i] = [step // COLS, step % COLS]
+            if track:
+                search_stats.record("BFS table", 0, 0, 0 if step is None else 1, start_ns)
+        return
+    if selected_level == 1:  # Intermediate: BFS
+        dist = bfs_distance_field(pacman_pos, field_targets(ghost_cells))
+    else:  # Advanced: A*
+        dist = cost_distance_field(pacman_pos, field_targets(ghost_cells))
+
+    for i, cell in enumerate(ghost_cells):
+        if selected_level == 1:
+            step = bfs_step_from_field(cell, pacman_index, dist)
+        else:
+            steps = a_star_steps_from_field(cell, pacman_index, dist)
+            step = steps[0] if steps else None  # ties go to the first step in DIRECTIONS order
+        if step is not None:
+            enemies[i] = [step // COLS, step % COLS]
+
+def use_path_table(enabled=True, cache_dir=path_table.DEFAULT_CACHE_DIR): # Answer bfs queries from the all-pairs table
+    # The table is built on first use and cached on disk under cache_dir, keyed by the wall layout.
+    global bfs_table
+    if bfs_table is not None:
+        bfs_table.close()
+        bfs_table = None
+    if enabled:
+        bfs_table = path_table.load_path_table(maze, cache_dir)
+    return bfs_table
+
+def use_incremental_planner(enabled=True): # Plan Pac-Bot's A* moves with the incremental D* Lite planner
+    # The planner gets the cells whose cost changed from the cost field, and plans from scratch only
+    # when the target food changes. Its moves are as cheap as a_star_search's, but equally cheap
+    # moves can be picked differently.
+    global pacman_planner
+    pacman_planner = DStarLitePlanner(maze, cost_grid) if enabled else None
+    cost_field.take_changes()
+    return pacman_planner
+
+def use_path_cache(enabled=True, max_age=MAX_PATH_AGE): # Reuse each agent's last path while it stays valid
+    # Pac-Bot and the ghosts that run their own search (DFS, JPS, and A* with EXACT_A_STAR_TIES) take the next
+    # step of their cached path instead of searching again, see path_cache.py for the validity rules.
+    # Moves are still along valid paths, but no longer the ones a fresh search would pick every tick.
+    # The incremental planner and the shared ghost fields already avoid repeated work and skip the cache.
+    global path_cache
+    path_cache = PathCache(maze, cost_grid, max_age) if enabled else None
+    return path_cache
+
+def use_nearest_food(enabled=True): # Send Pac-Bot's A* and BFS toward the nearest pellet instead of food[0]
+    # One multi-goal search replaces the single-goal one: it stops at the first pellet it settles, so it
+    # costs at most as much as a search to the farthest pellet and usually far less. Ties between
+    # equally near pellets go to the first one the search reaches.
+    global nearest_food
+    nearest_food = enabled
+    return nearest_food
+
+def use_anytime_search(enabled=True, budget_us=ANYTIME_BUDGET_US, max_expansions=None): # Bound the A* planning time of a tick
+    # Pacman's and the ghosts' A* searches run anytime_a_star_search instead of a_star_search, and the
+    # searches of one tick share budget_us microseconds and max_expansions expansions (None: no limit of
+    # that kind). When a search runs out, the agent follows the best path found so far, which need not be
+    # the cheapest. The nearest-food search, the incremental planner and the shared ghost fields are not bounded.
+    global anytime_budget
+    anytime_budget = (budget_us * 1000 if budget_us else None, max_expansions) if enabled else None
+    last_anytime.clear()
+    return anytime_budget
+
+def use_maze(new_maze): # Play on another maze, for example from maze.generate_maze or maze_io.load_maze
+    # Every function of the game core reads the maze through these names, so switching them moves the
+    # searches, food spawning, path costs and spawn points to the new maze. The path table and the
+    # incremental planner are rebuilt for it when they are in use.
+    global maze, passable, ROWS, COLS, center_row, center_col, PACMAN_START, ENEMY_STARTS
+    global cost_field, cost_grid, additional_costs
+    maze = new_maze
+    passable = maze.passable
+    ROWS, COLS = maze.rows, maze.cols
+    center_row, center_col = ROWS // 2, COLS // 2
+    PACMAN_START = maze.pacman_start
+    ENEMY_STARTS = maze.ghost_starts
+    cost_field = CostField(maze)
+    cost_grid = cost_field.grid
+    additional_costs = cost_field.costs
+    if bfs_table is not None:
+        use_path_table()
+    if pacman_planner is not None:
+        use_incremental_planner()
+    if path_cache is not None:
+        use_path_cache(max_age=path_cache.max_age)
+    reset_game()
+    return maze
+
+def reset_game(): # Put Pacman and the ghosts back at their spawn points and clear the game counters
+    global steps_taken, ticks_played
+    pacman_pos[:] = PACMAN_START
+    enemies[:] = [list(enemy) for enemy in ENEMY_STARTS]
+    recent_positions.clear()
+    cost_field.clear()
+    if pacman_planner is not None:
+        pacman_planner.reset()
+    if path_cache is not None:
+        path_cache.clear()
+    last_anytime.clear()
+    steps_taken = 0
+    ticks_played = 0
+
+def collect_food(food): # Remove food under Pacman, returns the number of pellets eaten
+    eaten = 0
+    for powerup in food[:]: # Check for collision with food
+        if pacman_pos == powerup:
+            food.remove(powerup)
+            eaten += 1
+    return eaten
+
+def step_game(food, pac_algo_index, ghost_level, ghosts_move=True): # Advance a headless game by one tick
+    # Pacman takes one step of its search toward food[0] (the nearest pellet with use_nearest_food), then the
+    # ghosts chase Pacman when ghosts_move is set. With a pacman_policy, the policy picks Pacman's step instead.
+    # Returns (food, food eaten this tick, collided with a ghost); food is a new list when it was respawned.
+    global steps_taken, ticks_played
+    if food:
+        if pacman_policy is not None:
+            step = pacman_policy.next_step(food, ghost_level)
+        else:
+            step = pacman_next_step(pac_algo_index, food[0], food)
+        if step:
+            pacman_pos[0], pacman_pos[1] = step
+            steps_taken += 1
+
+    if ghosts_move:
+        move_enemies(ghost_level)
+
+    collided = check_collision_with_enemies()
+
+    eaten = collect_food(food)
+    if eaten:
+        update_costs_based_on_ghosts_and_food(food)
+    if not food: # Respawn food
+        food = generate_food(FOOD_COUNT)
+        update_costs_based_on_ghosts_and_food(food)
+    ticks_played += 1
+    return food, eaten, collided
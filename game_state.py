@@ -0,0 +1,226 @@
+# File: game_state.py
+# Description: This file contains a compact copy of the game state and the lookahead Pac-Bot policy built on it.
+# The live game keeps its state in module globals of game.py; a GameState holds the same state in a few
+# slots of immutable values (cells by flat index, ghosts and food as tuples), so clone() copies 8 slots and
+# planners can branch thousands of times per tick. GameRules plays one tick on a state with the rules of
+# game.step_game: Pac-Bot takes the step it is given, the ghosts move every GHOST_MOVE_DELAY ticks with
+# game.dfs, BFS, game.a_star_search or game.jps_search (as move_enemies with EXACT_A_STAR_TIES), food under
+# Pac-Bot is eaten and respawned with game.generate_food, and A* and JPS read the ghost costs of the last food change.
+# make()/unmake() play and take back a tick in place, step() returns the next state and leaves its input alone.
+# RolloutPolicy picks Pac-Bot's step by Monte Carlo rollouts: for every move it plays short random-greedy
+# games against the real ghost rules and takes the move with the best mean score. It is switched on for
+# game.step_game with use_rollout_policy(); the path cache and the incremental planner do not apply to it.
+import random
+import game
+import search_stats
+from batch_engine import DistanceFields
+from cost_field import CostField
+
+ROLLOUTS = 8  # rollouts per candidate move
+ROLLOUT_DEPTH = 15  # ticks played by each rollout
+ROLLOUT_EPSILON = 0.1  # chance that a rollout Pac-Bot takes a random move instead of the greedy one
+FOOD_VALUE = 1000  # score of a pellet eaten in a rollout, worth more than any distance to food
+FOOD_DELAY_COST = 10  # score a pellet loses per tick it is eaten later, so sooner is better
+CAUGHT_PENALTY = 1_000_000  # score lost when a rollout ends with Pac-Bot caught, worth more than any food
+COST_GRID_BYTES = 64 * 1024 * 1024  # cost grids kept by GameRules, cleared when full
+
+
+class GameState: # Positions, food and counters of one game
+    __slots__ = ("pacman", "ghosts", "food", "cost_ghosts", "tick", "steps", "food_eaten", "caught")
+
+    def __init__(self, pacman, ghosts, food, cost_ghosts=None, tick=0, steps=0, food_eaten=0, caught=False):
+        self.pacman = pacman  # Pac-Bot cell (flat index)
+        self.ghosts = tuple(ghosts)  # ghost cells
+        self.food = tuple(food)  # pellet cells
+        self.cost_ghosts = self.ghosts if cost_ghosts is None else tuple(cost_ghosts)  # ghost cells of the A* costs
+        self.tick = tick  # ticks played
+        self.steps = steps  # steps taken by Pac-Bot
+        self.food_eaten = food_eaten
+        self.caught = caught  # a ghost caught Pac-Bot
+
+    def clone(self): # Independent copy, every slot holds an immutable value
+        state = GameState.__new__(GameState)
+        state.pacman, state.ghosts, state.food, state.cost_ghosts = self.pacman, self.ghosts, self.food, self.cost_ghosts
+        state.tick, state.steps, state.food_eaten, state.caught = self.tick, self.steps, self.food_eaten, self.caught
+        return state
+
+    @classmethod
+    def from_game(cls, food): # Snapshot of the live game in game.py with its food list
+        cols = game.COLS
+        return cls(
+            game.pacman_pos[0] * cols + game.pacman_pos[1],
+            [row * cols + col for row, col in game.enemies],
+            [row * cols + col for row, col in food],
+            [row * cols + col for row, col in game.cost_field.ghosts],
+            game.ticks_played, game.steps_taken,
+        )
+
+
+class GameRules: # Plays ticks on GameStates of one maze and ghost level
+    def __init__(self, maze, ghost_level, max_ticks=game.game_duration * game.FPS, fields=None):
+        self.maze = maze
+        self.ghost_level = ghost_level
+        self.max_ticks = max_ticks
+        self.fields = fields if fields is not None else DistanceFields(maze)  # BFS distance fields by root cell
+        self.cost_field = CostField(maze)  # scratch field the cost grids are built in
+        self.cost_grids = {}  # cost ghost cells -> (A* cost grid, JPS cost dict)
+        self.cost_bytes = 0
+
+    def is_over(self, state):
+        return state.caught or state.tick >= self.max_ticks
+
+    def moves(self, state): # Cells Pac-Bot can step to
+        return self.maze.neighbors[state.pacman]
+
+    def costs(self, cost_ghosts): # (A* cost grid, JPS cost dict) around ghosts on these cells, shared by every state
+        costs = self.cost_grids.get(cost_ghosts)
+        if costs is None:
+            size = self.maze.rows * self.maze.cols
+            if self.cost_bytes + size > COST_GRID_BYTES:
+                self.cost_grids.clear()
+                self.cost_bytes = 0
+            cols = self.maze.cols
+            self.cost_field.rebuild([divmod(cell, cols) for cell in cost_ghosts])
+            costs = self.cost_grids[cost_ghosts] = (bytes(self.cost_field.grid), dict(self.cost_field.costs))
+            self.cost_bytes += size
+        return costs
+
+    def move_ghosts(self, state, rng): # Ghost cells after they chase Pac-Bot, as game.move_enemies
+        cols = self.maze.cols
+        pacman = state.pacman
+        if self.ghost_level == 1:  # Intermediate: BFS
+            if not self.maze.passable[pacman]:
+                return state.ghosts
+            ghosts = []
+            for cell in state.ghosts:
+                step = self.fields.step(cell, pacman)
+                ghosts.append(cell if step is None else step)
+            return tuple(ghosts)
+        target = list(divmod(pacman, cols))
+        grid, costs = self.costs(state.cost_ghosts) if self.ghost_level >= 2 else (None, None)
+        moves = {}  # A* and JPS ghost cell -> next cell, ghosts on the same cell get the same search
+        ghosts = []
+        for cell in state.ghosts:
+            if cell in moves:
+                ghosts.append(moves[cell])
+                continue
+            start = list(divmod(cell, cols))
+            if self.ghost_level == 0:  # Beginner: DFS
+                path = game.dfs(start, target, self.maze, rng)
+            elif self.ghost_level == 3:  # Expert: JPS
+                path = game.jps_search(start, target, self.maze, costs)
+            else:  # Advanced: A*
+                path = game.a_star_search(start, target, self.maze, grid)
+            step = path[0][0] * cols + path[0][1] if path else cell
+            if self.ghost_level >= 2:
+                moves[cell] = step
+            ghosts.append(step)
+        return tuple(ghosts)
+
+    def make(self, state, step, rng=random): # Play one tick in place with Pac-Bot stepping to step (None: stay)
+        # Returns the undo record that unmake() takes. rng draws the DFS ghost moves and the food respawns.
+        undo = (
+            state.pacman, state.ghosts, state.food, state.cost_ghosts, state.tick, state.steps, state.food_eaten,
+            state.caught,
+        )
+        if state.food and step is not None:
+            state.pacman = step
+            state.steps += 1
+        state.tick += 1
+        if state.tick % game.GHOST_MOVE_DELAY == 0:
+            state.ghosts = self.move_ghosts(state, rng)
+        pacman = state.pacman
+        state.caught = pacman in state.ghosts
+        if pacman in state.food:
+            state.food = tuple(cell for cell in state.food if cell != pacman)
+            state.food_eaten += 1
+            state.cost_ghosts = state.ghosts
+        if not state.food:  # Respawn food
+            cols = self.maze.cols
+            state.food = tuple(row * cols + col for row, col in game.generate_food(game.FOOD_COUNT, self.maze, rng))
+            state.cost_ghosts = state.ghosts
+        return undo
+
+    def unmake(self, state, undo): # Take back the tick make() returned undo for
+        (state.pacman, state.ghosts, state.food, state.cost_ghosts, state.tick, state.steps, state.food_eaten,
+         state.caught) = undo
+
+    def step(self, state, step, rng=random): # The state after one tick, state itself is left unchanged
+        state = state.clone()
+        self.make(state, step, rng)
+        return state
+
+    def food_distance(self, state, cell): # BFS distance from a cell to the nearest pellet, -1 when none is reachable
+        best = -1
+        for pellet in state.food:
+            distance = self.fields.field(pellet)[cell]
+            if distance >= 0 and (best < 0 or distance < best):
+                best = distance
+        return best
+
+    def greedy_step(self, state, rng=random, epsilon=ROLLOUT_EPSILON): # Rollout move: toward the nearest pellet, or random
+        moves = self.moves(state)
+        if not moves:
+            return None
+        if rng.random() < epsilon:
+            return rng.choice(moves)
+        step, best = None, -1
+        for cell in moves:
+            distance = self.food_distance(state, cell)
+            if distance >= 0 and (step is None or distance < best):
+                step, best = cell, distance
+        return step
+
+    def rollout(self, state, depth=ROLLOUT_DEPTH, rng=random, origin=None): # Play up to depth greedy ticks on state in place, returns its score
+        # origin is the (food eaten, tick) of the state the score counts from, state itself by default; a
+        # candidate move played before the rollout passes its parent's, so the pellet it eats is counted.
+        food_eaten, start_tick = (state.food_eaten, state.tick) if origin is None else origin
+        score = (state.food_eaten - food_eaten) * (FOOD_VALUE - FOOD_DELAY_COST * (state.tick - start_tick))
+        for _ in range(depth):
+            if self.is_over(state):
+                break
+            eaten = state.food_eaten
+            self.make(state, self.greedy_step(state, rng), rng)
+            score += (state.food_eaten - eaten) * (FOOD_VALUE - FOOD_DELAY_COST * (state.tick - start_tick))
+        if state.caught:
+            return state.tick - CAUGHT_PENALTY  # being caught later is less bad
+        distance = self.food_distance(state, state.pacman)
+        return score - max(distance, 0)
+
+
+class RolloutPolicy: # Picks Pac-Bot's step by Monte Carlo rollouts of every move
+    def __init__(self, maze, rollouts=ROLLOUTS, depth=ROLLOUT_DEPTH):
+        self.maze = maze
+        self.rollouts = rollouts
+        self.depth = depth
+        self.fields = DistanceFields(maze)  # shared by the rules of every ghost level
+        self.rules = {}  # ghost level -> GameRules
+
+    def choose(self, rules, state, rng=random): # Cell of the move with the best mean rollout score, None to stay
+        best_step, best_score = None, None
+        for move in rules.moves(state):
+            total = 0
+            for _ in range(self.rollouts):
+                child = state.clone()
+                rules.make(child, move, rng)
+                total += rules.rollout(child, self.depth - 1, rng, (state.food_eaten, state.tick))
+            if best_score is None or total > best_score:
+                best_step, best_score = move, total
+        return best_step
+
+    def next_step(self, food, ghost_level): # Next [row, col] of Pac-Bot in the live game, called by game.step_game
+        search_stats.agent = "Pac-Bot"  # the rollouts' ghost searches are Pac-Bot's planning cost
+        if self.maze is not game.maze:  # game.use_maze switched mazes
+            self.maze, self.fields, self.rules = game.maze, DistanceFields(game.maze), {}
+        rules = self.rules.get(ghost_level)
+        if rules is None:
+            rules = self.rules[ghost_level] = GameRules(self.maze, ghost_level, fields=self.fields)
+        step = self.choose(rules, GameState.from_game(food))
+        return None if step is None else list(divmod(step, self.maze.cols))
+
+
+def use_rollout_policy(enabled=True, rollouts=ROLLOUTS, depth=ROLLOUT_DEPTH): # Let RolloutPolicy pick Pac-Bot's steps
+    # Replaces the selected Pac-Bot algorithm in game.step_game (the simulator) until it is switched off.
+    # The rollouts draw from the game's random stream, so seeded games stay reproducible.
+    game.pacman_policy = RolloutPolicy(game.maze, rollouts, depth) if enabled else None
+    return game.pacman_policy
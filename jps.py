@@ -0,0 +1,229 @@
+# File: jps.py
+# Description: This file contains the bitboards of a maze and the Jump Point Search built on them.
+# A GridBitboard packs every maze row into one Python int (bit col set = open cell), and every column
+# likewise, so a scan along a corridor is a few bit operations: mask the bits past the current cell and
+# take the lowest (or highest) set bit of the walls and of the cells the scan has to stop at. Bitboards
+# are built once per maze.
+#
+# jps_search is A* over jump points for 4-connected grids with a canonical vertical-first ordering: paths
+# move vertically first and turn horizontally anywhere, but turn back to vertical only where a wall
+# forces them (the vertical neighbor is open and the cell behind it is not). A horizontal jump is one
+# bit scan to the next forced cell, the goal or a wall. A vertical jump is a scan of the column's
+# turn_cols bits, the cells whose horizontal scans stop at a forced cell; only the rows the costs or the
+# goal change are scanned one by one. Only the cells a jump stops at enter the open list.
+#
+# The optional cost overlay (flat cell index -> additional cost, as CostField.costs) is handled by
+# stopping there: cells with a cost and the cells next to them are stop cells, expanded in every
+# direction, and the pruning treats costed cells as walls. Paths through the uniform parts of the maze
+# still jump, and the returned paths cost as much as a_star_search's, though equally cheap paths can differ.
+import heapq
+import weakref
+import search_stats
+
+OPEN_BITS = bytes.maketrans(b"\x00\x01", b"01")  # passability bytes -> binary digits
+
+
+class GridBitboard: # Open cells of a maze as one int per row and per column, plus the precomputed scan masks
+    def __init__(self, maze):
+        rows, cols = maze.rows, maze.cols
+        self.rows, self.cols = rows, cols
+        digits = bytes(maze.passable).translate(OPEN_BITS)
+        # bit col of open[row] is set when the cell is open; the digits are reversed so col 0 is bit 0
+        self.open = [int(digits[row * cols:(row + 1) * cols][::-1], 2) for row in range(rows)]
+        self.open_cols = [int(digits[col::cols][::-1], 2) for col in range(cols)]  # bit row set when open
+        # forced_right[row]: cells where a scan moving right has to consider turning up or down
+        self.forced_right = [self.forced(row, 1, self.open) for row in range(rows)]
+        self.forced_left = [self.forced(row, -1, self.open) for row in range(rows)]
+        # turn_cols[col]: bit row set when a horizontal scan from the cell, either way, stops at a forced cell
+        turns = b"".join(
+            format(self.turns(row), "0%db" % cols)[::-1].encode() if cols else b"" for row in range(rows)
+        )
+        self.turn_cols = [int(turns[col::cols][::-1] or b"0", 2) for col in range(cols)]
+
+    def forced(self, row, d_col, free): # Cells of a row whose vertical neighbor is free but the one behind it is not
+        mask = 0
+        for side in (row - 1, row + 1):
+            if 0 <= side < self.rows:
+                bits = free[side]
+                mask |= bits & ~(bits << 1) if d_col > 0 else bits & ~(bits >> 1)
+        return mask
+
+    def turns(self, row): # Open cells of a row with a forced cell ahead in their corridor, in either direction
+        open_bits = self.open[row]
+        walls = ~open_bits
+        mask = 0
+        forced = self.forced_right[row] & open_bits
+        while forced:  # cells from the corridor start up to the forced cell, exclusive
+            bit = forced & -forced
+            forced ^= bit
+            start = 1 << (walls & (bit - 1)).bit_length() if walls & (bit - 1) else 1
+            mask |= bit - start
+        forced = self.forced_left[row] & open_bits
+        while forced:  # cells after the forced cell up to the corridor end
+            bit = forced & -forced
+            forced ^= bit
+            ahead = walls & ~((bit << 1) - 1)
+            mask |= (ahead & -ahead) - (bit << 1)
+        return mask & open_bits
+
+
+bitboards = weakref.WeakKeyDictionary()  # maze -> GridBitboard
+
+
+def bitboard(maze): # The GridBitboard of a maze, built on first use
+    board = bitboards.get(maze)
+    if board is None:
+        board = bitboards[maze] = GridBitboard(maze)
+    return board
+
+
+def scan_row(open_bits, stop_bits, col, d_col): # Column of the first stop cell before a wall, None when a wall comes first
+    if d_col > 0:
+        ahead = ~((2 << col) - 1)
+        stops = stop_bits & ahead
+        if not stops:
+            return None
+        stop = (stops & -stops).bit_length() - 1
+        walls = ~open_bits & ahead  # never empty: every bit past the last column counts as a wall
+        wall = (walls & -walls).bit_length() - 1
+        return stop if stop < wall else None
+    behind = (1 << col) - 1
+    stops = stop_bits & behind
+    if not stops:
+        return None
+    return stops.bit_length() - 1 if stops.bit_length() > (~open_bits & behind).bit_length() else None
+
+
+def jps_search(start, goal, layout, costs=None): # Jump Point Search from start to goal, returns the path without start
+    # costs maps flat cell indices to additional costs, None for a maze without costs.
+    board = bitboard(layout)
+    rows, cols = layout.rows, layout.cols
+    open_rows = board.open
+    goal_row, goal_col = goal
+    start_index = start[0] * cols + start[1]
+    goal_index = goal_row * cols + goal_col
+    track = search_stats.enabled  # instrumentation, see search_stats.py
+    if track:
+        start_ns = search_stats.now()
+
+    stop_rows = {goal_row: 1 << goal_col}  # row -> bits of the cells every jump stops at
+    free_rows = open_rows  # open cells without a cost, the cells the pruning rules count as open
+    forced_rows = {}  # row -> (forced right, forced left) where the costs change the masks
+    if costs:
+        free_rows = list(open_rows)
+        for cell in costs:
+            row, col = divmod(cell, cols)
+            free_rows[row] &= ~(1 << col)
+            for d_row in (-1, 0, 1):
+                if 0 <= row + d_row < rows:
+                    bits = 7 << col >> 1 if d_row == 0 else 1 << col
+                    stop_rows[row + d_row] = stop_rows.get(row + d_row, 0) | bits
+        for row in {cell // cols for cell in costs}:  # the masks of a row read the free cells of the rows next to it
+            for side in (row - 1, row + 1):
+                if 0 <= side < rows and side not in forced_rows:
+                    forced_rows[side] = (board.forced(side, 1, free_rows), board.forced(side, -1, free_rows))
+        costs_get = costs.get
+    forced_right, forced_left = board.forced_right, board.forced_left
+    open_cols, turn_cols = board.open_cols, board.turn_cols
+    special = 0  # bits of the rows in stop_rows or forced_rows
+    for row in stop_rows.keys() | forced_rows.keys():
+        special |= 1 << row
+
+    def jump_row(row, col, d_col): # Flat index of the jump point of a horizontal scan, None at a wall
+        if row in forced_rows:
+            forced = forced_rows[row][0 if d_col > 0 else 1]
+        else:
+            forced = forced_right[row] if d_col > 0 else forced_left[row]
+        stop = scan_row(open_rows[row], forced | stop_rows.get(row, 0), col, d_col)
+        return None if stop is None else row * cols + stop
+
+    def jump_col(row, col, d_row): # Flat index of the jump point of a vertical scan, None at a wall
+        # Rows whose scans the costs or the goal change are checked one by one, the others are read
+        # from the turn_cols bitboard.
+        walls = ~open_cols[col]
+        candidates = turn_cols[col] | special
+        if d_row > 0:
+            ahead = ~((2 << row) - 1)
+            walls &= ahead  # never empty: every bit past the last row counts as a wall
+            candidates &= ahead & ((walls & -walls) - 1)
+        else:
+            behind = (1 << row) - 1
+            candidates &= behind & ~((1 << (walls & behind).bit_length()) - 1)
+        while candidates:
+            if d_row > 0:
+                bit = candidates & -candidates
+            else:
+                bit = 1 << (candidates.bit_length() - 1)
+            candidates ^= bit
+            row = bit.bit_length() - 1
+            if not special & bit:
+                return row * cols + col  # a horizontal turn here reaches a forced cell
+            if stop_rows.get(row, 0) >> col & 1 or jump_row(row, col, 1) is not None or jump_row(row, col, -1) is not None:
+                return row * cols + col
+        return None
+
+    open_set = [(abs(start[0] - goal_row) + abs(start[1] - goal_col), start_index)]
+    came_from = {start_index: None}
+    g_score = {start_index: 0}
+    closed = set()  # the heuristic is consistent, so an expanded cell never gets cheaper
+    heappush, heappop = heapq.heappush, heapq.heappop
+    expanded = peak = 0
+    path = []
+    while open_set:
+        if track and len(open_set) > peak:
+            peak = len(open_set)
+        current = heappop(open_set)[1]
+        if current in closed:
+            continue  # a cheaper entry of this cell was expanded already
+        closed.add(current)
+        g = g_score[current]
+        expanded += 1
+        if current == goal_index:
+            path = build_jump_path(came_from, current, cols)
+            break
+
+        row, col = divmod(current, cols)
+        parent = came_from[current]
+        if parent is None or stop_rows.get(row, 0) >> col & 1:  # start and stop cells: every direction
+            moves = ((0, 1), (1, 0), (0, -1), (-1, 0))
+        elif parent % cols == col:  # arrived vertically: keep going, or turn either way
+            d_row = 1 if parent < current else -1
+            moves = ((d_row, 0), (0, 1), (0, -1))
+        else:  # arrived horizontally: keep going, or turn where a wall forces it
+            d_col = 1 if parent < current else -1
+            moves = [(0, d_col)]
+            for d_row in (-1, 1):
+                side = row + d_row
+                if 0 <= side < rows and free_rows[side] >> col & 1 and not free_rows[side] >> (col - d_col) & 1:
+                    moves.append((d_row, 0))
+
+        for d_row, d_col in moves:
+            if d_row:
+                jump = jump_col(row, col, d_row)
+            else:
+                jump = jump_row(row, col, d_col)
+            if jump is None:
+                continue
+            j_row, j_col = divmod(jump, cols)
+            tentative_g_score = g + abs(j_row - row) + abs(j_col - col)
+            if costs:
+                tentative_g_score += costs_get(jump, 0)  # the cells a jump passes have no cost, see above
+            if jump not in g_score or tentative_g_score < g_score[jump]:
+                came_from[jump] = current
+                g_score[jump] = tentative_g_score
+                heappush(open_set, (tentative_g_score + abs(j_row - goal_row) + abs(j_col - goal_col), jump))
+    if track:
+        search_stats.record("JPS", expanded, peak, len(path), start_ns, len(came_from))
+    return path
+
+
+def build_jump_path(came_from, current, cols): # The [row, col] cells between the jump points of came_from, without the start
+    path = []
+    while came_from[current] is not None:
+        parent = came_from[current]
+        step = (cols if parent < current else -cols) if parent % cols == current % cols else (1 if parent < current else -1)
+        while current != parent:
+            path.append(list(divmod(current, cols)))
+            current -= step
+    path.reverse()
+    return path
@@ -0,0 +1,217 @@
+# File: maze.py
+# Description: This file contains the maze layout and the grid lookups used by the searches.
+# A maze is a flat passability bitmap (1 byte per cell, indexed by row * cols + col) plus the spawn points
+# of Pac-Bot and the ghosts. The bitmap can be any bytes-like object, so a map file can be memory-mapped
+# and used as is (see maze_io.py). Mazes come from the stock layout, from generate_maze() or from PRESETS.
+import random
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # directions: right, down, left, up
+NEIGHBOR_TABLE_CELLS = 4_000_000  # larger mazes compute neighbors on access instead of holding a table
+GHOST_COUNT = 4  # ghosts placed by default_spawns
+
+
+class LazyNeighbors: # Open neighbors of a cell in DIRECTIONS order, computed on access for very large mazes
+    def __init__(self, maze):
+        self.maze = maze
+
+    def __len__(self):
+        return self.maze.rows * self.maze.cols
+
+    def __getitem__(self, index):
+        maze = self.maze
+        cols, passable = maze.cols, maze.passable
+        row, col = divmod(index, cols)
+        cell_neighbors = []
+        if col + 1 < cols and passable[index + 1]:
+            cell_neighbors.append(index + 1)
+        if row + 1 < maze.rows and passable[index + cols]:
+            cell_neighbors.append(index + cols)
+        if col > 0 and passable[index - 1]:
+            cell_neighbors.append(index - 1)
+        if row > 0 and passable[index - cols]:
+            cell_neighbors.append(index - cols)
+        return tuple(cell_neighbors)
+
+
+class Maze: # Grid-backed passability index for a maze
+    def __init__(self, rows, cols, wall_cells=(), passable=None, pacman_start=None, ghost_starts=None):
+        # passable: bitmap of rows * cols bytes (1 = open) used instead of wall_cells, kept as is so it can be
+        # a memory-mapped file. pacman_start and ghost_starts default to default_spawns() when not given.
+        self.rows = rows
+        self.cols = cols
+        if passable is None:
+            passable = bytearray(b"\x01") * (rows * cols)  # 1 = open cell, 0 = wall
+            for row, col in wall_cells:
+                passable[row * cols + col] = 0
+        elif len(passable) != rows * cols:
+            raise ValueError(f"passability bitmap has {len(passable)} cells, expected {rows} x {cols}")
+        self.passable = passable
+
+        # Neighbor adjacency table: open neighbors of every cell by flat index, in DIRECTIONS order
+        if rows * cols > NEIGHBOR_TABLE_CELLS:
+            self.neighbors = LazyNeighbors(self)
+        else:
+            lazy = LazyNeighbors(self)
+            self.neighbors = [lazy[index] for index in range(rows * cols)]
+
+        self._open_cells = None
+        self._walls = None
+        if pacman_start is None or ghost_starts is None:
+            default_pacman, default_ghosts = default_spawns(self)
+            pacman_start = default_pacman if pacman_start is None else pacman_start
+            ghost_starts = default_ghosts if ghost_starts is None else ghost_starts
+        self.pacman_start = list(pacman_start)  # [row, col] where Pac-Bot starts
+        self.ghost_starts = [list(ghost) for ghost in ghost_starts]  # [row, col] of every ghost at the start
+
+    def index(self, pos): # Convert a [row, col] position to a flat index
+        return pos[0] * self.cols + pos[1]
+
+    def position(self, index): # Convert a flat index back to a [row, col] position
+        return list(divmod(index, self.cols))
+
+    def is_open(self, row, col): # Check if a cell is inside the grid and not a wall
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.passable[row * self.cols + col] == 1
+
+    @property
+    def open_cells(self): # Flat indices of every open cell, built on first use
+        if self._open_cells is None:
+            passable = self.passable
+            self._open_cells = [index for index in range(self.rows * self.cols) if passable[index]]
+        return self._open_cells
+
+    @property
+    def walls(self): # List of [row, col] wall positions, derived from the passability bitmap
+        if self._walls is None:
+            self._walls = [
+                list(divmod(index, self.cols)) for index in range(self.rows * self.cols) if not self.passable[index]
+            ]
+        return self._walls
+
+
+def default_spawns(maze): # Pac-Bot on the first open cell, the ghosts on the open cells closest to the center
+    passable = maze.passable
+    pacman_start = None
+    for index in range(maze.rows * maze.cols):
+        if passable[index]:
+            pacman_start = list(divmod(index, maze.cols))
+            break
+    if pacman_start is None:
+        raise ValueError("the maze has no open cell")
+
+    # Walk rings of growing Manhattan distance around the center until enough open cells are found
+    center_row, center_col = maze.rows // 2, maze.cols // 2
+    ghost_starts = []
+    for distance in range(maze.rows + maze.cols):
+        for d_row in range(-distance, distance + 1):
+            d_col = distance - abs(d_row)
+            for col in [center_col - d_col, center_col + d_col] if d_col else [center_col]:
+                if maze.is_open(center_row + d_row, col) and [center_row + d_row, col] != pacman_start:
+                    ghost_starts.append([center_row + d_row, col])
+        if len(ghost_starts) >= GHOST_COUNT:
+            break
+    return pacman_start, ghost_starts[:GHOST_COUNT]
+
+
+def build_default_maze(rows, cols): # Build the stock Pac-Bot maze layout
+    walls = []
+
+    for col in range(cols): # Border walls
+        walls.append([0, col])
+        walls.append([rows - 1, col])
+    for row in range(rows):
+        walls.append([row, 0])
+        walls.append([row, cols - 1])
+
+    for row in range(2, rows - 2): # Vertical corridors
+        if row % 4 != 0:
+            walls.append([row, cols // 4])
+            walls.append([row, cols // 2])
+            walls.append([row, 3 * cols // 4])
+
+    for col in range(2, cols - 2): # Horizontal corridors
+        if col % 5 != 0:
+            walls.append([rows // 4, col])
+            walls.append([rows // 2, col])
+            walls.append([3 * rows // 4, col])
+
+    center_row = rows // 2
+    center_col = cols // 2
+    ghost_box = [ # Central ghost box with exits
+        [center_row - 1, center_col - 1], [center_row - 1, center_col],
+        [center_row + 1, center_col - 1], [center_row + 1, center_col],
+        [center_row, center_col + 1], [center_row, center_col - 1]
+    ]
+    walls += ghost_box # add ghost box to walls
+
+    for row in range(5, rows - 5): # Add barriers to the left and right sides
+        if row % 6 == 0:
+            walls.append([row, 2])
+            walls.append([row, cols - 3])
+
+    ghost_starts = [ # Ghosts spawn in the walls around the center box
+        [center_row - 2, center_col],
+        [center_row + 2, center_col],
+        [center_row, center_col - 2],
+        [center_row, center_col + 2],
+    ]
+    return Maze(rows, cols, walls, pacman_start=[1, 1], ghost_starts=ghost_starts)
+
+
+def generate_maze(rows, cols, seed=None, density=0.3): # Generate a seeded random maze of any size
+    # Corridors are carved between the cells at odd rows and columns by a randomized depth-first search,
+    # which gives a perfect maze (exactly one path between two cells). density is then the fraction of
+    # the remaining walls between two corridors that are knocked out to add loops and open areas:
+    # 0 keeps the perfect maze, 1 leaves an open field of pillars.
+    if rows < 3 or cols < 3:
+        raise ValueError("a generated maze needs at least 3 rows and 3 columns")
+    rng = random.Random(seed)
+    passable = bytearray(rows * cols)
+    last_row = rows - 2 if rows % 2 == 1 else rows - 3  # last odd row and column inside the border
+    last_col = cols - 2 if cols % 2 == 1 else cols - 3
+    steps = (2, 2 * cols, -2, -2 * cols)  # flat offsets of the next cell in DIRECTIONS order
+
+    start = cols + 1  # cell (1, 1)
+    passable[start] = 1
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        row, col = divmod(cell, cols)
+        options = []
+        if col + 2 <= last_col and not passable[cell + 2]:
+            options.append(steps[0])
+        if row + 2 <= last_row and not passable[cell + 2 * cols]:
+            options.append(steps[1])
+        if col - 2 >= 1 and not passable[cell - 2]:
+            options.append(steps[2])
+        if row - 2 >= 1 and not passable[cell - 2 * cols]:
+            options.append(steps[3])
+        if not options:
+            stack.pop()
+            continue
+        step = options[rng.randrange(len(options))]
+        passable[cell + step // 2] = 1  # the wall between the two cells
+        passable[cell + step] = 1
+        stack.append(cell + step)
+
+    if density > 0: # knock out walls that separate two corridor cells
+        for row in range(1, last_row + 1):
+            for col in range(1 + row % 2, last_col + 1, 2):  # walls between horizontal or vertical cell pairs
+                index = row * cols + col
+                if not passable[index] and rng.random() < density:
+                    passable[index] = 1
+    return Maze(rows, cols, passable=passable)
+
+
+PRESETS = { # Named mazes: the stock layout and generated mazes of growing size
+    "classic": lambda: build_default_maze(27, 40),
+    "classic-large": lambda: build_default_maze(270, 400),
+    "small": lambda: generate_maze(27, 41, seed=1, density=0.3),
+    "medium": lambda: generate_maze(101, 101, seed=1, density=0.3),
+    "large": lambda: generate_maze(1001, 1001, seed=1, density=0.3),
+}
+
+
+def build_preset(name): # Build the preset maze with this name
+    if name not in PRESETS:
+        raise ValueError(f"unknown maze preset {name!r}, expected one of {sorted(PRESETS)}")
+    return PRESETS[name]()
@@ -0,0 +1,178 @@
+# File: maze_io.py
+# Description: This file contains the map file formats for Pac-Bot mazes.
+# Text maps are meant to be read and edited by hand:
+#     PACBOT-MAP 1
+#     pacman 1 1          optional spawn points, the ghosts can also spawn in a wall
+#     ghost 11 20
+#     grid
+#     ########
+#     #..P.G.#            '#' wall, '.' open, 'P' and 'G' spawn Pac-Bot and a ghost on an open cell
+#     ########
+# Binary maps hold a small header, the spawn points and the bitmap of 1 byte per cell (1 = open). They are
+# memory-mapped when loaded and the bitmap is used in place, so even a 10k x 10k map costs no copy.
+# Text maps are read line by line straight into one bitmap, without lists of rows.
+import argparse
+import mmap
+import os
+import struct
+from maze import Maze, PRESETS, build_preset, generate_maze
+
+TEXT_MAGIC = "PACBOT-MAP"
+BINARY_MAGIC = b"PBMAZE"
+VERSION = 1
+HEADER = struct.Struct("<6sHIIiiI")  # magic, version, rows, cols, pacman row, pacman col, ghost count
+GHOST = struct.Struct("<ii")  # row, col of a ghost spawn point
+DATA_ALIGNMENT = 64  # the bitmap starts on an aligned offset after the spawn points
+WRITE_ROWS = 1024  # rows written per chunk
+
+
+def _text_table(): # 256-byte table that maps '#' to 0, '.', 'P' and 'G' to 1 and anything else to 2
+    table = bytearray(b"\x02") * 256
+    table[ord("#")] = 0
+    for char in b".PG":
+        table[char] = 1
+    return bytes(table)
+
+
+CELL_TABLE = _text_table()
+
+
+def read_text_maze(path): # Load a text map, streaming its rows into one bitmap
+    passable = bytearray()
+    cols = None
+    pacman_start = None
+    ghost_starts = []
+    grid_started = False
+    with open(path, "rb") as f:
+        first = f.readline().split()
+        if len(first) != 2 or first[0] != TEXT_MAGIC.encode():
+            raise ValueError(f"{path} is not a Pac-Bot text map")
+        if int(first[1]) != VERSION:
+            raise ValueError(f"{path} is a version {int(first[1])} map, expected version {VERSION}")
+        for line_number, line in enumerate(f, 2):
+            line = line.rstrip(b"\r\n")
+            if not grid_started:
+                words = line.split()
+                if not words:
+                    continue
+                if words[0] == b"grid":
+                    grid_started = True
+                elif words[0] == b"pacman":
+                    pacman_start = [int(words[1]), int(words[2])]
+                elif words[0] == b"ghost":
+                    ghost_starts.append([int(words[1]), int(words[2])])
+                elif words[0] != b"size":  # size is informative, the grid sets the size
+                    raise ValueError(f"{path}:{line_number}: unknown header line {line.decode()!r}")
+                continue
+            if not line:
+                continue
+            if cols is None:
+                cols = len(line)
+            elif len(line) != cols:
+                raise ValueError(f"{path}:{line_number}: row has {len(line)} cells, expected {cols}")
+            row = line.translate(CELL_TABLE)
+            if b"\x02" in row:
+                raise ValueError(f"{path}:{line_number}: unknown map character")
+            row_number = len(passable) // cols
+            col = line.find(b"P")
+            if col >= 0:
+                pacman_start = [row_number, col]
+            col = line.find(b"G")
+            while col >= 0:
+                ghost_starts.append([row_number, col])
+                col = line.find(b"G", col + 1)
+            passable += row
+    if cols is None:
+        raise ValueError(f"{path} has no grid rows")
+    return Maze(len(passable) // cols, cols, passable=passable, pacman_start=pacman_start, ghost_starts=ghost_starts or None)
+
+
+def write_text_maze(maze, path): # Save a maze as a text map, one row at a time
+    to_text = bytes.maketrans(b"\x00\x01", b"#.")
+    with open(path, "wb") as f:
+        f.write(f"{TEXT_MAGIC} {VERSION}\nsize {maze.rows} {maze.cols}\n".encode())
+        f.write(f"pacman {maze.pacman_start[0]} {maze.pacman_start[1]}\n".encode())
+        for ghost in maze.ghost_starts:
+            f.write(f"ghost {ghost[0]} {ghost[1]}\n".encode())
+        f.write(b"grid\n")
+        for row in range(maze.rows):
+            f.write(bytes(maze.passable[row * maze.cols:(row + 1) * maze.cols]).translate(to_text) + b"\n")
+
+
+def _data_offset(ghost_count): # Offset of the bitmap in a binary map
+    end = HEADER.size + GHOST.size * ghost_count
+    return (end + DATA_ALIGNMENT - 1) // DATA_ALIGNMENT * DATA_ALIGNMENT
+
+
+def read_binary_maze(path): # Memory-map a binary map and use its bitmap in place
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a Pac-Bot binary map")
+    magic, version, rows, cols, pacman_row, pacman_col, ghost_count = HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} Pac-Bot binary map")
+    offset = _data_offset(ghost_count)
+    if len(data) != offset + rows * cols:
+        raise ValueError(f"{path} is truncated or has trailing data")
+    ghost_starts = [list(GHOST.unpack_from(data, HEADER.size + GHOST.size * i)) for i in range(ghost_count)]
+    passable = memoryview(data)[offset:]  # keeps the mapping alive as long as the maze uses it
+    return Maze(rows, cols, passable=passable, pacman_start=[pacman_row, pacman_col], ghost_starts=ghost_starts)
+
+
+def write_binary_maze(maze, path): # Save a maze as a binary map
+    ghosts = maze.ghost_starts
+    header = HEADER.pack(BINARY_MAGIC, VERSION, maze.rows, maze.cols, maze.pacman_start[0], maze.pacman_start[1], len(ghosts))
+    header += b"".join(GHOST.pack(*ghost) for ghost in ghosts)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f: # write to a temporary file first, so readers never see half a map
+        f.write(header.ljust(_data_offset(len(ghosts)), b"\0"))
+        chunk = WRITE_ROWS * maze.cols
+        for start in range(0, maze.rows * maze.cols, chunk):
+            f.write(maze.passable[start:start + chunk])
+    os.replace(temp_path, path)
+
+
+def load_maze(path): # Load a text or binary map, told apart by their magic
+    with open(path, "rb") as f:
+        magic = f.read(len(BINARY_MAGIC))
+    if magic == BINARY_MAGIC:
+        return read_binary_maze(path)
+    return read_text_maze(path)
+
+
+def save_maze(maze, path): # Save a maze, as a text map for .txt and .map files and as a binary map otherwise
+    if os.path.splitext(path)[1] in (".txt", ".map"):
+        write_text_maze(maze, path)
+    else:
+        write_binary_maze(maze, path)
+
+
+def open_maze(spec): # Maze for a preset name or a map file path
+    if spec in PRESETS:
+        return build_preset(spec)
+    if not os.path.exists(spec):
+        raise ValueError(f"{spec!r} is neither a maze preset ({', '.join(PRESETS)}) nor a map file")
+    return load_maze(spec)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate, export and convert Pac-Bot map files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="generate a seeded random maze")
+    generate.add_argument("rows", type=int)
+    generate.add_argument("cols", type=int)
+    generate.add_argument("output", help="map file, .txt or .map for a text map, binary otherwise")
+    generate.add_argument("--seed", type=int, default=0, help="random seed of the maze")
+    generate.add_argument("--density", type=float, default=0.3, help="fraction of inner walls knocked out (0 to 1)")
+    convert = commands.add_parser("convert", help="save a preset or a map file in another format")
+    convert.add_argument("input", help=f"map file or preset ({', '.join(PRESETS)})")
+    convert.add_argument("output", help="map file, .txt or .map for a text map, binary otherwise")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        maze = generate_maze(args.rows, args.cols, args.seed, args.density)
+    else:
+        maze = open_maze(args.input)
+    save_maze(maze, args.output)
+    print(f"Saved a {maze.rows} x {maze.cols} maze with {len(maze.ghost_starts)} ghosts to {args.output}")
@@ -1,15 +1,117 @@
 # File: memory_tracker.py
 # Description: This file contains the memory tracking logic for the Pac-Bot game.
+# tracemalloc hooks every allocation and slows the searches down a lot, so it is one of several backends:
+#   off         - no tracking, get_memory_usage() returns zeros
+#   rss         - resident set size of the process, read every RSS_SAMPLE_INTERVAL calls to sample()
+#   search      - estimated peak working set of the searches, from their frontier and visited cell counts
+#   tracemalloc - memory allocated by Python since tracking started, only on request
+import os
+import sys
 import tracemalloc
+import search_stats
 
-def start_tracking():  # Start tracking memory usage
-    tracemalloc.start()
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+BACKENDS = ["off", "rss", "search", "tracemalloc"]
+RSS_SAMPLE_INTERVAL = 10  # sample() calls between two RSS readings
+
+# Sizes used by the search estimate, measured on this interpreter
+POINTER_BYTES = sys.getsizeof([None]) - sys.getsizeof([])  # a list or deque slot
+DICT_ENTRY_BYTES = sys.getsizeof(dict.fromkeys(range(1024))) // 1024  # a came_from or g_score entry
+SET_ENTRY_BYTES = sys.getsizeof(set(range(1024))) // 1024  # a closed or open set entry
+TUPLE_BYTES = sys.getsizeof((0, 0))  # an (f_score, cell) heap entry
+TRIPLE_BYTES = sys.getsizeof((0, 0, 0))  # an (f_score, cell, g_score) heap entry of ARA*
+INT_BYTES = sys.getsizeof(1 << 20)  # a path cost that is not a cached small int
+FLOAT_BYTES = sys.getsizeof(0.5)  # a weighted f_score
+# Algorithm -> (bytes per visited cell, bytes per frontier entry) of its search structures
+SEARCH_ENTRY_BYTES = {
+    "A*": (2 * DICT_ENTRY_BYTES, POINTER_BYTES + TUPLE_BYTES + INT_BYTES),  # came_from and g_score, heap
+    "A* nearest": (2 * DICT_ENTRY_BYTES, POINTER_BYTES + TUPLE_BYTES + INT_BYTES),  # as A*
+    "ARA*": (  # came_from, g_score, closed and open cells, heap of (f, cell, g)
+        2 * DICT_ENTRY_BYTES + 2 * SET_ENTRY_BYTES, POINTER_BYTES + TRIPLE_BYTES + FLOAT_BYTES + INT_BYTES
+    ),
+    "JPS": (2 * DICT_ENTRY_BYTES + SET_ENTRY_BYTES, POINTER_BYTES + TUPLE_BYTES + INT_BYTES),  # as A*, plus closed
+    "BFS": (DICT_ENTRY_BYTES, POINTER_BYTES),  # came_from, queue
+    "BFS nearest": (DICT_ENTRY_BYTES, POINTER_BYTES),  # as BFS
+    "BFS table": (0, 0),  # lookups in the memory-mapped path table, nothing is allocated per cell
+    "BFS table nearest": (0, 0),
+    "DFS": (DICT_ENTRY_BYTES, POINTER_BYTES),  # came_from, stack
+    "BFS field": (DICT_ENTRY_BYTES, POINTER_BYTES),  # distances, queue
+    "A* field": (DICT_ENTRY_BYTES, POINTER_BYTES),  # distances, cost buckets
+    "D* Lite": (3 * DICT_ENTRY_BYTES, POINTER_BYTES + TUPLE_BYTES + 2 * INT_BYTES),  # g, rhs and keys, heap
+}
+
+backend = "off"
+samples = 0  # sample() calls since the last RSS reading
+current_bytes = 0  # rss: last reading, search: estimate of the last search
+peak_bytes = 0  # largest value of current_bytes since tracking started
+
+
+def read_rss(): # Resident set size of the process in bytes, 0 when the platform does not report it
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None: # no /proc: fall back to the peak RSS, the closest thing that is available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB elsewhere
+    return 0
+
+
+def _search_done(algorithm, frontier, visited): # search_stats hook of the search backend
+    global current_bytes, peak_bytes
+    per_visited, per_frontier = SEARCH_ENTRY_BYTES.get(algorithm, (DICT_ENTRY_BYTES, POINTER_BYTES))
+    current_bytes = visited * per_visited + frontier * per_frontier
+    if current_bytes > peak_bytes:
+        peak_bytes = current_bytes
+
+
+def start_tracking(selected="tracemalloc"):  # Start tracking memory usage with one of BACKENDS
+    global backend, samples, current_bytes, peak_bytes
+    if selected not in BACKENDS:
+        raise ValueError(f"unknown memory backend {selected!r}, expected one of {BACKENDS}")
+    stop_tracking()
+    backend = selected
+    samples = current_bytes = peak_bytes = 0
+    if backend == "rss":
+        current_bytes = peak_bytes = read_rss()
+    elif backend == "search":
+        search_stats.set_search_hook(_search_done)
+    elif backend == "tracemalloc":
+        tracemalloc.start()
 
 
 def stop_tracking(): # Stop tracking memory usage
-    tracemalloc.stop()
+    global backend
+    if backend == "search":
+        search_stats.set_search_hook(None)
+    elif backend == "tracemalloc":
+        tracemalloc.stop()
+    backend = "off"
+
+
+def sample(): # Called once per game tick, the rss backend reads the RSS every RSS_SAMPLE_INTERVAL calls
+    global samples, current_bytes, peak_bytes
+    if backend != "rss":
+        return
+    samples += 1
+    if samples >= RSS_SAMPLE_INTERVAL:
+        samples = 0
+        current_bytes = read_rss()
+        if current_bytes > peak_bytes:
+            peak_bytes = current_bytes
 
 
-def get_memory_usage(): # Get current memory usage
-    current, peak = tracemalloc.get_traced_memory() 
-    return current // 1024, peak // 1024 # Convert to KB
+def get_memory_usage(): # Get current and peak memory usage in KB for the active backend
+    global current_bytes, peak_bytes
+    if backend == "tracemalloc":
+        current, peak = tracemalloc.get_traced_memory()
+        return current // 1024, peak // 1024 # Convert to KB
+    if backend == "rss":
+        current_bytes = read_rss()
+        peak_bytes = max(peak_bytes, current_bytes)
+    return current_bytes // 1024, peak_bytes // 1024
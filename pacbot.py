@@ -6,37 +6,51 @@
 # Please ensure pygame-ce is installed in your Python environment.
 # Install it using: "pip3 install pygame-ce"
 # ============================================================================
-import pygame
-import heapq
+import argparse
 import random
-from collections import deque
-import memory_tracker  
+import time
+import pygame
+import memory_tracker
+import game
+import replay
+from sim_worker import SimulationWorker
+from game import (
+    ROWS,
+    COLS,
+    WIDTH,
+    HEIGHT,
+    TILE_SIZE,
+    METRICS_HEIGHT,
+    FPS,
+    FOOD_COUNT,
+    game_duration,
+    levels,
+    algorithm,
+    passable,
+    pacman_pos,
+    enemies,
+    generate_food,
+    update_costs_for_moved_ghosts,
+    move_pacman_with_algorithm,
+    move_enemies,
+    check_collision_with_enemies,
+    collect_food,
+)
 
-pygame.init()  # initializes all imported pygame modules
-pygame.font.init()  # initializes the font module
 # ==== Initialize Game settings ===========================================================
-#
+# pygame is only set up by init_display() when this file is run, so a simulation process started
+# with the spawn method (which imports this file again as __mp_main__) does not open a window.
 # =================================================================================================
-# Set font for text and timer
-font = pygame.font.SysFont("Arial", 36)  # font object for rendering text
-metrics_font = pygame.font.SysFont("Arial", 20) # smaller font for the timer
+# Set font for text and timer, created by init_display()
+font = None  # font object for rendering text
+metrics_font = None # smaller font for the timer
 
-steps_taken = 0 # initialize the steps counter for Pacman
 food_eaten = 0  # initialize the counter for food pellets eaten
 
 # Menu
 MENU = True
 selected_level = 0  # 0 = Beginner, 1 = Intermediate, 2 = Advanced
-levels = ["Beginner Ghost - DFS", "Intermediate Ghost - BFS", "Advanced Ghost - A*"]
 selected_bot = 0
-algorithm = ["A*", "BFS", "DFS"]
-
-game_duration = 60 # seconds
-
-# Screen dimensions
-WIDTH, HEIGHT = 800, 600  # Updated dimensions
-TILE_SIZE = 20
-METRICS_HEIGHT = 50  # Height of the metrics area
 
 # Colors
 BLACK = (0, 0, 0)
@@ -47,305 +61,166 @@ BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
 DARK_GRAY = (50, 50, 50)
 
-screen = pygame.display.set_mode(  # creates a window of the specified size
-    (WIDTH, HEIGHT)
-)
-pygame.display.set_caption("Pac-Bot A* Search")  # sets the window title
-clock = pygame.time.Clock()  # clock object to control the frame rate
-
-# Create a grid/map size
-ROWS, COLS = (HEIGHT - METRICS_HEIGHT) // TILE_SIZE, WIDTH // TILE_SIZE
-grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-pacman_pos = [1, 1]  # pacman position
-walls = [] # list to store wall positions
-
-for col in range(COLS): # Border walls
-    walls.append([0, col])
-    walls.append([ROWS - 1, col])
-for row in range(ROWS):
-    walls.append([row, 0])
-    walls.append([row, COLS - 1])
-
-for row in range(2, ROWS - 2): # Vertical corridors
-    if row % 4 != 0:
-        walls.append([row, COLS // 4])
-        walls.append([row, COLS // 2])
-        walls.append([row, 3 * COLS // 4])
-
-for col in range(2, COLS - 2): # Horizontal corridors
-    if col % 5 != 0:
-        walls.append([ROWS // 4, col])
-        walls.append([ROWS // 2, col])
-        walls.append([3 * ROWS // 4, col])
-
-center_row = ROWS // 2
-center_col = COLS // 2
-ghost_box = [ # Central ghost box with exits
-    [center_row - 1, center_col - 1], [center_row - 1, center_col],
-    [center_row + 1, center_col - 1], [center_row + 1, center_col],
-    [center_row, center_col + 1], [center_row, center_col - 1]
-]
-walls += ghost_box # add ghost box to walls
-
-for row in range(5, ROWS - 5): # Add barriers to the left and right sides
-    if row % 6 == 0:
-        walls.append([row, 2])
-        walls.append([row, COLS - 3])
-
-
-def generate_food(num_food):  # Generate food in valid positions
-    food = []
-    while len(food) < num_food:
-        pos = [random.randint(0, ROWS - 1), random.randint(0, COLS - 1)]
-        if (
-            pos not in walls and pos not in food
-        ):  # ensure food is not in a wall or duplicate
-            food.append(pos)
-    return food
-
-enemies = [ # Update the enemies list to spawn in the center box
-    [center_row - 2, center_col],
-    [center_row + 2, center_col],
-    [center_row, center_col - 2],
-    [center_row, center_col + 2],
-]
-
-DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # directions: right, down, left, up
-additional_costs = {} # Initialize additional costs
-
-def update_costs_based_on_ghosts(): # Update path costs based only on proximity to ghosts
-    global additional_costs
-    additional_costs = {}  # Reset additional costs
-
-    for row in range(ROWS):
-        for col in range(COLS):
-            if [row, col] not in walls:  # Skip walls
-                # Calculate the minimum distance to any ghost
-                min_distance = min(
-                    abs(row - ghost[0]) + abs(col - ghost[1]) for ghost in enemies
-                )
-                # Assign a cost inversely proportional to the distance
-                # Closer to ghosts = higher cost
-                if min_distance <= 3:  # Example: within 3 tiles of a ghost
-                    additional_costs[(row, col)] = 10 - min_distance  # Cost: 9, 8, 7
-
-def update_costs_based_on_ghosts_and_food(food): # Update path costs based on proximity to ghosts and food
-    global additional_costs
-    new_costs = {}  # Temporary dictionary to calculate new costs
-
-    for row in range(ROWS): # Loop through the grid
-        for col in range(COLS):
-            if [row, col] not in walls:  # Skip walls
-                min_distance = min( # Calculate distance to ghosts
-                    abs(row - ghost[0]) + abs(col - ghost[1]) for ghost in enemies
-                )
-                # Assign a cost inversely proportional to the distance, closer to ghosts = higher cost
-                if min_distance <= 3:  # within 3 tiles of a ghost
-                    new_costs[(row, col)] = max(1, 10 - min_distance)
-    additional_costs = new_costs  # Update the global additional costs
-
-# ==== Search Algorithms ==========================================================================
-#
-# =================================================================================================
-def heuristic(a, b):  # Calculate the Manhattan distance between two points
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-def a_star_search( # start, goal):  # A* search algorithm
-    start, goal
-):  
-    open_set = []
-    heapq.heappush(open_set, (0, tuple(start)))  # convert start to tuple
-    came_from = {}
-    g_score = {tuple(start): 0}  # convert start to tuple
-    f_score = {tuple(start): heuristic(start, goal)}  # convert start to tuple
-
-    while open_set:  # Pop the node with the lowest f_score
-        _, current = heapq.heappop(open_set)
-
-        if current == tuple(goal):  # Convert goal to tuple
-            path = []
-            while current in came_from:
-                path.append(list(current))  # convert tuple back to list for path
-                current = came_from[current]
-            path.reverse()
-            return path
-
-        for direction in DIRECTIONS:  # Check all possible directions
-            neighbor = (
-                current[0] + direction[0],
-                current[1] + direction[1],
-            )  # use tuple
-
-            if (  # Check if neighbor is within bounds and not a wall
-                0 <= neighbor[0] < ROWS
-                and 0 <= neighbor[1] < COLS
-                and list(neighbor) not in walls
-            ):
-                # Calculate the additional cost for the neighbor
-                additional_cost = additional_costs.get(neighbor, 0)
-                tentative_g_score = g_score[current] + 1 + additional_cost
-
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-    return []
-
-def dfs(start, goal): # DFS algo lvl0 to find a path from start to goal
-    stack = [tuple(start)]  # starting point on the stack
-    came_from = {tuple(start): None}  # tracking the path
-    
-    while stack:
-        current = stack.pop()  # get the most recently added node (LIFO)
-        
-        if current == tuple(goal):
-            path = []
-            while current:
-                path.append(list(current))
-                current = came_from[current]
-            path.reverse()
-            return path[1:]  # return the path skipping the starting point
-        
-        # Randomize directions to make ghost movement less predictable
-        directions_copy = DIRECTIONS.copy()
-        random.shuffle(directions_copy)
-        
-        for d in directions_copy: # Move in all directions
-            neighbor = (current[0] + d[0], current[1] + d[1])
-            
-            if (
-                0 <= neighbor[0] < ROWS
-                and 0 <= neighbor[1] < COLS
-                and list(neighbor) not in walls
-                and neighbor not in came_from
-            ):
-                came_from[neighbor] = current
-                stack.append(neighbor)
-    
-    return []  # no path found
-
-def bfs(start, goal): # BFS algorithm lvl1 to find the shortest path from start to goal
-    queue = deque([tuple(start)])     #starting point in the queue
-    came_from = {tuple(start): None}  # Keeping track
-
-    while queue:
-        current = queue.popleft() # get the next place to check
-
-        if current == tuple(goal):  
-            path = []               #storing the path taken
-            while current:
-                path.append(list(current))      # adding each step to opath
-                current = came_from[current]    # move to previous step
-            path.reverse()                      # put path in the right order
-            return path[1:]                     # return path skipping the starting point
-
-        for d in DIRECTIONS: # Move in all directions
-            neighbor = (current[0] + d[0], current[1] + d[1])
-
-            if (
-                0 <= neighbor[0] < ROWS             
-                and 0 <= neighbor[1] < COLS        # ensure it's inside, grid both col and row
-                and list(neighbor) not in walls # ensure it's not a wall
-                and neighbor not in came_from   
-            ):
-                came_from[neighbor] = current
-                queue.append(neighbor)
-    return []  # no path found
+screen = None  # window surface, created by init_display()
+clock = None  # clock object to control the frame rate
+
+def init_display():  # Initialize pygame, open the window and create the fonts, clock and background surface
+    global font, metrics_font, screen, clock, background
+    pygame.init()  # initializes all imported pygame modules
+    pygame.font.init()  # initializes the font module
+    font = pygame.font.SysFont("Arial", 36)
+    metrics_font = pygame.font.SysFont("Arial", 20)
+    screen = pygame.display.set_mode(  # creates a window of the specified size
+        (WIDTH, HEIGHT)
+    )
+    pygame.display.set_caption("Pac-Bot A* Search")  # sets the window title
+    clock = pygame.time.Clock()
+    background = pygame.Surface((WIDTH, HEIGHT))
 
 # ==== Drawing and Visualization ==========================================================
-#
+# The walls and grid lines never change, so they are drawn once to a background surface and the
+# cost overlay tiles are built once. Each frame only the tiles whose overlay or sprites changed are
+# redrawn, only the metric texts that changed are rendered again, and the display is updated with
+# just those rectangles instead of flipping the whole window.
 # =========================================================================================
-def draw_grid():  # Draw the grid with walls and additional cost tiles
-    for row in range(ROWS):
-        for col in range(COLS):
-            rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            if [row, col] in walls:
-                pygame.draw.rect(  # Draw walls as dark gray rectangles
-                    screen, DARK_GRAY, rect
-                )
-            elif [row, col] in enemies:  # Skip drawing tiles over ghosts
-                continue
-            elif (row, col) in additional_costs:  # Highlight tiles with additional costs
-                cost = additional_costs[(row, col)]
-                # Create a transparent surface for the tile
-                tile_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                # Assign colors based on cost
-                if cost == 9:  # High cost (dangerous, adjacent to ghosts)
-                    color = (255, 102, 102, 100)  # Light red with transparency
-                elif cost == 8:  # Moderate cost (2 tiles away from ghosts)
-                    color = (255, 255, 102, 100)  # Light yellow with transparency
-                elif cost == 7:  # Low cost (3 tiles away from ghosts)
-                    color = (102, 255, 102, 100)  # Light green with transparency
-                tile_surface.fill(color)  # Fill the surface with the transparent color
-                screen.blit(tile_surface, rect.topleft)  # Blit the surface onto the screen
-            else:
-                pygame.draw.rect(screen, BLUE, rect, 1)  # Draw grid lines in blue
-
-def draw_pacman():  # Draw Pacman
-    pygame.draw.circle(
-        screen,
-        YELLOW,
-        (
-            pacman_pos[1] * TILE_SIZE + TILE_SIZE // 2,
-            pacman_pos[0] * TILE_SIZE + TILE_SIZE // 2,
-        ),
-        TILE_SIZE // 2,
-    )
-
-def draw_food():  # Draw food
+COST_COLORS = {  # Colors of the cost overlay tiles, with transparency
+    9: (255, 102, 102, 100),  # High cost (dangerous, adjacent to ghosts): light red
+    8: (255, 255, 102, 100),  # Moderate cost (2 tiles away from ghosts): light yellow
+    7: (102, 255, 102, 100),  # Low cost (3 tiles away from ghosts): light green
+}
+background = None  # surface of the walls and grid lines, created by init_display() and drawn by build_background()
+cost_tiles = {}  # cost -> transparent overlay tile
+drawn_tiles = {}  # cell index -> (overlay, sprites) on screen, for tiles that differ from the background
+drawn_metrics = {}  # metric x position -> (text, rect) on screen
+dirty_rects = []  # screen areas changed since the last display update
+agent_rects = []  # screen areas of the agents drawn by draw_agents on the last frame
+
+def build_background():  # Draw the walls and grid lines once, build the cost overlay tiles and show the background
+    background.fill(BLACK)
+    for index in range(ROWS * COLS):
+        row, col = divmod(index, COLS)
+        rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        if not passable[index]:
+            pygame.draw.rect(background, DARK_GRAY, rect)  # Draw walls as dark gray rectangles
+        else:
+            pygame.draw.rect(background, BLUE, rect, 1)  # Draw grid lines in blue
+    for cost, color in COST_COLORS.items():
+        tile_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        tile_surface.fill(color)
+        cost_tiles[cost] = tile_surface
+    cost_tiles[10] = cost_tiles[9]  # the cell a ghost just left still has the ghost's own cost
+    drawn_tiles.clear()
+    drawn_metrics.clear()
+    agent_rects.clear()
+    screen.blit(background, (0, 0))
+    dirty_rects.append(screen.get_rect())
+
+def sprite_tiles(food, snapshot=None):  # Colors and radii of the sprites on each cell index, in drawing order
+    # With a snapshot, Pacman and the ghosts are left out: draw_agents draws them between tiles
+    sprites = {}
+    if snapshot is None:
+        sprites.setdefault(pacman_pos[0] * COLS + pacman_pos[1], []).append((YELLOW, TILE_SIZE // 2))
     for powerup in food:
-        pygame.draw.circle(
-            screen,
-            GREEN,
-            (
-                powerup[1] * TILE_SIZE + TILE_SIZE // 2,
-                powerup[0] * TILE_SIZE + TILE_SIZE // 2,
-            ),
-            TILE_SIZE // 4,
-        )
-
-def draw_enemies():  # Draw enemies
-    for enemy in enemies:
-        pygame.draw.circle(
-            screen,
-            RED,
-            (
-                enemy[1] * TILE_SIZE + TILE_SIZE // 2,
-                enemy[0] * TILE_SIZE + TILE_SIZE // 2,
-            ),
-            TILE_SIZE // 2,
-        )
+        sprites.setdefault(powerup[0] * COLS + powerup[1], []).append((GREEN, TILE_SIZE // 4))
+    if snapshot is None:
+        for enemy in enemies:
+            sprites.setdefault(enemy[0] * COLS + enemy[1], []).append((RED, TILE_SIZE // 2))
+    return sprites
+
+def draw_tile(index, look):  # Draw one tile: its background or cost overlay (overlay, sprites), then its sprites
+    overlay, tile_sprites = look
+    row, col = divmod(index, COLS)
+    rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    if overlay is None:
+        screen.blit(background, rect, rect)
+    else:
+        screen.fill(BLACK, rect)
+        if overlay:
+            screen.blit(cost_tiles[overlay], rect)  # Highlight tiles with additional costs
+    screen.set_clip(rect)  # sprites must not spill into tiles that are not redrawn
+    for color, radius in tile_sprites:
+        pygame.draw.circle(screen, color, rect.center, radius)
+    screen.set_clip(None)
+    dirty_rects.append(rect)
+
+def draw_grid(food, snapshot=None):  # Redraw the tiles whose cost overlay or sprites changed since the last frame
+    # snapshot is a sim_worker.Snapshot to draw instead of the game core's state
+    sprites = sprite_tiles(food, snapshot)
+    ghosts = enemies if snapshot is None else snapshot.ghosts
+    ghost_cells = {enemy[0] * COLS + enemy[1] for enemy in ghosts}
+    costs = game.additional_costs if snapshot is None else snapshot.costs
+    # Only tiles with a cost or a sprite, now or on the last frame, can differ from what is on screen
+    for index in set(drawn_tiles).union(costs, sprites):
+        if not passable[index]:
+            overlay = None  # walls keep their background
+        elif index in ghost_cells:
+            overlay = 0  # no grid lines or overlay under ghosts
+        else:
+            overlay = costs.get(index)
+        look = (overlay, tuple(sprites.get(index, ())))
+        if drawn_tiles.get(index, (None, ())) == look:
+            continue
+        if look == (None, ()):
+            del drawn_tiles[index]
+        else:
+            drawn_tiles[index] = look
+        draw_tile(index, look)
+
+def draw_agents(previous, current, alpha):  # Draw Pacman and the ghosts between two snapshots, alpha 0 = previous, 1 = current
+    for rect in agent_rects:  # restore the tiles under the agents of the last frame
+        for row in range(rect.top // TILE_SIZE, min(ROWS, (rect.bottom - 1) // TILE_SIZE + 1)):
+            for col in range(rect.left // TILE_SIZE, min(COLS, (rect.right - 1) // TILE_SIZE + 1)):
+                index = row * COLS + col
+                draw_tile(index, drawn_tiles.get(index, (None, ())))
+    agent_rects.clear()
+    agents = [(previous.pacman, current.pacman, YELLOW)] + [
+        (start, end, RED) for start, end in zip(previous.ghosts, current.ghosts)
+    ]
+    for start, end, color in agents:
+        x = (start[1] + (end[1] - start[1]) * alpha) * TILE_SIZE + TILE_SIZE // 2
+        y = (start[0] + (end[0] - start[0]) * alpha) * TILE_SIZE + TILE_SIZE // 2
+        rect = pygame.draw.circle(screen, color, (round(x), round(y)), TILE_SIZE // 2)
+        agent_rects.append(rect)
+        dirty_rects.append(rect)
+
+def draw_metric(x, text, color=WHITE):  # Render a metric text at x in the metrics area, only when it changed
+    drawn = drawn_metrics.get(x)
+    if drawn and drawn[0] == text:
+        return
+    text_surface = metrics_font.render(text, True, color)
+    rect = text_surface.get_rect(topleft=(x, HEIGHT - METRICS_HEIGHT + 10))
+    if drawn: # clear the old text
+        screen.blit(background, drawn[1], drawn[1])
+        rect = rect.union(drawn[1])
+    screen.blit(text_surface, (x, HEIGHT - METRICS_HEIGHT + 10))
+    drawn_metrics[x] = (text, rect)
+    dirty_rects.append(rect)
 
 def draw_steps_taken():  # Function to display the number of steps Pacman has taken
-    steps_text = metrics_font.render(f"Steps Taken: {steps_taken}", True, WHITE)
+    steps_text = metrics_font.render(f"Steps Taken: {game.steps_taken}", True, WHITE)
     screen.blit(steps_text, (20, HEIGHT - METRICS_HEIGHT + 10))  # display in metrics area
 
-def draw_metrics():  # Function to display steps taken, time remaining, and memory usage
-    global steps_taken
-    elapsed_time = (pygame.time.get_ticks() - start_time) // 1000  # convert to seconds
+def draw_metrics(elapsed_time=None, snapshot=None):  # Function to display steps taken, time remaining, and memory usage
+    # snapshot is a sim_worker.Snapshot whose counters are shown instead of the game core's
+    if elapsed_time is None:  # a replay passes the game time of the frame
+        elapsed_time = (pygame.time.get_ticks() - start_time) // 1000  # convert to seconds
     remaining_time = max(0, game_duration - elapsed_time)  # calculate remaining time
+    steps_taken = game.steps_taken if snapshot is None else snapshot.steps_taken
+    eaten = food_eaten if snapshot is None else snapshot.food_eaten
+    anytime = game.last_anytime.get("Pac-Bot") if snapshot is None else snapshot.anytime
 
-    # Render steps taken
-    steps_text = metrics_font.render(f"Steps Taken: {steps_taken}", True, WHITE)
-    screen.blit(steps_text, (20, HEIGHT - METRICS_HEIGHT + 10))  # display steps in metrics area
-
-    # Render time remaining
-    time_text = metrics_font.render(f"Time Left: {remaining_time}s", True, WHITE)
-    screen.blit(time_text, (175, HEIGHT - METRICS_HEIGHT + 10))  # display time in metrics area
-
-    # Render food eaten
-    food_text = metrics_font.render(f"Food Eaten: {food_eaten}", True, WHITE)
-    screen.blit(food_text, (325, HEIGHT - METRICS_HEIGHT + 10))  # display in metrics area
-
-    # Render algorithm info
-    algo_text = metrics_font.render(f"Pacman: {algorithm[selected_bot]}", True, YELLOW)
-    screen.blit(algo_text, (650, HEIGHT - METRICS_HEIGHT + 10))  # aligned with other metrics
-
-    # Render memory usage
+    draw_metric(20, f"Steps Taken: {steps_taken}")  # steps taken
+    draw_metric(175, f"Time Left: {remaining_time}s")  # time remaining
+    draw_metric(325, f"Food Eaten: {eaten}")  # food eaten
     current_memory, peak_memory = memory_tracker.get_memory_usage()
-    memory_text = metrics_font.render(f"Ram Used: {current_memory} KB", True, WHITE)
-    screen.blit(memory_text, (475, HEIGHT - METRICS_HEIGHT + 10))  # display memory usage below steps
+    draw_metric(475, f"Ram Used: {current_memory} KB")  # memory usage
+    pacman_label = f"Pacman: {game.pacbot_name(selected_bot)}"
+    if anytime is not None:  # anytime A*: suboptimality bound of the last plan, "!" when it ran out of budget
+        budget_hit, bound = anytime
+        pacman_label += f" x{bound:.2f}" if bound is not None else " partial"
+        if budget_hit:
+            pacman_label += "!"
+    draw_metric(650, pacman_label, YELLOW)  # algorithm info, aligned with other metrics
 
 def draw_menu(): # Draw the menu for selecting levels
     screen.fill(BLACK)
@@ -357,7 +232,7 @@ def draw_menu(): # Draw the menu for selecting levels
     for i, level_name in enumerate(levels): # Display level names
         color = GREEN if i == selected_level else WHITE
         text = option_font.render(f"Level {i}: {level_name}", True, color)
-        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, 150 + i * 90))
+        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, 150 + i * 65))
 
     prompt = metrics_font.render("Use: Up/Down Arrows to choose Lvl. Enter to start.", True, WHITE)
     screen.blit(prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT - 180)) 
@@ -371,76 +246,9 @@ def draw_menu(): # Draw the menu for selecting levels
     screen.blit(algo_label, (WIDTH // 2 - algo_label.get_width() // 2, 100))
     pygame.display.flip() # update the display
 
-# ==== Movement/Collision logic ===================================================================
+# ==== Game Over ==================================================================================
 #
 # =================================================================================================
-recent_positions = deque(maxlen=5)  # Keep track of the last 5 positions
-
-def move_pacman_with_algorithm(target):  # Move Pacman using the selected algorithm
-    global steps_taken, recent_positions
-    recent_positions.append(tuple(pacman_pos))  # store the current position
-
-    # Check if Pacman is oscillating between positions
-    if len(recent_positions) == recent_positions.maxlen and len(set(recent_positions)) <= 2: 
-        if pacman_pos[0] < target[0]:  # Move in the direction of the target
-            pacman_pos[0] += 1
-        elif pacman_pos[0] > target[0]:
-            pacman_pos[0] -= 1
-        elif pacman_pos[1] < target[1]:
-            pacman_pos[1] += 1
-        elif pacman_pos[1] > target[1]:
-            pacman_pos[1] -= 1
-        steps_taken += 1
-        return
-
-    # Use the selected algorithm to find a path
-    if selected_bot == 0:  # A*
-        path = a_star_search(pacman_pos, target)
-    elif selected_bot == 1:  # BFS
-        path = bfs(pacman_pos, target)
-    elif selected_bot == 2:  # DFS
-        path = dfs(pacman_pos, target)
-
-    if path:  # Path found
-        pacman_pos[0], pacman_pos[1] = path[0]  # Move to the next position in the path
-        steps_taken += 1  # Increment the steps counter
-
-def move_enemy_with_bfs(enemy, target):  # Move a single enemy using BFS
-    path = bfs(enemy, target)
-    if path:
-        return path[0]  # return the next position in the path
-    return enemy  # if no path is found, stay in the same position
-
-def move_enemy_with_dfs(enemy, target):  # Move a single enemy using DFS
-    path = dfs(enemy, target)
-    if path:
-        return path[0]  # return the next position in the path
-    return enemy  # if no path is found, stay in the same position
-
-def move_enemy_with_a_star(enemy, target):  # Move a single enemy using A*
-    path = a_star_search(enemy, target)
-    if path:
-        return path[0]  # return the next position in the path
-    return enemy  # if no path is found, stay in the same position
-
-def check_collision_with_enemies(): # Check for collision with enemies
-    for enemy in enemies:
-        if pacman_pos[0] == enemy[0] and pacman_pos[1] == enemy[1]: # Check if pacman and enemy are in the same position
-            return True  # Collision detected
-    return False  # No collision
-
-def move_enemies():  # Move enemies based on the selected level
-    for i, enemy in enumerate(enemies): 
-        if selected_level == 0:  # Beginner: DFS
-            new_pos = move_enemy_with_dfs(enemy, pacman_pos)
-            enemies[i] = [new_pos[0], new_pos[1]]
-        elif selected_level == 1:  # Intermediate: BFS
-            new_pos = move_enemy_with_bfs(enemy, pacman_pos)
-            enemies[i] = [new_pos[0], new_pos[1]]
-        elif selected_level == 2:  # Advanced: A*
-            new_pos = move_enemy_with_a_star(enemy, pacman_pos)
-            enemies[i] = [new_pos[0], new_pos[1]]
-
 def show_game_over():  # Show game over screen
     overlay = pygame.Surface((WIDTH, HEIGHT))
     overlay.set_alpha(200)  # set transparency
@@ -468,15 +276,140 @@ def show_game_over():  # Show game over screen
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 pygame.quit()
                 exit()
-start_time = pygame.time.get_ticks() # intialize the start time
 
-memory_tracker.start_tracking() # Initialize memory tracking
+# ==== Replay =====================================================================================
+# Plays a game recorded by the simulator (simulations.py --replay) back frame by frame, streamed from
+# the log on disk. Positions and food spawns come from the recording, so no search runs.
+# =================================================================================================
+def play_replay(recorded):  # Show a replay.Replay at the game's frame rate
+    global food_eaten, selected_bot, selected_level
+    if recorded.layout != replay.layout_key(game.maze):
+        raise SystemExit("The replay was recorded on another maze than the one pacbot.py shows")
+    selected_bot, selected_level = recorded.pac_algo_index, recorded.ghost_level
+    food = []
+    previous_cell = None
+    build_background()
+
+    for tick, (pacman_cell, ghost_cells) in enumerate(recorded.frames()):
+        pacman_pos[:] = divmod(pacman_cell, COLS)
+        enemies[:] = [list(divmod(cell, COLS)) for cell in ghost_cells]
+        if previous_cell is not None and pacman_cell != previous_cell:
+            game.steps_taken += 1
+        previous_cell = pacman_cell
+        food_eaten += collect_food(food)  # the pellets under Pacman were eaten this tick
+        if tick in recorded.food_events:  # food spawned at the end of this tick
+            food = [list(divmod(cell, COLS)) for cell in recorded.food_events[tick]]
+        update_costs_for_moved_ghosts()  # cost overlay around the ghosts, as in a live game
+
+        draw_grid(food)
+        draw_metrics(tick // FPS)
+        for event in pygame.event.get(): # Check for events
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                exit()
+        pygame.display.update(dirty_rects)
+        dirty_rects.clear()
+        clock.tick(FPS)
+    show_game_over()
+
+# ==== Decoupled Game Loop ========================================================================
+# The simulation runs in a sim_worker.SimulationWorker (a thread, or a process) at the game's FPS while
+# this loop handles input and draws at RENDER_FPS, so a slow search never freezes the window. Pacman and
+# the ghosts glide between the positions of the last two snapshots. The mean frame and tick times are
+# shown in the window title and printed when the game ends.
+# =================================================================================================
+RENDER_FPS = 60  # frame rate of the renderer while the simulation runs in a worker
+TIMING_REPORT_MS = 1000  # how often the window title shows the frame and tick times
+
+def timing_summary(frame_times, tick_times):  # Mean and worst frame and tick times, in ms
+    frame = f"frame {sum(frame_times) / len(frame_times):.1f} ms (max {max(frame_times):.1f})" if frame_times else "frame -"
+    tick = f"tick {sum(tick_times) / len(tick_times):.1f} ms (max {max(tick_times):.1f})" if tick_times else "tick -"
+    return f"{frame}, {tick}"
+
+def play_decoupled(worker):  # Draw the snapshots of a SimulationWorker until the game ends or the window is closed
+    previous = current = None
+    current_at = 0  # pygame time the current snapshot arrived
+    frame_times, tick_times = [], []  # over the whole game
+    recent_frames, recent_ticks = [], []  # since the last title update
+    report_at = pygame.time.get_ticks() + TIMING_REPORT_MS
+    build_background()
+    worker.start()
+    while True:
+        frame_start = time.perf_counter()
+        for event in pygame.event.get(): # Check for events
+            if event.type == pygame.QUIT:
+                worker.stop()
+                print(f"Timing: {timing_summary(frame_times, tick_times)}")
+                return
+        for published in worker.poll():
+            previous, current = current, published
+            current_at = pygame.time.get_ticks()
+            recent_ticks.append(published.tick_ms)
+        alpha = 0.0
+        if current is not None:
+            alpha = min(1.0, (pygame.time.get_ticks() - current_at) * FPS / 1000)
+            draw_grid(current.food, current)
+            draw_agents(previous or current, current, alpha)
+            draw_metrics(current.tick // FPS, current)
+        pygame.display.update(dirty_rects) # update only the changed parts of the display
+        dirty_rects.clear()
+        recent_frames.append((time.perf_counter() - frame_start) * 1000)
+
+        now = pygame.time.get_ticks()
+        if now >= report_at:
+            pygame.display.set_caption(f"Pac-Bot A* Search - {timing_summary(recent_frames, recent_ticks)}")
+            frame_times += recent_frames
+            tick_times += recent_ticks
+            recent_frames, recent_ticks = [], []
+            report_at = now + TIMING_REPORT_MS
+        if current is not None and current.game_over and alpha >= 1.0:
+            print(f"Timing: {timing_summary(frame_times + recent_frames, tick_times + recent_ticks)}")
+            show_game_over()
+        clock.tick(RENDER_FPS)
 
 # ==== Main Game Loop =============================================================================
 #
 # =================================================================================================
 if __name__ == "__main__": # Main function to run the game
+    parser = argparse.ArgumentParser(description="Play Pac-Bot, or watch a recorded game.")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the food spawns and DFS choices (default: random)")
+    parser.add_argument("--replay", default=None, help="replay log written by simulations.py --replay to watch a game from")
+    parser.add_argument(
+        "--pac", choices=algorithm + [game.ROLLOUT_NAME], default=None, help="Pac-Bot AI of the replayed game"
+    )
+    parser.add_argument(
+        "--ghost", choices=[level.split(" - ")[-1] for level in levels], default=None, help="Ghost AI of the replayed game"
+    )
+    parser.add_argument(
+        "--sim", choices=["thread", "process", "inline"], default="thread",
+        help="run the simulation in a worker thread (default) or process, or inline in the render loop"
+    )
+    parser.add_argument(
+        "--anytime", type=int, nargs="?", const=game.ANYTIME_BUDGET_US, default=None, metavar="US",
+        help=f"bound the A* planning of a frame to US microseconds (default: {game.ANYTIME_BUDGET_US})"
+    )
+    args = parser.parse_args()
+    if args.anytime:
+        game.use_anytime_search(budget_us=args.anytime)
+    init_display()
+
     running = True
+    memory_tracker.start_tracking("rss") # Initialize memory tracking, the process RSS costs nothing per allocation
+    if args.replay: # Replay mode: the first game in the log that matches --pac, --ghost and --seed
+        ghost_names = [level.split(" - ")[-1] for level in levels]
+        recorded = replay.open_replay(
+            args.replay,
+            None if args.pac is None else game.ROLLOUT_PAC_INDEX if args.pac == game.ROLLOUT_NAME else algorithm.index(args.pac),
+            ghost_names.index(args.ghost) if args.ghost else None,
+            args.seed,
+        )
+        print(f"Replaying {game.pacbot_name(recorded.pac_algo_index)} vs {ghost_names[recorded.ghost_level]}, seed {recorded.seed}")
+        start_time = pygame.time.get_ticks()
+        play_replay(recorded)
+
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    random.seed(seed) # the same seed and choices replay the same food spawns and DFS moves
+    print(f"Seed: {seed}")
 
     while MENU: # Menu loop
         draw_menu()
@@ -496,41 +429,42 @@ if __name__ == "__main__": # Main function to run the game
                 if event.key == pygame.K_RIGHT:
                     selected_bot = (selected_bot + 1) % len(algorithm)
 
+    if args.sim != "inline": # The worker plays the game, this process only draws it
+        play_decoupled(SimulationWorker(selected_bot, selected_level, seed, args.anytime, args.sim == "process"))
+        pygame.quit()
+        memory_tracker.stop_tracking()
+        exit()
+
     # Initialize food after the menu loop
-    food_count = 3
-    food = generate_food(food_count)
+    food = generate_food(FOOD_COUNT)
+    start_time = pygame.time.get_ticks() # intialize the start time
+    build_background() # draw the static walls and grid lines once
 
     while running: 
-        screen.fill(BLACK)
-        draw_grid()
-        draw_pacman()
-        draw_food()
-        draw_enemies()
+        draw_grid(food)
         draw_metrics()
-        update_costs_based_on_ghosts_and_food(food)
+        update_costs_for_moved_ghosts()
 
         if food: # Move Pacman towards the first food item
-            move_pacman_with_algorithm(food[0])
-        move_enemies()
+            move_pacman_with_algorithm(food[0], selected_bot, food)
+        move_enemies(selected_level)
 
         if check_collision_with_enemies(): # Check for collision with enemies
             show_game_over()
             running = False
 
-        for powerup in food[:]: # Check for collision with food
-            if pacman_pos == powerup:
-                food.remove(powerup)
-                food_eaten += 1
+        food_eaten += collect_food(food) # Check for collision with food
 
         if not food: # Generate new food if all food is eaten
-            food = generate_food(food_count)
+            food = generate_food(FOOD_COUNT)
 
         for event in pygame.event.get(): # Check for events
             if event.type == pygame.QUIT: 
                 running = False
 
-        pygame.display.flip() # update the display
-        clock.tick(5) # control the frame rate
+        pygame.display.update(dirty_rects) # update only the changed parts of the display
+        dirty_rects.clear()
+        clock.tick(FPS) # control the frame rate
         elapsed_time = (pygame.time.get_ticks() - start_time) // 1000 # convert to seconds
         if elapsed_time > game_duration: # Check if time is up
             show_game_over()
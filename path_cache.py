@@ -0,0 +1,118 @@
+# File: path_cache.py
+# Description: This file contains the per-agent path reuse cache for the Pac-Bot game.
+# Every search returns a whole path but the agents only take its first step and search again the next
+# tick. The cache keeps each agent's path and hands out its next step instead, for as long as it is valid:
+#   - the agent is standing where the path sent it last tick,
+#   - the goal is the same, or moved a few tiles: the path is then spliced (cut back to the goal when it
+#     stepped back onto the path, extended by a short search from the old goal otherwise), so it can be a
+#     few steps longer than a fresh search. Ghosts move every third tick, so Pac-Bot can be up to three
+#     tiles further by their next search,
+#   - the path cost of no cell left on the path changed (only checked for A* paths, which read the costs),
+#   - the path is younger than its age limit.
+# Any other case evicts the entry and the caller searches again. Walls never change during a game, and
+# game.use_maze clears the cache with the game.
+from collections import deque
+
+MAX_PATH_AGE = 8  # steps taken from one path before it is searched again
+MAX_SPLICE = 3  # tiles the goal can move and still be spliced onto the path
+
+
+class PathCache: # Cached paths by agent key, with hit, miss and eviction counters
+    def __init__(self, maze, cost_grid, max_age=MAX_PATH_AGE):
+        self.maze = maze
+        self.cost_grid = cost_grid  # additional cost by flat cell index, shared with the cost field
+        self.max_age = max_age
+        self.entries = {}  # agent key -> [cells from the start, position index, goal, cost snapshot, age limit]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {}  # reason -> count: "off path", "goal", "cost", "age", "arrived"
+
+    def clear(self): # Forget every path, for example at the start of a game
+        self.entries.clear()
+
+    def _evict(self, key, reason):
+        del self.entries[key]
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        return reason
+
+    def next_step(self, key, position, goal): # Next [row, col] of the agent's cached path, None on a miss
+        # position is the agent's [row, col], goal the flat index of its target, or a tuple of indices for
+        # multi-goal searches, which are never spliced. Returns (step, reason the entry was evicted or None).
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+        cells, at, cached_goal, snapshot, age_limit = entry
+        cols = self.maze.cols
+        reason = None
+        if cells[at] != position[0] * cols + position[1]:
+            reason = "off path"
+        elif at >= age_limit:
+            reason = "age"
+        elif goal != cached_goal:
+            if isinstance(goal, tuple) or isinstance(cached_goal, tuple) or not self._splice(entry, goal):
+                reason = "goal"
+        if reason is None and at + 1 >= len(cells):
+            reason = "arrived"
+        if reason is None and snapshot is not None:
+            cost_grid = self.cost_grid
+            for i in range(at + 1, len(cells)):
+                if cost_grid[cells[i]] != snapshot[i]:
+                    reason = "cost"
+                    break
+        if reason is not None:
+            self.misses += 1
+            return None, self._evict(key, reason)
+        self.hits += 1
+        entry[1] = at + 1
+        return list(divmod(cells[at + 1], cols)), None
+
+    def _splice(self, entry, goal): # Move the end of an entry's path to a goal a few tiles away, False when too far
+        cells, at, cached_goal, snapshot, _ = entry
+        for i in range(len(cells) - 2, at, -1): # the goal stepped back onto the path: cut it there
+            if cells[i] == goal:
+                del cells[i + 1:]
+                if snapshot is not None:
+                    del snapshot[i + 1:]
+                entry[2] = goal
+                return True
+
+        # the goal moved off the path: search out from the old goal, at most MAX_SPLICE steps deep
+        neighbors = self.maze.neighbors
+        came_from = {cached_goal: None}
+        queue = deque([(cached_goal, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if current == goal:
+                extension = []
+                while current != cached_goal:
+                    extension.append(current)
+                    current = came_from[current]
+                extension.reverse()
+                cells.extend(extension)
+                if snapshot is not None:
+                    snapshot.extend(self.cost_grid[cell] for cell in extension)
+                entry[2] = goal
+                return True
+            if depth < MAX_SPLICE:
+                for neighbor in neighbors[current]:
+                    if neighbor not in came_from:
+                        came_from[neighbor] = current
+                        queue.append((neighbor, depth + 1))
+        return False
+
+    def store(self, key, start, path, goal, uses_costs=False, age_limit=None): # Cache a path returned by a search
+        # start is the [row, col] the search started from, path its [row, col] cells without start.
+        # uses_costs keeps a snapshot of the path costs (A*), age_limit overrides max_age for this path.
+        if not path:
+            self.entries.pop(key, None)
+            return
+        cols = self.maze.cols
+        cells = [start[0] * cols + start[1]]
+        cells.extend(row * cols + col for row, col in path)
+        snapshot = None
+        if uses_costs:
+            cost_grid = self.cost_grid
+            snapshot = [cost_grid[cell] for cell in cells]
+        # the step handed out with the search result counts as the first step of the path
+        self.entries[key] = [cells, 1, goal, snapshot, self.max_age if age_limit is None else age_limit]
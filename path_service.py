@@ -0,0 +1,374 @@
+# File: path_service.py
+# Description: This file contains a local path query service for the game core, its client and a load generator.
+# A PathService loads a maze once (a preset or a map file, as simulations.py --maze), keeps its neighbor
+# table, JPS bitboards and optionally the BFS path table warm, and answers path, next-step and distance
+# queries of game.a_star_search, bfs, dfs and jps_search over a Unix socket or localhost TCP with asyncio.
+# It does not import pygame.
+#
+# Framing: every frame is a little-endian u32 payload length and a payload that starts with HEADER
+# (kind, request id, item count). A KIND_QUERIES frame carries a batch of QUERY items and is answered by
+# one frame with the same request id and one result per query, in order: an i32 value (the cell count
+# of a path, the next cell, or the path cost; NO_PATH or INVALID), followed for paths by the u32 cells
+# without the start. KIND_GHOSTS sets the ghost cells of the connection's cost field, read by A* and JPS,
+# answered with the ghost count and a u32 body holding the number of cells with a cost (more than a
+# u16 count holds on large mazes), and KIND_STATS returns the maze size and the per-endpoint latency
+# histograms as JSON.
+# Clients can pipeline: they send any number of frames without waiting and match the answers by request id.
+# Connections are served concurrently, but the searches are CPU-bound and run on the event loop, so
+# frames of different connections interleave one frame at a time; start more services to use more cores.
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import struct
+import tempfile
+import time
+from array import array
+import game
+import jps
+import maze_io
+import path_table
+from cost_field import CostField
+from result_columns import RunningStats
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_FRAME_BYTES = 16 * 1024 * 1024  # larger frames close the connection
+
+FRAME = struct.Struct("<I")  # payload length of a frame
+HEADER = struct.Struct("<BIH")  # kind, request id, item count: the start of every payload
+QUERY = struct.Struct("<BBII")  # op, algorithm index (as game.algorithm), start cell, goal cell (flat indices)
+RESULT = struct.Struct("<i")  # value of a query result
+COSTED = struct.Struct("<I")  # cells with a cost, the body of a KIND_GHOSTS answer (can exceed the u16 count)
+KIND_QUERIES, KIND_GHOSTS, KIND_STATS = 1, 2, 3
+OP_PATH, OP_STEP, OP_DISTANCE = 1, 2, 3
+ENDPOINTS = {OP_PATH: "path", OP_STEP: "step", OP_DISTANCE: "distance"}  # latency histogram of every op, plus:
+OTHER_ENDPOINTS = {KIND_GHOSTS: "ghosts", KIND_STATS: "stats"}
+NO_PATH = -1  # the goal cannot be reached (a step query at the goal returns the goal itself)
+INVALID = -2  # unknown op or algorithm, or a cell outside the maze
+
+
+class PathService: # Answers the framed queries of every connection on one maze
+    def __init__(self, maze, table=None):
+        self.maze = maze
+        self.table = table  # optional path_table.PathTable that answers BFS queries
+        jps.bitboard(maze)  # build the bitboards now instead of in the first JPS query
+        self.latency = {  # endpoint -> microseconds per query (per frame for ghosts and stats)
+            name: RunningStats() for name in list(ENDPOINTS.values()) + list(OTHER_ENDPOINTS.values())
+        }
+        self.connections = 0
+
+    def search(self, algo_index, start, goal, field, rng): # Path of an algorithm as flat cell indices, without start
+        maze = self.maze
+        cols = maze.cols
+        if algo_index == 1 and self.table is not None:
+            return self.table.path(start, goal)
+        start, goal = list(divmod(start, cols)), list(divmod(goal, cols))
+        if algo_index == 0:
+            path = game.a_star_search(start, goal, maze, field.grid)
+        elif algo_index == 1:
+            path = game.bfs(start, goal, maze)
+        elif algo_index == 2:
+            path = game.dfs(start, goal, maze, rng)
+        else:
+            path = game.jps_search(start, goal, maze, field.costs)
+        return [row * cols + col for row, col in path]
+
+    def answer(self, op, algo_index, start, goal, field, rng): # (value, path cells) of one query
+        cells = self.maze.rows * self.maze.cols
+        if op not in ENDPOINTS or not 0 <= algo_index < len(game.algorithm) or start >= cells or goal >= cells:
+            return INVALID, None
+        if start == goal:
+            return (0, []) if op == OP_PATH else (goal if op == OP_STEP else 0, None)
+        path = self.search(algo_index, start, goal, field, rng)
+        if not path:
+            return NO_PATH, None
+        if op == OP_PATH:
+            return len(path), path
+        if op == OP_STEP:
+            return path[0], None
+        if algo_index in (0, 3):  # A* and JPS: the path cost with the ghost costs
+            grid = field.grid
+            return sum(1 + grid[cell] for cell in path), None
+        return len(path), None
+
+    def answer_queries(self, payload, count, field, rng): # Result bytes of a KIND_QUERIES payload
+        parts = []
+        latency = self.latency
+        offset = HEADER.size
+        for _ in range(count):
+            op, algo_index, start, goal = QUERY.unpack_from(payload, offset)
+            offset += QUERY.size
+            start_ns = time.perf_counter_ns()
+            value, path = self.answer(op, algo_index, start, goal, field, rng)
+            parts.append(RESULT.pack(value))
+            if path:
+                parts.append(array("I", path).tobytes())
+            if op in ENDPOINTS:
+                latency[ENDPOINTS[op]].add((time.perf_counter_ns() - start_ns) // 1000)
+        return b"".join(parts)
+
+    def stats(self): # Maze size and latency histograms, as sent for KIND_STATS
+        return {
+            "rows": self.maze.rows, "cols": self.maze.cols, "algorithms": game.algorithm,
+            "connections": self.connections,
+            "latency_us": {name: stats.to_dict() for name, stats in self.latency.items()},
+        }
+
+    async def handle(self, reader, writer): # Serve one connection until it closes
+        self.connections += 1
+        field = CostField(self.maze)  # every connection has its own ghosts
+        rng = random.Random(0)  # DFS direction choices of this connection
+        try:
+            while True:
+                try:
+                    size = FRAME.unpack(await reader.readexactly(FRAME.size))[0]
+                    if not HEADER.size <= size <= MAX_FRAME_BYTES:
+                        break
+                    payload = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    break
+                kind, request_id, count = HEADER.unpack_from(payload)
+                start_ns = time.perf_counter_ns()
+                if kind == KIND_QUERIES and size == HEADER.size + count * QUERY.size:
+                    body = self.answer_queries(payload, count, field, rng)
+                elif kind == KIND_GHOSTS and size == HEADER.size + count * 4:
+                    ghosts = array("I", payload[HEADER.size:])
+                    cols = self.maze.cols
+                    field.rebuild([divmod(cell, cols) for cell in ghosts if cell < self.maze.rows * cols])
+                    body = COSTED.pack(len(field.costs))
+                elif kind == KIND_STATS:
+                    body = json.dumps(self.stats()).encode()
+                else:
+                    break  # malformed frame: drop the connection
+                if kind in OTHER_ENDPOINTS:
+                    self.latency[OTHER_ENDPOINTS[kind]].add((time.perf_counter_ns() - start_ns) // 1000)
+                writer.write(FRAME.pack(HEADER.size + len(body)) + HEADER.pack(kind, request_id, count) + body)
+                await writer.drain()
+                await asyncio.sleep(0)  # let the other connections run between frames, even when this one has more buffered
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # the client went away, or the service is shutting down
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None): # Listen, returns the asyncio server
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle, unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def open_service(maze_spec=None, use_table=False): # PathService on a preset or map file, the stock maze for None
+    maze = game.maze if maze_spec is None else maze_io.open_maze(maze_spec)
+    return PathService(maze, path_table.load_path_table(maze) if use_table else None)
+
+
+async def serve(maze_spec=None, use_table=False, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, ready=None): # Run a service until cancelled
+    # ready is an Event set once the service is listening.
+    service = open_service(maze_spec, use_table)
+    server = await service.start(host, port, unix_path)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+class PathClient: # Client of a PathService connection; concurrent calls are pipelined on the connection
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}  # request id -> future of the answer (count, body)
+        self.next_id = 0
+        self.receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self): # Hand every answer frame to the call waiting for its request id
+        try:
+            while True:
+                size = FRAME.unpack(await self.reader.readexactly(FRAME.size))[0]
+                payload = await self.reader.readexactly(size)
+                _, request_id, count = HEADER.unpack_from(payload)
+                future = self.pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result((count, payload[HEADER.size:]))
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"path service closed the connection: {error}"))
+            self.pending.clear()
+
+    async def request(self, kind, count, body=b""): # Send one frame and wait for its answer, returns (count, body)
+        request_id = self.next_id
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF
+        future = self.pending[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(FRAME.pack(HEADER.size + len(body)) + HEADER.pack(kind, request_id, count) + body)
+        await self.writer.drain()
+        return await future
+
+    async def queries(self, op, algo_index, pairs): # Values of one op for (start cell, goal cell) pairs, paths as lists
+        body = b"".join(QUERY.pack(op, algo_index, start, goal) for start, goal in pairs)
+        _, answer = await self.request(KIND_QUERIES, len(pairs), body)
+        results = []
+        offset = 0
+        for _ in pairs:
+            value = RESULT.unpack_from(answer, offset)[0]
+            offset += RESULT.size
+            if op == OP_PATH and value >= 0:
+                results.append(array("I", answer[offset:offset + value * 4]).tolist())
+                offset += value * 4
+            else:
+                results.append(None if op == OP_PATH else value)
+        return results
+
+    async def paths(self, algo_index, pairs): # Path cells without the start, None when there is no path
+        return await self.queries(OP_PATH, algo_index, pairs)
+
+    async def steps(self, algo_index, pairs): # Next cells, NO_PATH when there is no path
+        return await self.queries(OP_STEP, algo_index, pairs)
+
+    async def distances(self, algo_index, pairs): # Path costs (steps for BFS and DFS), NO_PATH when there is no path
+        return await self.queries(OP_DISTANCE, algo_index, pairs)
+
+    async def set_ghosts(self, cells): # Put the A* and JPS ghost costs of this connection around these cells
+        _, body = await self.request(KIND_GHOSTS, len(cells), array("I", cells).tobytes())
+        return COSTED.unpack(body)[0]  # cells with a cost
+
+    async def stats(self): # Maze size and latency histograms of the service
+        _, answer = await self.request(KIND_STATS, 0)
+        return json.loads(answer)
+
+    async def close(self):
+        self.writer.close()
+        self.receiver.cancel()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def latency_table(latency): # Lines of a latency table of {name: RunningStats or its to_dict()}
+    lines = [f"{'Endpoint':<12}{'Count':>10}{'Mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'Max':>10}"]
+    for name, stats in latency.items():
+        if isinstance(stats, dict):
+            stats = RunningStats.from_dict(stats)
+        if not stats.count:
+            continue
+        lines.append(
+            f"{name:<12}{stats.count:>10}{stats.mean:>10.1f}{stats.percentile(0.5):>10.0f}{stats.percentile(0.9):>10.0f}"
+            f"{stats.percentile(0.99):>10.0f}{stats.high:>10.0f}"
+        )
+    return lines
+
+
+async def generate_load( # Keep depth frames in flight on each connection for duration seconds
+    address, cells=None, connections=4, depth=8, batch=32, duration=5.0, algo_index=0, op=OP_PATH, ghosts=4, seed=1
+):
+    # address is (host, port, unix_path) and cells the cells queries and ghosts are drawn from, every cell of
+    # the served maze for None. Returns (frames, queries, seconds, round trip RunningStats in us, service
+    # stats). Every connection draws its queries and ghosts from its own seeded stream.
+    clients = [await PathClient.connect(*address) for _ in range(connections)]
+    info = await clients[0].stats()
+    if cells is None:
+        cells = range(info["rows"] * info["cols"])
+    round_trip = RunningStats()
+    counts = [0, 0]  # frames, queries
+    deadline = time.perf_counter() + duration
+
+    async def worker(client, rng):
+        while time.perf_counter() < deadline:
+            pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(batch)]
+            start_ns = time.perf_counter_ns()
+            await client.queries(op, algo_index, pairs)
+            round_trip.add((time.perf_counter_ns() - start_ns) // 1000)
+            counts[0] += 1
+            counts[1] += batch
+
+    tasks = []
+    for index, client in enumerate(clients):
+        rng = random.Random(seed + index)
+        await client.set_ghosts([rng.choice(cells) for _ in range(ghosts)])
+        tasks += [worker(client, rng) for _ in range(depth)]
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    seconds = time.perf_counter() - start
+    service_stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+    return counts[0], counts[1], seconds, round_trip, service_stats
+
+
+def _serve_process(maze_spec, use_table, host, port, unix_path, ready): # Entry point of the service process of a benchmark
+    asyncio.run(serve(maze_spec, use_table, host, port, unix_path, ready))
+
+
+def run_benchmark(args): # Load generator: start a service process unless --connect is given, then print the results
+    address = (args.host, args.port, args.unix)
+    cells = (game.maze if args.maze is None else maze_io.open_maze(args.maze)).open_cells
+    process = None
+    if not args.connect:
+        unix_path = args.unix or os.path.join(tempfile.mkdtemp(), "path_service.sock")
+        address = (args.host, args.port, unix_path)
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=_serve_process, args=(args.maze, args.path_table, args.host, args.port, unix_path, ready), daemon=True
+        )
+        process.start()
+        if not ready.wait(60):
+            raise SystemExit("path service did not start")
+    try:
+        op = {name: op for op, name in ENDPOINTS.items()}[args.op]
+        frames, queries, seconds, round_trip, service_stats = asyncio.run(generate_load(
+            address, cells, args.connections, args.depth, args.batch, args.duration, game.algorithm.index(args.algorithm), op,
+            args.ghosts, args.seed,
+        ))
+    finally:
+        if process is not None:
+            process.terminate()
+    print(
+        f"{args.connections} connections x {args.depth} frames in flight, {args.batch} {args.algorithm} {args.op} "
+        f"queries per frame, {service_stats['rows']}x{service_stats['cols']} maze"
+    )
+    print(f"{frames} frames, {queries} queries in {seconds:.2f} s: {queries / seconds:.0f} queries/s")
+    print("Round trip per frame (us):")
+    print("\n".join(latency_table({"frame": round_trip})))
+    print("Service time per query (us):")
+    print("\n".join(latency_table(service_stats["latency_us"])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve path queries on a maze, or generate load against the service.")
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--maze", default=None, help="preset or map file to serve instead of the stock maze")
+    parser.add_argument("--path-table", action="store_true", help="answer BFS from the precomputed all-pairs table")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="listen on (or connect to) this Unix socket instead of TCP")
+    parser.add_argument("--connect", action="store_true", help="bench: load a running service instead of starting one")
+    parser.add_argument("--connections", type=int, default=4, help="bench: client connections")
+    parser.add_argument("--depth", type=int, default=8, help="bench: frames in flight per connection")
+    parser.add_argument("--batch", type=int, default=32, help="bench: queries per frame")
+    parser.add_argument("--duration", type=float, default=5.0, help="bench: seconds of load")
+    parser.add_argument("--algorithm", choices=game.algorithm, default=game.algorithm[0], help="bench: search of the queries")
+    parser.add_argument("--op", choices=list(ENDPOINTS.values()), default="path", help="bench: query type")
+    parser.add_argument("--ghosts", type=int, default=4, help="bench: ghost cells of each connection's costs")
+    parser.add_argument("--seed", type=int, default=1, help="bench: seed of the queries")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"Serving path queries on {where}")
+        try:
+            asyncio.run(serve(args.maze, args.path_table, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_benchmark(args)
@@ -0,0 +1,170 @@
+# File: path_table.py
+# Description: This file contains the precomputed all-pairs shortest-path table for a static maze.
+# The table holds the BFS distance and next move between every pair of open cells. It is saved to a
+# versioned binary file keyed by a hash of the wall layout and memory-mapped when loaded, so every
+# simulator worker shares the same pages instead of holding its own copy.
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+from maze import DIRECTIONS
+
+MAGIC = b"PBAPSP"
+VERSION = 1
+HEADER = struct.Struct("<6sHcxIII32s")  # magic, version, byte order, rows, cols, open cells, layout hash
+DATA_OFFSET = 64  # arrays start on an aligned offset after the header
+UNREACHABLE = 0xFFFF  # distance of a pair with no path
+NO_MOVE = 0xFF  # next move of a pair with no path, or of a cell to itself
+MAX_TABLE_CELLS = 10000  # ~300 MB of table, larger mazes should not use a table
+DEFAULT_CACHE_DIR = ".pacbot_cache"
+
+
+def layout_hash(maze): # Hash of the maze size and wall layout
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<II", maze.rows, maze.cols))
+    digest.update(bytes(maze.passable))
+    return digest.digest()
+
+
+def table_file(maze, cache_dir=DEFAULT_CACHE_DIR): # File name of the table for a maze layout
+    return os.path.join(cache_dir, f"apsp-v{VERSION}-{layout_hash(maze).hex()[:16]}.bin")
+
+
+def build_path_table(maze, path): # Compute the table for a maze and write it to path
+    cells = maze.open_cells
+    count = len(cells)
+    if count > MAX_TABLE_CELLS:
+        raise ValueError(f"maze has {count} open cells, the table supports at most {MAX_TABLE_CELLS}")
+    ordinal = {index: i for i, index in enumerate(cells)}  # flat cell index -> row of the table
+
+    # Distances: one BFS from every open cell
+    dist = array("H", [UNREACHABLE]) * (count * count)
+    for source, start in enumerate(cells):
+        base = source * count
+        dist[base + source] = 0
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            current, steps = queue.popleft()
+            for neighbor in maze.neighbors[current]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    dist[base + ordinal[neighbor]] = steps + 1
+                    queue.append((neighbor, steps + 1))
+
+    # Next moves: bfs returns the shortest path whose moves come first in DIRECTIONS order, so its
+    # first move is the first direction whose neighbor is one step closer to the goal.
+    moves = array("B", [NO_MOVE]) * (count * count)
+    for source, start in enumerate(cells):
+        base = source * count
+        row, col = divmod(start, maze.cols)
+        neighbor_rows = []
+        for direction, d in enumerate(DIRECTIONS):
+            n_row, n_col = row + d[0], col + d[1]
+            if maze.is_open(n_row, n_col):
+                n_base = ordinal[n_row * maze.cols + n_col] * count
+                neighbor_rows.append((direction, n_base))
+        for goal in range(count):
+            steps = dist[base + goal]
+            if steps == UNREACHABLE or steps == 0:
+                continue
+            for direction, n_base in neighbor_rows:
+                if dist[n_base + goal] == steps - 1:
+                    moves[base + goal] = direction
+                    break
+
+    header = HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(), maze.rows, maze.cols, count, layout_hash(maze))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f: # write to a temporary file first, so readers never see half a table
+        f.write(header.ljust(DATA_OFFSET, b"\0"))
+        dist.tofile(f)
+        moves.tofile(f)
+    os.replace(temp_path, path)
+
+
+class PathTable: # Read-only, memory-mapped view of a table file
+    def __init__(self, maze, path):
+        self.maze = maze
+        self.file = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = self._dist = self._moves = None
+
+        magic, version, byteorder, rows, cols, count, digest = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or byteorder != sys.byteorder[0].encode():
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} path table for this machine")
+        if (rows, cols, count) != (maze.rows, maze.cols, len(maze.open_cells)) or digest != layout_hash(maze):
+            self.close()
+            raise ValueError(f"{path} was built for a different maze layout")
+
+        self.count = count
+        self._view = memoryview(self._mmap)
+        self._dist = self._view[DATA_OFFSET:DATA_OFFSET + 2 * count * count].cast("H")
+        self._moves = self._view[DATA_OFFSET + 2 * count * count:DATA_OFFSET + 3 * count * count]
+        self._ordinal = array("i", [-1]) * (maze.rows * maze.cols)  # flat cell index -> table row
+        for i, index in enumerate(maze.open_cells):
+            self._ordinal[index] = i
+        # Flat index offset of each move in DIRECTIONS order
+        self._offsets = [d[0] * maze.cols + d[1] for d in DIRECTIONS]
+
+    def close(self): # Release the mapping
+        for view in (self._dist, self._moves, self._view):
+            if view is not None:
+                view.release()
+        self._dist = self._moves = self._view = None
+        self._mmap.close()
+
+    def distance(self, start_index, goal_index): # Steps from start to goal, None when there is no path
+        start, goal = self._ordinal[start_index], self._ordinal[goal_index]
+        if start < 0 or goal < 0:
+            return None
+        steps = self._dist[start * self.count + goal]
+        return None if steps == UNREACHABLE else steps
+
+    def next_step(self, start_index, goal_index): # First cell of bfs(start, goal), None when bfs returns []
+        goal = self._ordinal[goal_index]
+        if goal < 0 or start_index == goal_index:
+            return None
+        start = self._ordinal[start_index]
+        if start < 0:
+            # start is a wall cell (ghosts spawn in the walls): bfs leaves it through the first
+            # neighbor in DIRECTIONS order that is closest to the goal
+            step = best = None
+            for neighbor in self.maze.neighbors[start_index]:
+                steps = self._dist[self._ordinal[neighbor] * self.count + goal]
+                if steps != UNREACHABLE and (best is None or steps < best):
+                    step, best = neighbor, steps
+            return step
+        move = self._moves[start * self.count + goal]
+        return None if move == NO_MOVE else start_index + self._offsets[move]
+
+    def path(self, start_index, goal_index): # Cell indices of bfs(start, goal), without start
+        path = []
+        current = start_index
+        while True:
+            current = self.next_step(current, goal_index)
+            if current is None:
+                return path
+            path.append(current)
+
+
+def load_path_table(maze, cache_dir=DEFAULT_CACHE_DIR, build=True): # Map the table for a maze, building it if needed
+    path = table_file(maze, cache_dir)
+    if not os.path.exists(path):
+        if not build:
+            return None
+        build_path_table(maze, path)
+    try:
+        return PathTable(maze, path)
+    except ValueError:
+        if not build:
+            return None
+        build_path_table(maze, path)  # stale or foreign file under the same name, rebuild it
+        return PathTable(maze, path)
@@ -0,0 +1,127 @@
+# File: planner.py
+# Description: This file contains the incremental A* planner (D* Lite) used by Pac-Bot.
+# a_star_search plans from scratch every frame although only the costs near moved ghosts change.
+# The planner searches backward from the goal and keeps its g/rhs values between ticks: when Pac-Bot
+# moves it only shifts the heuristic (km), and when cell costs change it repairs the affected part of
+# the search. It replans from scratch only when the goal (the target food) changes. Given several goals
+# (every pellet, see game.use_nearest_food) it plans toward the cheapest of them in the same search.
+# Edge costs are the same as a_star_search: moving into a cell costs 1 + its additional cost.
+import heapq
+
+INFINITY = float("inf")
+
+
+class DStarLitePlanner: # Persistent D* Lite planner for one agent on a maze
+    def __init__(self, maze, cost_grid):
+        self.maze = maze
+        self.cost_grid = cost_grid  # additional cost by flat cell index, shared with the cost field
+        self.expansions = 0  # nodes expanded since the planner was created
+        self.replans = 0  # number of from-scratch plans
+        self.goals = None
+        self.reset()
+
+    def reset(self): # Forget the search state, the next call plans from scratch
+        self.g = {}
+        self.rhs = {}
+        self.queue = []  # heap of (key1, key2, cell), stale entries are skipped
+        self.queued = {}  # cell -> its current key in the heap
+        self.km = 0
+        self.last_start = None
+        self.goals = None  # frozenset of the goal cells the search state belongs to
+
+    def _heuristic(self, a, b): # Manhattan distance between two flat cell indices
+        cols = self.maze.cols
+        return abs(a // cols - b // cols) + abs(a % cols - b % cols)
+
+    def _key(self, cell, start):
+        best = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (best + self._heuristic(start, cell) + self.km, best)
+
+    def _update_vertex(self, cell, start):
+        if cell not in self.goals: # rhs is the cheapest way out of cell through one of its neighbors
+            g, cost_grid = self.g, self.cost_grid
+            best = INFINITY
+            for neighbor in self.maze.neighbors[cell]:
+                cost = 1 + cost_grid[neighbor] + g.get(neighbor, INFINITY)
+                if cost < best:
+                    best = cost
+            self.rhs[cell] = best
+        if self.g.get(cell, INFINITY) != self.rhs.get(cell, INFINITY):
+            key = self._key(cell, start)
+            self.queued[cell] = key
+            heapq.heappush(self.queue, (key[0], key[1], cell))
+        else:
+            self.queued.pop(cell, None)
+
+    def _top(self): # Smallest live entry of the heap, dropping stale ones
+        queue, queued = self.queue, self.queued
+        while queue:
+            key1, key2, cell = queue[0]
+            if queued.get(cell) == (key1, key2):
+                return (key1, key2), cell
+            heapq.heappop(queue)
+        return (INFINITY, INFINITY), None
+
+    def _compute_shortest_path(self, start):
+        g, rhs, neighbors = self.g, self.rhs, self.maze.neighbors
+        while True:
+            top_key, cell = self._top()
+            if cell is None:
+                return
+            if top_key >= self._key(start, start) and rhs.get(start, INFINITY) <= g.get(start, INFINITY):
+                return
+            self.expansions += 1
+            new_key = self._key(cell, start)
+            if top_key < new_key: # key went up since it was queued, requeue it
+                self.queued[cell] = new_key
+                heapq.heappush(self.queue, (new_key[0], new_key[1], cell))
+            elif g.get(cell, INFINITY) > rhs[cell]: # overconsistent: settle it
+                g[cell] = rhs[cell]
+                del self.queued[cell]
+                for neighbor in neighbors[cell]:
+                    self._update_vertex(neighbor, start)
+            else: # underconsistent: reset it and let its neighbors find another way
+                g[cell] = INFINITY
+                self._update_vertex(cell, start)
+                for neighbor in neighbors[cell]:
+                    self._update_vertex(neighbor, start)
+
+    def next_step(self, start, goal, changed_cells=(), goals=None): # Next [row, col] toward goal, None when there is no path
+        # changed_cells: flat indices of cells whose additional cost changed since the last call
+        # goals: [row, col] list that replaces goal, the step then leads toward the cheapest of them
+        cols = self.maze.cols
+        start_index = start[0] * cols + start[1]
+        if goals is None:
+            goals = [goal]
+        goal_cells = frozenset(cell[0] * cols + cell[1] for cell in goals)
+        if start_index in goal_cells:
+            return None
+
+        if goal_cells != self.goals: # new target food: plan from scratch
+            self.reset()
+            self.replans += 1
+            self.goals = goal_cells
+            self.last_start = start_index
+            for goal_index in goal_cells:
+                self.rhs[goal_index] = 0
+                self.queued[goal_index] = (self._heuristic(start_index, goal_index), 0)
+                heapq.heappush(self.queue, (self.queued[goal_index][0], 0, goal_index))
+        else:
+            self.km += self._heuristic(self.last_start, start_index)
+            self.last_start = start_index
+            neighbors = self.maze.neighbors
+            for cell in changed_cells: # the cost of moving into cell changed for each of its neighbors
+                for neighbor in neighbors[cell]:
+                    self._update_vertex(neighbor, start_index)
+
+        self._compute_shortest_path(start_index)
+
+        # Move to the neighbor with the cheapest cost-to-goal, first in DIRECTIONS order on ties
+        step, best = None, INFINITY
+        for neighbor in self.maze.neighbors[start_index]:
+            cost = 1 + self.cost_grid[neighbor] + self.g.get(neighbor, INFINITY)
+            if cost < best:
+                step, best = neighbor, cost
+        if step is None:
+            return None
+        return [step // cols, step % cols]
@@ -0,0 +1,146 @@
+# File: replay.py
+# Description: This file contains the binary replay log of simulated Pac-Bot games.
+# A replay holds the cells of Pac-Bot and the ghosts after every tick and the food spawn events, which is
+# all a viewer needs to play the game back without running a search. Food is eaten when Pac-Bot's cell
+# matches a pellet, so eating needs no event of its own.
+# A log is an append-only data file of game records plus an index file (the data path + ".idx") of
+# fixed-width entries (Pac-Bot AI, Ghost AI, seed, offset, length), the same key as a results row.
+# Only one process appends to a log: the simulator workers send their records to the main process.
+# Record layout, little-endian:
+#     header       RECORD (see below) and the first 8 bytes of path_table.layout_hash of the maze
+#     food events  event count (u32), then per event: tick (u32), pellet count (u16), pellet cells
+#     frames       (ticks + 1) frames of (1 + ghost count) cells: Pac-Bot then the ghosts, frame 0 is the start
+# Cells are flat indices (row * cols + col) of 2 bytes, or of 4 bytes on mazes of more than 65535 cells.
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from path_table import layout_hash
+
+MAGIC = b"PBRP"
+VERSION = 1
+RECORD = struct.Struct("<4sHBBqIIIBB8s")  # magic, version, pac, ghost, seed, ticks, rows, cols, ghosts, cell size, layout
+EVENT = struct.Struct("<IH")  # tick, pellet count
+INDEX_ENTRY = struct.Struct("<BBqQI")  # pac, ghost, seed, record offset, record length
+CELL_CODES = {2: "H", 4: "I"}  # cell size in bytes -> array type code
+
+_layout_keys = weakref.WeakKeyDictionary()  # maze -> first 8 bytes of its layout hash
+
+
+def layout_key(maze): # Short layout hash stored with each record, computed once per maze
+    key = _layout_keys.get(maze)
+    if key is None:
+        key = _layout_keys[maze] = layout_hash(maze)[:8]
+    return key
+
+
+def index_path(path): # Path of the index file of a log
+    return path + ".idx"
+
+
+class ReplayRecorder: # Collects the frames and food events of one game and packs them into a record
+    def __init__(self, maze, pac_algo_index, ghost_level, seed):
+        self.maze = maze
+        self.pac_algo_index = pac_algo_index
+        self.ghost_level = ghost_level
+        self.seed = seed
+        self.cell_size = 2 if maze.rows * maze.cols <= 0xFFFF else 4
+        self.frames = array(CELL_CODES[self.cell_size])
+        self.events = []  # (tick, pellet cells)
+        self.ghost_count = None
+
+    def frame(self, pacman_cell, ghost_cells): # Add the cells after a tick, the first call is the start
+        if self.ghost_count is None:
+            self.ghost_count = len(ghost_cells)
+        self.frames.append(pacman_cell)
+        for cell in ghost_cells:
+            self.frames.append(cell)
+
+    def food(self, tick, food): # Add a food spawn of [row, col] pellets at a tick
+        cols = self.maze.cols
+        self.events.append((tick, [row * cols + col for row, col in food]))
+
+    def to_bytes(self): # The game record
+        ghost_count = self.ghost_count or 0
+        ticks = len(self.frames) // (1 + ghost_count) - 1
+        parts = [RECORD.pack(
+            MAGIC, VERSION, self.pac_algo_index, self.ghost_level, self.seed, ticks,
+            self.maze.rows, self.maze.cols, ghost_count, self.cell_size, layout_key(self.maze)
+        )]
+        parts.append(struct.pack("<I", len(self.events)))
+        code = CELL_CODES[self.cell_size]
+        for tick, cells in self.events:
+            parts.append(EVENT.pack(tick, len(cells)))
+            parts.append(struct.pack(f"<{len(cells)}{code}", *cells))
+        frames = self.frames
+        if sys.byteorder == "big":
+            frames = array(code, frames)
+            frames.byteswap()
+        parts.append(frames.tobytes())
+        return b"".join(parts)
+
+
+def append_record(path, record): # Append a game record and its index entry, keyed by the record's header, to a log
+    pac_algo_index, ghost_level, seed = RECORD.unpack_from(record)[2:5]
+    with open(path, "ab") as data:
+        offset = data.seek(0, os.SEEK_END)
+        data.write(record)
+    # the index entry is written after the record, so an interrupted append never indexes missing data
+    with open(index_path(path), "ab") as index:
+        index.write(INDEX_ENTRY.pack(pac_algo_index, ghost_level, seed, offset, len(record)))
+
+
+def read_index(path): # {(pac, ghost, seed): (offset, length)} of a log, later records win
+    entries = {}
+    if not os.path.exists(index_path(path)):
+        return entries
+    data_size = os.path.getsize(path)
+    with open(index_path(path), "rb") as f:
+        raw = f.read()
+    for start in range(0, len(raw) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+        pac, ghost, seed, offset, length = INDEX_ENTRY.unpack_from(raw, start)
+        if offset + length <= data_size:
+            entries[(pac, ghost, seed)] = (offset, length)
+    return entries
+
+
+class Replay: # One recorded game, read in place from the memory-mapped log
+    def __init__(self, path, offset, length):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._data)[offset:offset + length]
+        (magic, version, self.pac_algo_index, self.ghost_level, self.seed, self.ticks, self.rows, self.cols,
+         self.ghost_count, cell_size, self.layout) = RECORD.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} has no version {VERSION} replay at offset {offset}")
+        position = RECORD.size
+        (event_count,) = struct.unpack_from("<I", view, position)
+        position += 4
+        self.food_events = {}  # tick -> pellet cells spawned at the end of that tick
+        for _ in range(event_count):
+            tick, count = EVENT.unpack_from(view, position)
+            position += EVENT.size
+            self.food_events[tick] = list(struct.unpack_from(f"<{count}{CELL_CODES[cell_size]}", view, position))
+            position += count * cell_size
+        self.frame_struct = struct.Struct("<" + CELL_CODES[cell_size] * (1 + self.ghost_count))
+        self._frames = view[position:]
+        if len(self._frames) != (self.ticks + 1) * self.frame_struct.size:
+            raise ValueError(f"{path} has a truncated replay at offset {offset}")
+
+    def frame(self, tick): # (Pac-Bot cell, ghost cells) after a tick, tick 0 is the start
+        cells = self.frame_struct.unpack_from(self._frames, tick * self.frame_struct.size)
+        return cells[0], cells[1:]
+
+    def frames(self): # Iterate over the frames, streamed from the mapping one at a time
+        for tick in range(self.ticks + 1):
+            yield self.frame(tick)
+
+
+def open_replay(path, pac_algo_index=None, ghost_level=None, seed=None): # Replay of the first indexed game that matches
+    for (pac, ghost, game_seed), (offset, length) in read_index(path).items():
+        if pac_algo_index not in (None, pac) or ghost_level not in (None, ghost) or seed not in (None, game_seed):
+            continue
+        return Replay(path, offset, length)
+    raise KeyError(f"no replay of Pac-Bot AI {pac_algo_index}, Ghost AI {ghost_level}, seed {seed} in {path}")
@@ -0,0 +1,338 @@
+# File: result_columns.py
+# Description: This file contains the columnar binary results format of the simulator and its running
+# per-matchup statistics.
+# A results directory (any path ending in .cols) holds one file per column of simulations.RESULT_FIELDS,
+# each a plain array of fixed-width little-endian values: counters are int64 (-1 when missing), measures
+# are float64 (NaN when missing) and the text columns are uint16 codes into a dictionary kept in
+# schema.json. Rows are appended to every column file at once, so a sweep can stream into it and
+# resume it, and a reader memory-maps the columns without parsing anything.
+# summary.json holds running statistics of the main metrics per matchup: count, mean and variance
+# (Welford's method), min, max and a log-linear histogram for percentiles (within 1% of the exact
+# value). It is updated with every flush, so the summary is available at any time without reading
+# the rows. It also saves the number of rows it covers; a sweep interrupted between appending rows and
+# saving the summary is resumed by rebuilding the summary from the rows. `python3 result_columns.py summary DIR` prints it and `export DIR FILE` writes a CSV.
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+
+COLUMNAR_SUFFIX = ".cols"  # results paths with this suffix are written in the columnar format
+SCHEMA_FILE = "schema.json"
+SUMMARY_FILE = "summary.json"
+VERSION = 1
+CATEGORY_FIELDS = {"Pac-Bot AI", "Ghost AI", "Memory Backend", "Maze", "Food Target"}
+FLOAT_SUFFIXES = ("(ms)", "Mean Path Length", "per Food", "Max Bound")  # measures, every other column is a counter
+TYPE_CODES = {"category": "H", "int": "q", "float": "d"}
+MISSING_INT = -1
+SUMMARY_METRICS = [ # metrics with running statistics per matchup
+    "Steps Taken", "Food Eaten", "Time Survived", "Wall Time (ms)", "Pac-Bot Nodes Expanded", "Pac-Bot Search Time (ms)",
+]
+PERCENTILES = [0.5, 0.9, 0.99]
+HISTOGRAM_SCALE = 1000  # measures are binned in thousandths
+EXACT_BINS = 128  # values below this are binned exactly, larger ones keep 7 significant bits
+
+
+class ResumeMismatch(ValueError): # A results file to resume holds other columns than the rows to append
+    pass
+
+
+def is_columnar(path): # True when a results path is a columnar results directory
+    return path.rstrip("/\\").endswith(COLUMNAR_SUFFIX)
+
+
+def column_type(field): # "category", "int" or "float"
+    if field in CATEGORY_FIELDS:
+        return "category"
+    if field.endswith(FLOAT_SUFFIXES):
+        return "float"
+    return "int"
+
+
+def column_file(index): # File name of a column
+    return f"col-{index:02d}.bin"
+
+
+def _bin(value): # Log-linear histogram bin of a non-negative integer
+    if value < EXACT_BINS:
+        return value
+    shift = value.bit_length() - 7
+    return (shift << 7) | (value >> shift)
+
+
+def _bin_floor(key): # Smallest value of a histogram bin
+    if key < EXACT_BINS:
+        return key
+    shift, top = key >> 7, key & 0x7F
+    return top << shift
+
+
+class RunningStats: # Count, mean, variance, min, max and percentiles of a stream of values
+    def __init__(self, scale=1):
+        self.scale = scale  # values are multiplied by scale before they are binned
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.low = None
+        self.high = None
+        self.bins = {}  # histogram bin -> count
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.low = value if self.low is None or value < self.low else self.low
+        self.high = value if self.high is None or value > self.high else self.high
+        key = _bin(max(0, int(value * self.scale)))
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def variance(self): # Sample variance
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def percentile(self, fraction): # Nearest-rank percentile, as the lower edge of its histogram bin
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen >= rank:
+                return _bin_floor(key) / self.scale
+        return self.high
+
+    def to_dict(self):
+        return {
+            "scale": self.scale, "count": self.count, "mean": self.mean, "m2": self.m2, "low": self.low,
+            "high": self.high, "bins": {str(key): count for key, count in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data["scale"])
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        stats.low, stats.high = data["low"], data["high"]
+        stats.bins = {int(key): count for key, count in data["bins"].items()}
+        return stats
+
+
+class ResultSummary: # Running statistics of SUMMARY_METRICS per matchup
+    def __init__(self):
+        self.matchups = {}  # "Pac-Bot AI vs Ghost AI" -> {metric: RunningStats}
+
+    def add(self, row):
+        matchup = f"{row['Pac-Bot AI']} vs {row['Ghost AI']}"
+        stats = self.matchups.get(matchup)
+        if stats is None:
+            stats = self.matchups[matchup] = {
+                metric: RunningStats(HISTOGRAM_SCALE if column_type(metric) == "float" else 1) for metric in SUMMARY_METRICS
+            }
+        for metric in SUMMARY_METRICS:
+            value = row.get(metric)
+            if value not in (None, ""):
+                stats[metric].add(float(value))
+
+    def to_dict(self):
+        return {matchup: {metric: s.to_dict() for metric, s in stats.items()} for matchup, stats in self.matchups.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        for matchup, stats in data.items():
+            summary.matchups[matchup] = {metric: RunningStats.from_dict(s) for metric, s in stats.items()}
+        return summary
+
+    def table(self): # Lines of the summary table
+        lines = [f"{'Matchup':<14}{'Metric':<26}{'Games':>7}{'Mean':>12}{'Std':>12}{'p50':>12}{'p90':>12}{'p99':>12}"]
+        for matchup in sorted(self.matchups):
+            for metric, stats in self.matchups[matchup].items():
+                if not stats.count:
+                    continue
+                p50, p90, p99 = (stats.percentile(p) for p in PERCENTILES)
+                lines.append(
+                    f"{matchup:<14}{metric:<26}{stats.count:>7}{stats.mean:>12.2f}{math.sqrt(stats.variance()):>12.2f}"
+                    f"{p50:>12.2f}{p90:>12.2f}{p99:>12.2f}"
+                )
+        return lines
+
+
+def _write_json(path, data): # Replace a JSON file, so readers never see half of it
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+class ColumnWriter: # Appends result rows to a columnar results directory
+    def __init__(self, path, fields, resume=True):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.fields = list(fields)
+        self.types = [column_type(field) for field in self.fields]
+        self.categories = {field: [] for field in self.fields if field in CATEGORY_FIELDS}  # code -> text
+        self.summary = ResultSummary()
+        schema_path = os.path.join(path, SCHEMA_FILE)
+        if resume and os.path.exists(schema_path):
+            with open(schema_path) as f:
+                schema = json.load(f)
+            if schema["fields"] != self.fields:
+                raise ResumeMismatch(f"{path} holds other columns, write to a new directory or pass resume=False")
+            self.categories = schema["categories"]
+            self.rows = column_rows(path, self.fields, self.types)
+            for index, kind in enumerate(self.types): # drop a partly appended last row
+                with open(os.path.join(path, column_file(index)), "r+b") as f:
+                    f.truncate(self.rows * array(TYPE_CODES[kind]).itemsize)
+            summary_rows, self.summary = load_summary(path)
+            if summary_rows != self.rows: # rows appended but not summarized: count them again
+                self.summary = ResultSummary()
+                for row in ColumnReader(path).iter_rows():
+                    self.summary.add(row)
+        else:
+            self.rows = 0
+            for index in range(len(self.fields)):
+                open(os.path.join(path, column_file(index)), "wb").close()
+        self.codes = {field: {text: code for code, text in enumerate(texts)} for field, texts in self.categories.items()}
+        self.buffers = [array(TYPE_CODES[kind]) for kind in self.types]
+        self._save_schema()
+
+    def _save_schema(self):
+        _write_json(os.path.join(self.path, SCHEMA_FILE), {
+            "version": VERSION, "fields": self.fields, "types": self.types, "categories": self.categories,
+        })
+
+    def writerow(self, row): # Buffer one result row (a dict of simulations.RESULT_FIELDS)
+        schema_changed = False
+        for field, kind, buffer in zip(self.fields, self.types, self.buffers):
+            value = row.get(field)
+            if kind == "category":
+                text = "" if value is None else str(value)
+                code = self.codes[field].get(text)
+                if code is None:
+                    code = self.codes[field][text] = len(self.categories[field])
+                    self.categories[field].append(text)
+                    schema_changed = True
+                buffer.append(code)
+            elif kind == "int":
+                buffer.append(MISSING_INT if value in (None, "") else int(value))
+            else:
+                buffer.append(math.nan if value in (None, "") else float(value))
+        self.summary.add(row)
+        if schema_changed:
+            self._save_schema()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self): # Append the buffered rows to the column files and save the summary
+        self.rows += len(self.buffers[0])
+        for index, buffer in enumerate(self.buffers):
+            if sys.byteorder == "big":
+                buffer.byteswap()
+            with open(os.path.join(self.path, column_file(index)), "ab") as f:
+                f.write(buffer.tobytes())
+            del buffer[:]
+        _write_json(os.path.join(self.path, SUMMARY_FILE), {"rows": self.rows, "matchups": self.summary.to_dict()})
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_summary(path): # (rows covered, ResultSummary) saved in a results directory, rows is None when unknown
+    summary_path = os.path.join(path, SUMMARY_FILE)
+    if not os.path.exists(summary_path):
+        return None, ResultSummary()
+    with open(summary_path) as f:
+        data = json.load(f)
+    return data["rows"], ResultSummary.from_dict(data["matchups"])
+
+
+def column_rows(path, fields, types): # Rows fully written to a results directory: the length of its shortest column
+    rows = None
+    for index, kind in enumerate(types):
+        column_path = os.path.join(path, column_file(index))
+        count = os.path.getsize(column_path) // array(TYPE_CODES[kind]).itemsize if os.path.exists(column_path) else 0
+        rows = count if rows is None else min(rows, count)
+    return rows or 0
+
+
+class ColumnReader: # Memory-mapped view of a results directory
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        self.fields, self.types, self.categories = schema["fields"], schema["types"], schema["categories"]
+        self.rows = column_rows(path, self.fields, self.types)
+        self._maps = {}
+
+    def column(self, field): # Raw values of a column: a memoryview of ints or floats, category codes for text
+        index = self.fields.index(field)
+        code = TYPE_CODES[self.types[index]]
+        if not self.rows:
+            return array(code)
+        if field not in self._maps:
+            with open(os.path.join(self.path, column_file(index)), "rb") as f:
+                self._maps[field] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        values = memoryview(self._maps[field])[:self.rows * array(code).itemsize].cast(code)
+        if sys.byteorder == "big":
+            values = array(code, values)
+            values.byteswap()
+        return values
+
+    def values(self, field): # Decoded values of a column: text for categories, None for missing numbers
+        raw = self.column(field)
+        kind = self.types[self.fields.index(field)]
+        if kind == "category":
+            texts = self.categories[field]
+            return [texts[code] for code in raw]
+        if kind == "int":
+            return [None if value == MISSING_INT else value for value in raw]
+        return [None if math.isnan(value) else value for value in raw]
+
+    def iter_rows(self): # Result rows as dicts, like csv.DictReader on the CSV export
+        columns = [self.values(field) for field in self.fields]
+        for row in range(self.rows):
+            yield {field: column[row] for field, column in zip(self.fields, columns)}
+
+    def finished_games(self): # (Pac-Bot AI, Ghost AI, Seed) of every row
+        if not self.rows:
+            return set()
+        return set(zip(self.values("Pac-Bot AI"), self.values("Ghost AI"), self.values("Seed")))
+
+    def summary(self): # The running ResultSummary saved with the rows
+        return load_summary(self.path)[1]
+
+
+def export_csv(path, csv_path): # Write a results directory as a CSV file with the same columns
+    reader = ColumnReader(path)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=reader.fields)
+        writer.writeheader()
+        for row in reader.iter_rows():
+            writer.writerow({field: "" if value is None else value for field, value in row.items()})
+    return reader.rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or export a columnar results directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="print the running statistics per matchup")
+    summary.add_argument("path")
+    export = commands.add_parser("export", help="write the rows as a CSV file")
+    export.add_argument("path")
+    export.add_argument("csv_path")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print("\n".join(ColumnReader(args.path).summary().table()))
+    else:
+        print(f"Exported {export_csv(args.path, args.csv_path)} rows to {args.csv_path}")
@@ -0,0 +1,214 @@
+# File: result_store.py
+# Description: This file contains the on-disk store of simulated game results, so a sweep only replays
+# the games whose outcome can have changed since they were last played.
+# A result is keyed by (configuration, seed). The configuration key is a hash of everything that decides
+# the outcome of a matchup: the maze layout, the source code of the functions the two agents and the game
+# step run and of the maze modules, the game constants (ghost move delay, game length, food count) and the
+# simulator options.
+# Editing one search function therefore only invalidates the matchups that call it.
+# The store is a SQLite file written by the sweep's main process only. It is bounded in size: once it
+# holds more than max_bytes of results, the least recently used ones are evicted. Configurations whose
+# sources or constants no longer match the code are stale; `python3 result_store.py list` shows them and
+# `python3 result_store.py prune` deletes them.
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+from maze import PRESETS
+from path_table import DEFAULT_CACHE_DIR
+
+DEFAULT_STORE = os.path.join(DEFAULT_CACHE_DIR, "results.sqlite")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # results kept before the least recently used are evicted
+
+# Sources that decide a matchup, as "module.function" names (a bare module name stands for the whole module)
+PAC_SOURCES = { # by Pac-Bot algorithm index
+    0: ["game.a_star_search", "game.a_star_search_nearest"],
+    1: ["game.bfs", "game.bfs_nearest"],
+    2: ["game.dfs"],
+    3: ["jps", "game.jps_search"],
+    255: ["game_state.RolloutPolicy"],  # game.ROLLOUT_PAC_INDEX, the rollout policy (see OPTION_SOURCES)
+}
+GHOST_SOURCES = { # by ghost level
+    0: ["game.dfs", "game.move_enemy_with_dfs"],
+    1: ["game.bfs_distance_field", "game.bfs_step_from_field", "game.field_targets"],
+    2: [
+        "game.a_star_search", "game.move_enemy_with_a_star", "game.cost_distance_field", "game.a_star_steps_from_field",
+        "game.field_targets",
+    ],
+    3: ["jps", "game.jps_search", "game.move_enemy_with_jps"],
+}
+SHARED_SOURCES = [ # the game step every matchup runs
+    "game.build_path", "game.generate_food", "game.update_costs_based_on_ghosts_and_food", "game.search_with_algorithm",
+    "game.pacman_next_step", "game.pacman_path", "game.move_enemies", "game.check_collision_with_enemies",
+    "game.collect_food", "game.reset_game", "game.step_game", "cost_field", "simulations.run_game",
+    "maze",  # neighbor order breaks search ties, and the presets are generated by it
+]
+MAP_FILE_SOURCES = ["maze_io"]  # readers of the maze when the games are played on a map file
+OPTION_SOURCES = { # extra sources of the simulator options that change moves
+    "incremental": ["planner"],
+    "cache": ["path_cache", "game.cached_step"],
+    "use_table": ["path_table"],
+    "rollouts": ["game_state", "batch_engine.DistanceFields"],
+    "anytime": ["game.anytime_a_star_search", "game.a_star_within_budget"],
+    "batch": ["batch_engine"],
+}
+CONSTANTS = ["GHOST_MOVE_DELAY", "game_duration", "FPS", "FOOD_COUNT", "EXACT_A_STAR_TIES"]  # game constants in the key
+
+
+def source_digest(name): # Short hash of the source of a "module.function" or of a whole module
+    module_name, _, function_name = name.partition(".")
+    target = importlib.import_module(module_name)
+    if function_name:
+        target = getattr(target, function_name)
+    return hashlib.sha256(inspect.getsource(target).encode()).hexdigest()[:16]
+
+
+def current_constants(): # Values of the game constants that are part of the key
+    game = importlib.import_module("game")
+    return {name: getattr(game, name) for name in CONSTANTS}
+
+
+def describe(pac_algo_index, ghost_level, layout, options): # Description of a matchup configuration
+    # layout is the hex layout hash of the maze, options the simulator options that change the results
+    names = set(PAC_SOURCES[pac_algo_index] + GHOST_SOURCES[ghost_level] + SHARED_SOURCES)
+    for option, option_names in OPTION_SOURCES.items():
+        if options.get(option):
+            names.update(option_names)
+    if options.get("maze", "classic") not in PRESETS:
+        names.update(MAP_FILE_SOURCES)
+    return {
+        "pac": pac_algo_index,
+        "ghost": ghost_level,
+        "layout": layout,
+        "options": options,
+        "constants": current_constants(),
+        "sources": {name: source_digest(name) for name in sorted(names)},
+    }
+
+
+def config_key(description): # Configuration key: hash of a description
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def is_stale(description): # True when the code or constants of a description changed since it was stored
+    if description["constants"] != current_constants():
+        return True
+    for name, digest in description["sources"].items():
+        try:
+            if source_digest(name) != digest:
+                return True
+        except (ImportError, AttributeError, OSError, TypeError):  # the function or module is gone
+            return True
+    return False
+
+
+class ResultStore: # SQLite store of result rows by (configuration key, seed)
+    def __init__(self, path=DEFAULT_STORE, max_bytes=DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS configs (config TEXT PRIMARY KEY, description TEXT, created REAL);
+            CREATE TABLE IF NOT EXISTS results (
+                config TEXT, seed INTEGER, result TEXT, size INTEGER, last_used REAL, PRIMARY KEY (config, seed)
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+        """)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def register(self, description): # Save a configuration description, returns its key
+        key = config_key(description)
+        self.db.execute(
+            "INSERT OR IGNORE INTO configs VALUES (?, ?, ?)", (key, json.dumps(description, sort_keys=True), time.time())
+        )
+        return key
+
+    def get_many(self, key, seeds): # {seed: result row} of the stored results of a configuration
+        found = {}
+        seeds = list(seeds)
+        for start in range(0, len(seeds), 500): # stay below SQLite's limit of query parameters
+            chunk = seeds[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.db.execute(
+                f"SELECT seed, result FROM results WHERE config = ? AND seed IN ({marks})", [key] + chunk
+            ).fetchall()
+            for seed, result in rows:
+                found[seed] = json.loads(result)
+        if found:
+            now = time.time()
+            self.db.executemany(
+                "UPDATE results SET last_used = ? WHERE config = ? AND seed = ?", [(now, key, seed) for seed in found]
+            )
+        return found
+
+    def put(self, key, seed, result): # Store the result row of a game
+        text = json.dumps(result)
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, seed, text, len(text), time.time()))
+
+    def evict(self): # Drop the least recently used results until the store fits in max_bytes, returns the count
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        victims = []
+        for config, seed, size in self.db.execute("SELECT config, seed, size FROM results ORDER BY last_used"):
+            victims.append((config, seed))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self.db.executemany("DELETE FROM results WHERE config = ? AND seed = ?", victims)
+        self.db.execute("DELETE FROM configs WHERE config NOT IN (SELECT DISTINCT config FROM results)")
+        self.db.commit()
+        return len(victims)
+
+    def entries(self): # (key, description, results, bytes, last used, stale) of every configuration
+        listing = []
+        query = """
+            SELECT configs.config, description, COUNT(seed), COALESCE(SUM(size), 0), MAX(last_used)
+            FROM configs LEFT JOIN results ON results.config = configs.config GROUP BY configs.config
+        """
+        for key, description, count, size, last_used in self.db.execute(query).fetchall():
+            description = json.loads(description)
+            listing.append((key, description, count, size, last_used, is_stale(description)))
+        return listing
+
+    def prune(self, everything=False): # Delete the stale configurations (all with everything), returns the results deleted
+        keys = [entry[0] for entry in self.entries() if everything or entry[5]]
+        deleted = 0
+        for key in keys:
+            deleted += self.db.execute("DELETE FROM results WHERE config = ?", (key,)).rowcount
+            self.db.execute("DELETE FROM configs WHERE config = ?", (key,))
+        self.db.commit()
+        return deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or prune the simulator's result store.")
+    parser.add_argument("command", choices=["list", "prune"])
+    parser.add_argument("--store", default=DEFAULT_STORE, help="result store file")
+    parser.add_argument("--all", action="store_true", help="prune every configuration, not only the stale ones")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        raise SystemExit(f"No result store at {args.store}")
+    store = ResultStore(args.store)
+    game = importlib.import_module("game")
+    if args.command == "list":
+        print(f"{'Config':<14}{'Pac-Bot':<9}{'Ghost':<7}{'Results':>9}{'KB':>9}  {'Last used':<20}Status")
+        for key, description, count, size, last_used, stale in store.entries():
+            ghost = game.levels[description["ghost"]].split(" - ")[-1]
+            used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_used)) if last_used else "-"
+            status = "stale" if stale else "current"
+            print(f"{key[:12]:<14}{game.pacbot_name(description['pac']):<9}{ghost:<7}{count:>9}{size / 1024:>9.1f}  {used:<20}{status}")
+    else:
+        print(f"Deleted {store.prune(args.all)} results")
+    store.close()
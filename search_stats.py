@@ -0,0 +1,105 @@
+# File: search_stats.py
+# Description: This file contains the opt-in search instrumentation for the Pac-Bot game.
+# While tracking is on, every search call records the nodes it expanded, its peak frontier size, the
+# length of the path it returned and its time in nanoseconds. Calls are summed per agent and algorithm
+# until reset(). While tracking is off the searches only keep a local node counter and skip all of this.
+# A search hook (see memory_tracker.py) can also be told the frontier and visited cell counts of every call.
+# With the path cache on (see path_cache.py), its hits, misses and evictions are counted per agent as well.
+# With a budget on the anytime search (see game.use_anytime_search), so are the searches that ran out of
+# budget and the largest suboptimality bound of their paths.
+import time
+
+enabled = False  # read by the searches once per call, on while counting or while a search hook is set
+counting = False  # sum the calls into totals
+search_hook = None  # called with (algorithm, peak frontier, visited cells) after every search call
+agent = "Pac-Bot"  # agent the next searches are counted for, set by the movement code
+totals = {}  # (agent, algorithm) -> [calls, nodes expanded, peak frontier, path length, time (ns)]
+calls = None  # list of (agent, algorithm, nodes expanded, peak frontier, path length, time (ns)) when kept
+cache_totals = {}  # agent -> [path cache hits, misses, evictions]
+anytime_totals = {}  # agent -> [anytime searches, budget hits, largest suboptimality bound]
+
+def start_tracking(keep_calls=False):  # Start recording searches, keep_calls also keeps every call
+    global enabled, counting, calls
+    enabled = counting = True
+    calls = [] if keep_calls else None
+    reset()
+
+
+def stop_tracking():  # Stop recording searches
+    global enabled, counting
+    counting = False
+    enabled = search_hook is not None
+
+
+def set_search_hook(hook):  # Call hook(algorithm, peak frontier, visited cells) after every search, None removes it
+    global enabled, search_hook
+    search_hook = hook
+    enabled = counting or hook is not None
+
+
+def reset():  # Forget the recorded searches, for example at the start of a game
+    totals.clear()
+    cache_totals.clear()
+    anytime_totals.clear()
+    if calls is not None:
+        calls.clear()
+
+
+def now():  # Start time of a search call
+    return time.perf_counter_ns()
+
+
+def record(algorithm, expanded, frontier, path_length, start_ns, visited=0):  # Add one search call
+    elapsed = time.perf_counter_ns() - start_ns
+    if search_hook is not None:
+        search_hook(algorithm, frontier, visited)
+    if not counting:
+        return
+    total = totals.get((agent, algorithm))
+    if total is None:
+        totals[(agent, algorithm)] = [1, expanded, frontier, path_length, elapsed]
+    else:
+        total[0] += 1
+        total[1] += expanded
+        if frontier > total[2]:
+            total[2] = frontier
+        total[3] += path_length
+        total[4] += elapsed
+    if calls is not None:
+        calls.append((agent, algorithm, expanded, frontier, path_length, elapsed))
+
+
+def record_cache(hit, evicted=False):  # Count one path cache lookup of the current agent
+    if not counting:
+        return
+    total = cache_totals.get(agent)
+    if total is None:
+        total = cache_totals[agent] = [0, 0, 0]
+    total[0 if hit else 1] += 1
+    if evicted:
+        total[2] += 1
+
+
+def record_anytime(budget_hit, bound):  # Count one anytime search of the current agent, bound None: no full path
+    if not counting:
+        return
+    total = anytime_totals.get(agent)
+    if total is None:
+        total = anytime_totals[agent] = [0, 0, 1.0]
+    total[0] += 1
+    if budget_hit:
+        total[1] += 1
+    if bound is not None and bound > total[2]:
+        total[2] = bound
+
+
+def agent_totals(name):  # [calls, nodes expanded, peak frontier, path length, time (ns)] of an agent, over algorithms
+    result = [0, 0, 0, 0, 0]
+    for (total_agent, _), total in totals.items():
+        if total_agent == name:
+            result[0] += total[0]
+            result[1] += total[1]
+            result[2] = max(result[2], total[2])
+            result[3] += total[3]
+            result[4] += total[4]
+    return result
@@ -0,0 +1,100 @@
+# File: sim_worker.py
+# Description: This file contains the fixed-timestep simulation loop of the interactive game, run off the render thread.
+# run_simulation plays the game of pacbot.py (costs around the moved ghosts, Pac-Bot's move, every ghost's
+# move, collisions, food) one tick every 1 / FPS seconds and puts an immutable Snapshot of each tick on a
+# queue. A SimulationWorker runs it in a thread, or in a process so CPU-bound searches do not compete with
+# the renderer for the GIL; the renderer drains the queue at its own frame rate and interpolates between
+# the last two snapshots. A tick that takes longer than its period delays the next one instead of
+# making the loop catch up in a burst, so the game slows down under load but never skips a tick.
+# The game ends after game_duration seconds of game time (game_duration * FPS ticks).
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+import game
+
+Snapshot = namedtuple("Snapshot", [ # State of the game after a tick, never changed once published
+    "tick",  # ticks played, 0 is the start
+    "pacman",  # (row, col) of Pac-Bot
+    "ghosts",  # (row, col) of every ghost
+    "food",  # (row, col) of every pellet
+    "costs",  # flat cell index -> ghost proximity cost, a copy owned by the snapshot
+    "steps_taken",
+    "food_eaten",
+    "game_over",  # a ghost caught Pac-Bot or the time is up
+    "tick_ms",  # time the simulation spent on this tick
+    "anytime",  # (budget hit, bound) of Pac-Bot's last anytime search, None without one
+])
+STOP_TIMEOUT = 1.0  # seconds stop() waits for the worker to finish its tick
+
+
+def snapshot(tick, food, food_eaten, game_over, tick_ms): # Snapshot of the game core's current state
+    return Snapshot(
+        tick, tuple(game.pacman_pos), tuple(tuple(enemy) for enemy in game.enemies), tuple(tuple(pellet) for pellet in food),
+        dict(game.cost_field.costs), game.steps_taken, food_eaten, game_over, tick_ms, game.last_anytime.get("Pac-Bot"),
+    )
+
+
+def run_simulation(pac_algo_index, ghost_level, seed, anytime_us, snapshots, stop): # Play a game, putting a Snapshot per tick on snapshots
+    # anytime_us turns on game.use_anytime_search with that budget. stop is a threading or multiprocessing
+    # Event: the loop returns at the next tick once it is set.
+    random.seed(seed)
+    if anytime_us:
+        game.use_anytime_search(budget_us=anytime_us)
+    game.reset_game()
+    food = game.generate_food(game.FOOD_COUNT)
+    food_eaten = 0
+    max_ticks = game.game_duration * game.FPS
+    period = 1 / game.FPS
+    snapshots.put(snapshot(0, food, food_eaten, False, 0.0))
+    next_tick = time.perf_counter() + period
+    for tick in range(1, max_ticks + 1):
+        if stop.wait(max(0.0, next_tick - time.perf_counter())):
+            return
+        start = time.perf_counter()
+        game.update_costs_for_moved_ghosts()
+        if food: # Move Pacman towards the first food item
+            game.move_pacman_with_algorithm(food[0], pac_algo_index, food)
+        game.move_enemies(ghost_level)
+        collided = game.check_collision_with_enemies()
+        food_eaten += game.collect_food(food)
+        if not food: # Generate new food if all food is eaten
+            food = game.generate_food(game.FOOD_COUNT)
+        end = time.perf_counter()
+        game_over = collided or tick == max_ticks
+        snapshots.put(snapshot(tick, food, food_eaten, game_over, (end - start) * 1000))
+        if game_over:
+            return
+        next_tick = max(next_tick + period, end)
+
+
+class SimulationWorker: # Runs run_simulation in a thread or a process and hands its snapshots to the renderer
+    def __init__(self, pac_algo_index, ghost_level, seed, anytime_us=None, use_process=False):
+        args = (pac_algo_index, ghost_level, seed, anytime_us)
+        if use_process:
+            self.snapshots = multiprocessing.Queue()
+            self.stop_event = multiprocessing.Event()
+            self.runner = multiprocessing.Process(
+                target=run_simulation, args=args + (self.snapshots, self.stop_event), daemon=True
+            )
+        else:
+            self.snapshots = queue.Queue()
+            self.stop_event = threading.Event()
+            self.runner = threading.Thread(target=run_simulation, args=args + (self.snapshots, self.stop_event), daemon=True)
+
+    def start(self):
+        self.runner.start()
+
+    def poll(self): # Snapshots published since the last call, oldest first, without blocking
+        published = []
+        while True:
+            try:
+                published.append(self.snapshots.get_nowait())
+            except queue.Empty:
+                return published
+
+    def stop(self): # Ask the simulation to stop and wait a moment for it, a search in progress is not interrupted
+        self.stop_event.set()
+        self.runner.join(STOP_TIMEOUT)
@@ -1,135 +1,430 @@
 # File: simulations.py
 # Description: This file contains the simulation logic for the Pac-Bot game.
+# It only uses the headless game core, so it runs without pygame or a video driver.
+import argparse
 import csv
-import pygame
+import multiprocessing
+import os
+import random
+import time
+import batch_engine
 import memory_tracker
-from pacbot import ( 
-    pacman_pos,
+import search_stats
+import game
+import game_state
+import maze_io
+import replay
+import result_columns
+import result_store
+from path_table import layout_hash
+from game import (
     generate_food,
     update_costs_based_on_ghosts_and_food,
-    bfs,
-    dfs,
-    a_star_search,
-    ROWS,
-    COLS,
+    reset_game,
+    step_game,
     algorithm,
     levels,
-    center_row,
-    center_col,
     game_duration,
+    FPS,
+    FOOD_COUNT,
+    GHOST_MOVE_DELAY,
 )
 
-pygame.display.set_mode((1, 1)) # create a dummy display for pygame
+max_ticks = game_duration * FPS # logical length of a game: one tick per frame of the interactive loop
+memory_backend = "rss" # memory_tracker backend of the RAM columns, tracemalloc slows the searches down
+maze_name = "classic" # preset name or map file of the maze the games are played on, see use_maze_spec
+record_replays = False # pool workers return a replay record of every game, see run_sweep
 
-def simulation(pac_algo_index, ghost_algo_index, simulation_runs=50): # Default to 50 runs
-    results = []
+RESULT_FIELDS = [ # Columns of the results file, in order
+    "Pac-Bot AI",
+    "Ghost AI",
+    "Seed",
+    "Steps Taken",
+    "Food Eaten",
+    "Time Survived",
+    "Ticks",
+    "Wall Time (ms)",
+    "RAM (KB)",
+    "Peak RAM (KB)",
+    "Memory Backend",
+    "Maze",
+    "Food Target",
+    "Steps per Food",
+]
+SEARCH_AGENTS = ["Pac-Bot", "Ghosts"] # agents of the search columns, filled in when search tracking is on
+SEARCH_FIELDS = [ # per agent: search calls, total nodes expanded, largest frontier, mean path length, total search time
+    f"{agent} {column}"
+    for agent in SEARCH_AGENTS
+    for column in [
+        "Searches", "Nodes Expanded", "Peak Frontier", "Mean Path Length", "Search Time (ms)",
+        "Path Cache Hits", "Path Cache Misses", "Path Cache Evictions", "Anytime Budget Hits", "Anytime Max Bound",
+    ]
+]
+SEARCH_FIELDS.append("Pac-Bot Nodes per Food") # Pac-Bot nodes expanded per pellet eaten
+RESULT_FIELDS += SEARCH_FIELDS
 
-    for run in range(simulation_runs): # run 50 simulations
-        pacman_pos[:] = [1, 1]
-        steps_taken = 0
-        food_eaten = 0
-        food = generate_food(3)
-        update_costs_based_on_ghosts_and_food(food)
-
-        enemies = [ # Place enemy agents
-            [center_row - 2, center_col],
-            [center_row + 2, center_col],
-            [center_row, center_col - 2],
-            [center_row, center_col + 2],
-        ]
-
-        memory_tracker.start_tracking()
-        start_time = pygame.time.get_ticks()
-        ghost_move_counter = 0
-        ghost_move_delay = 3
-        elapsed_time = 0
-        game_over = False
-
-        while not game_over:
-            # Move Pacman
-            if food:
-                if pac_algo_index == 0:
-                    path = a_star_search(pacman_pos, food[0])
-                elif pac_algo_index == 1:
-                    path = bfs(pacman_pos, food[0])
-                elif pac_algo_index == 2:
-                    path = dfs(pacman_pos, food[0])
-                if path:
-                    pacman_pos[0], pacman_pos[1] = path[0]
-                    steps_taken += 1
-            
-
-            # Move Ghosts
-            ghost_move_counter += 1
-            if ghost_move_counter >= ghost_move_delay:
-                for i, enemy in enumerate(enemies):
-                    if ghost_algo_index == 0:
-                        path = dfs(enemy, pacman_pos)
-                    elif ghost_algo_index == 1:
-                        path = bfs(enemy, pacman_pos)
-                    elif ghost_algo_index == 2:
-                        path = a_star_search(enemy, pacman_pos)
-                    if path:
-                        enemies[i] = path[0]
-                ghost_move_counter = 0
-
-            # Check collision
-            for enemy in enemies:
-                if pacman_pos == enemy:
-                    game_over = True
-
-            # Check food collection
-            for f in food[:]:
-                if pacman_pos == f:
-                    food.remove(f)
-                    food_eaten += 1
-                    update_costs_based_on_ghosts_and_food(food)
-
-            # Respawn food
-            if not food:
-                food = generate_food(3)
-                update_costs_based_on_ghosts_and_food(food)
-
-            # Time check
-            elapsed_time = (pygame.time.get_ticks() - start_time) // 1000
+def run_game(pac_algo_index, ghost_algo_index, seed=None, realtime=False, recorder=None): # Simulate a single game
+    # realtime=False ends the game after max_ticks logical ticks, so it runs as fast as the CPU allows
+    # realtime=True keeps the old behavior of ending the game after game_duration wall-clock seconds
+    # seed makes food spawns and DFS choices reproducible, None draws a new seed, written to the Seed column
+    # recorder is a replay.ReplayRecorder that gets the positions of every tick and the food spawns
+    if seed is None:
+        seed = random.randrange(2**32)
+    random.seed(seed)
+    reset_game() # Place Pacman and the enemy agents
+    food_eaten = 0
+    food = generate_food(FOOD_COUNT)
+    update_costs_based_on_ghosts_and_food(food)
+    search_stats.reset() # count only this game's searches
+    if recorder is not None:
+        record_frame(recorder)
+        recorder.food(0, food)
+
+    memory_tracker.start_tracking(memory_backend)
+    start_time = time.monotonic()
+    wall_start = time.perf_counter() # wall-clock cost of the game, reported as a metric only
+    ticks = 0
+    ghost_move_counter = 0
+    elapsed_time = 0
+    game_over = False
+
+    while not game_over:
+        ghost_move_counter += 1
+        ghosts_move = ghost_move_counter >= GHOST_MOVE_DELAY
+        if ghosts_move:
+            ghost_move_counter = 0
+
+        # Move Pacman and the ghosts, then check collisions and food collection
+        tick_food = food
+        food, eaten, collided = step_game(food, pac_algo_index, ghost_algo_index, ghosts_move)
+        food_eaten += eaten
+        if collided:
+            game_over = True
+        memory_tracker.sample()
+
+        # Time check
+        ticks += 1
+        if recorder is not None:
+            record_frame(recorder)
+            if food is not tick_food: # step_game respawned the food
+                recorder.food(ticks, food)
+        if realtime:
+            elapsed_time = int(time.monotonic() - start_time)
             if elapsed_time >= game_duration:
                 game_over = True
-        
-        current_memory, peak_memory = memory_tracker.get_memory_usage()
-        memory_tracker.stop_tracking()
-
-        results.append( # Store results
-            {
-                "Pac-Bot AI": algorithm[pac_algo_index],
-                "Ghost AI": levels[ghost_algo_index].split(" - ")[-1],
-                "Steps Taken": steps_taken,
-                "Food Eaten": food_eaten,
-                "Time Survived": elapsed_time,
-                "RAM (KB)": current_memory,
-                "Peak RAM (KB)": peak_memory
-            }
-        )
+        else:
+            elapsed_time = ticks // FPS # logical seconds at the game's frame rate
+            if ticks >= max_ticks:
+                game_over = True
+
+    wall_time_ms = (time.perf_counter() - wall_start) * 1000
+
+    current_memory, peak_memory = memory_tracker.get_memory_usage()
+    memory_tracker.stop_tracking()
+
+    result = { # Store results
+        "Pac-Bot AI": game.pacbot_name(pacbot_index(pac_algo_index)),
+        "Ghost AI": levels[ghost_algo_index].split(" - ")[-1],
+        "Seed": seed,
+        "Steps Taken": game.steps_taken,
+        "Food Eaten": food_eaten,
+        "Time Survived": elapsed_time,
+        "Ticks": ticks,
+        "Wall Time (ms)": round(wall_time_ms, 2),
+        "RAM (KB)": current_memory,
+        "Peak RAM (KB)": peak_memory,
+        "Memory Backend": memory_backend,
+        "Maze": maze_name,
+        "Food Target": "nearest" if game.nearest_food else "first",
+        "Steps per Food": round(game.steps_taken / food_eaten, 2) if food_eaten else 0,
+    }
+    if search_stats.counting:
+        for agent in SEARCH_AGENTS:
+            calls, expanded, frontier, path_length, elapsed = search_stats.agent_totals(agent)
+            result[f"{agent} Searches"] = calls
+            result[f"{agent} Nodes Expanded"] = expanded
+            result[f"{agent} Peak Frontier"] = frontier
+            result[f"{agent} Mean Path Length"] = round(path_length / calls, 2) if calls else 0
+            result[f"{agent} Search Time (ms)"] = round(elapsed / 1e6, 2)
+            hits, misses, evictions = search_stats.cache_totals.get(agent, (0, 0, 0))
+            result[f"{agent} Path Cache Hits"] = hits
+            result[f"{agent} Path Cache Misses"] = misses
+            result[f"{agent} Path Cache Evictions"] = evictions
+            searches, budget_hits, max_bound = search_stats.anytime_totals.get(agent, (0, 0, 1.0))
+            result[f"{agent} Anytime Budget Hits"] = budget_hits
+            result[f"{agent} Anytime Max Bound"] = round(max_bound, 3) if searches else ""
+        expanded = result["Pac-Bot Nodes Expanded"]
+        result["Pac-Bot Nodes per Food"] = round(expanded / food_eaten, 2) if food_eaten else expanded
+    return result
 
+def pacbot_index(pac_algo_index): # Pac-Bot AI of a game: the algorithm, or game.ROLLOUT_PAC_INDEX when the rollout policy replaces it
+    return game.ROLLOUT_PAC_INDEX if game.pacman_policy is not None else pac_algo_index
+
+def record_frame(recorder): # Add the current Pac-Bot and ghost cells to a replay
+    cols = game.COLS
+    recorder.frame(game.pacman_pos[0] * cols + game.pacman_pos[1], [row * cols + col for row, col in game.enemies])
+
+def run_batch_games(pac_algo_index, ghost_algo_index, seeds, record=False): # Simulate seeded games with the batched engine
+    # Same per-game results as run_game for the same seeds, see batch_engine.py. Wall time and RAM are
+    # measured over the whole batch, and the search columns are left empty.
+    # Returns (results, replay records), the records are empty unless record is set.
+    results, records = batch_engine.run_batch(pac_algo_index, ghost_algo_index, seeds, memory_backend, record)
+    for result in results:
+        food_eaten = result["Food Eaten"]
+        result["Maze"] = maze_name
+        result["Food Target"] = "nearest" if game.nearest_food else "first"
+        result["Steps per Food"] = round(result["Steps Taken"] / food_eaten, 2) if food_eaten else 0
+    return results, records
+
+def simulation(pac_algo_index, ghost_algo_index, simulation_runs=50, realtime=False, first_seed=None): # Default to 50 runs
+    # Runs the games of one matchup one after another, seeds are first_seed, first_seed + 1, ... when given
+    results = []
+    for run in range(simulation_runs): # run 50 simulations
+        seed = None if first_seed is None else first_seed + run
+        results.append(run_game(pac_algo_index, ghost_algo_index, seed, realtime))
     return results
 
+# ==== Parallel sweep =============================================================================
+#
+# =================================================================================================
+def use_maze_spec(spec): # Play the games on a preset maze or a map file (binary maps are memory-mapped)
+    global maze_name
+    if spec is not None and spec != maze_name:
+        game.use_maze(maze_io.open_maze(spec))
+        maze_name = spec
 
-if __name__ == "__main__": # Main function to run the simulation
-    all_results = []
-    print(
-        "Running 50 simulations for each Pac-Bot algorithm vs Ghost AI combinations..."
-    )
+def _init_worker(
+    use_table, incremental, track_searches=False, memory="rss", maze_spec=None, nearest=False, cache=False, record=False,
+    rollouts=0, rollout_depth=game_state.ROLLOUT_DEPTH, anytime=None
+): # Set up the game core options in a pool worker
+    global memory_backend, record_replays
+    memory_backend = memory
+    record_replays = record
+    use_maze_spec(maze_spec)
+    if track_searches:
+        search_stats.start_tracking()
+    if use_table:
+        game.use_path_table()
+    if incremental:
+        game.use_incremental_planner()
+    if nearest:
+        game.use_nearest_food()
+    if cache:
+        game.use_path_cache()
+    if rollouts:
+        game_state.use_rollout_policy(rollouts=rollouts, depth=rollout_depth)
+    if anytime is not None:
+        game.use_anytime_search(budget_us=anytime[0], max_expansions=anytime[1])
+
+def _run_game_task(task): # Worker entry point for the process pool, returns (results, replay records)
+    pac, ghost, seeds = task
+    if len(seeds) > 1:
+        return run_batch_games(pac, ghost, seeds, record_replays)
+    recorder = replay.ReplayRecorder(game.maze, pacbot_index(pac), ghost, seeds[0]) if record_replays else None
+    result = run_game(pac, ghost, seeds[0], recorder=recorder)
+    return [result], [recorder.to_bytes()] if recorder is not None else []
+
+def read_finished_games(path): # Read the (Pac-Bot AI, Ghost AI, Seed) keys already written to a results file
+    # Resuming appends rows with RESULT_FIELDS, so a file with other columns is refused instead of misaligned.
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    if result_columns.is_columnar(path):
+        if not os.path.exists(os.path.join(path, result_columns.SCHEMA_FILE)):
+            return finished
+        return result_columns.ColumnReader(path).finished_games()
 
-    for pac in range(3): # Pacman algorithms
-        for ghost in range(3):
-            combo_name = f"{algorithm[pac]} vs {levels[ghost].split(' - ')[-1]}"
-            print(f"> Simulating {combo_name}...")
-            sim_results = simulation(pac, ghost, simulation_runs=50)
-            all_results.extend(sim_results)
+    with open(path, "rb+") as f: # Drop a partly written last row left by an interrupted sweep
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
 
-    # Save the output to a file
-    with open("Results.csv", "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=all_results[0].keys())
-        writer.writeheader()
-        writer.writerows(all_results)
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is not None and reader.fieldnames != RESULT_FIELDS:  # written by another version
+            raise result_columns.ResumeMismatch(f"{path} holds other columns, write to a new file or pass --no-resume")
+        for row in reader:
+            if row.get("Seed"):
+                finished.add((row["Pac-Bot AI"], row["Ghost AI"], int(row["Seed"])))
+    return finished
 
-    print("✅ Simulation complete. Results saved to Results.csv")
+def run_sweep(
+    output="Results.csv", runs=50, workers=None, first_seed=0, resume=True, chunksize=1, use_table=False, incremental=False,
+    track_searches=False, memory="rss", maze_spec=None, nearest=False, cache=False, batch=1, replay_log=None,
+    store=None, store_max_bytes=result_store.DEFAULT_MAX_BYTES, rollouts=0, rollout_depth=game_state.ROLLOUT_DEPTH,
+    anytime=None
+):
+    # Fans the games of every (pac, ghost) matchup out to a process pool, one task per (matchup, seed).
+    # Each finished game is appended to output as it lands, so an interrupted sweep can be resumed:
+    # with resume=True, (matchup, seed) pairs already in output are skipped.
+    # use_table answers bfs from the all-pairs path table; it is built here once and every worker
+    # memory-maps the same file. incremental plans Pac-Bot's A* moves with the D* Lite planner.
+    # track_searches fills the search columns with the per-agent counters of search_stats.
+    # memory selects the memory_tracker backend of the RAM columns. maze_spec plays every game on a
+    # preset maze or a map file instead of the stock maze. nearest sends Pac-Bot's A* and BFS to the
+    # nearest pellet instead of the first one (see game.use_nearest_food). cache reuses each agent's
+    # path while it stays valid (see game.use_path_cache). batch plays the seeds of a matchup in batches of
+    # this many games with the lockstep engine of batch_engine.py, one batch per task. replay_log appends
+    # a replay of every game to this log (see replay.py), written by this process only. store is the path
+    # of a result_store file: games already stored for the same configuration and seed are copied from it
+    # instead of played (they get no replay), and the games played are added to it.
+    # An output path ending in .cols is written as a columnar results directory (see result_columns.py),
+    # which keeps running per-matchup statistics of every row it holds; any other path is a CSV file.
+    # rollouts > 0 lets game_state.RolloutPolicy pick Pac-Bot's steps with that many rollouts of rollout_depth
+    # ticks per move; its games replace the Pac-Bot algorithms and are written as Pac-Bot AI "Rollout".
+    # They are played one at a time, the batched engine does not run policies.
+    # anytime is a (microseconds, expansions) per-tick budget of the A* searches, either can be None, see
+    # game.use_anytime_search; with track_searches the Anytime columns count the searches that ran out.
+    # Only an expansion budget keeps seeded games reproducible.
+    finished = read_finished_games(output) if resume else set()
+    use_maze_spec(maze_spec)
+    results_store = result_store.ResultStore(store, store_max_bytes) if store else None
+    if rollouts:
+        batch = 1
+    if results_store is not None:
+        layout = layout_hash(game.maze).hex()
+        options = {
+            "maze": maze_name, "use_table": use_table, "incremental": incremental, "track_searches": track_searches,
+            "memory": memory, "nearest": nearest, "cache": cache, "rollouts": rollouts, "rollout_depth": rollout_depth,
+            "anytime": anytime, "batch": batch > 1,  # batched rows have no search columns and share their wall time
+        }
+    config_keys = {}  # (Pac-Bot AI, Ghost AI) -> configuration key in the store
+    stored = []  # result rows copied from the store
+    tasks = []
+    for pac in range(1 if rollouts else len(algorithm)): # Pacman algorithms
+        pac_index = game.ROLLOUT_PAC_INDEX if rollouts else pac
+        pac_name = game.pacbot_name(pac_index)
+        for ghost in range(len(levels)):
+            ghost_name = levels[ghost].split(" - ")[-1]
+            seeds = [
+                seed for seed in range(first_seed, first_seed + runs) if (pac_name, ghost_name, seed) not in finished
+            ]
+            if results_store is not None and seeds:
+                key = results_store.register(result_store.describe(pac_index, ghost, layout, options))
+                config_keys[(pac_name, ghost_name)] = key
+                hits = results_store.get_many(key, seeds)
+                stored.extend(hits[seed] for seed in seeds if seed in hits)
+                seeds = [seed for seed in seeds if seed not in hits]
+            for start in range(0, len(seeds), batch):
+                tasks.append((pac, ghost, seeds[start:start + batch]))
+
+    columnar = result_columns.is_columnar(output)
+    write_header = not resume or not os.path.exists(output) or os.path.getsize(output) == 0
+    if columnar:
+        f = writer = result_columns.ColumnWriter(output, RESULT_FIELDS, resume)
+    else:
+        f = open(output, "w" if write_header else "a", newline="")
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+    with f:
+        if write_header and not columnar:
+            writer.writeheader()
+        writer.writerows(stored)
+        games = sum(len(task[2]) for task in tasks)
+        if stored:
+            print(f"> {len(stored)} games reused from {store}")
+        if not tasks:
+            if columnar: # every game was resumed or reused, the summary still covers them
+                print("\n".join(writer.summary.table()))
+            if results_store is not None:
+                results_store.close()
+            return 0
+
+        if use_table:
+            game.use_path_table() # build the table once, before the workers map it
+        options = (
+            use_table, incremental, track_searches, memory, maze_spec, nearest, cache, replay_log is not None, rollouts,
+            rollout_depth, anytime
+        )
+        with multiprocessing.Pool(workers, _init_worker, options) as pool:
+            done = 0
+            for results, records in pool.imap_unordered(_run_game_task, tasks, chunksize):
+                for record in records: # the replays are indexed before their rows are written
+                    replay.append_record(replay_log, record)
+                writer.writerows(results)
+                f.flush() # stream each row to disk as soon as it is finished
+                if results_store is not None:
+                    for result in results:
+                        results_store.put(config_keys[(result["Pac-Bot AI"], result["Ghost AI"])], result["Seed"], result)
+                    results_store.db.commit()
+                done += len(results)
+                if done % 50 < len(results) or done == games:
+                    print(f"> {done}/{games} games finished")
+    if columnar:
+        print("\n".join(writer.summary.table()))
+    if results_store is not None:
+        evicted = results_store.evict()
+        if evicted:
+            print(f"> {evicted} least recently used results evicted from {store}")
+        results_store.close()
+    return games
+
+
+if __name__ == "__main__": # Main function to run the simulation
+    parser = argparse.ArgumentParser(description="Simulate every Pac-Bot AI vs Ghost AI matchup.")
+    parser.add_argument("--runs", type=int, default=50, help="games per matchup")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument(
+        "--output", default="Results.csv", help="results file, or a columnar results directory when it ends in .cols"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game of each matchup")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the results file instead of resuming")
+    parser.add_argument("--path-table", action="store_true", help="answer BFS from the precomputed all-pairs table")
+    parser.add_argument("--incremental-astar", action="store_true", help="plan Pac-Bot's A* with the D* Lite planner")
+    parser.add_argument("--search-stats", action="store_true", help="count nodes expanded, frontier and time of every search")
+    parser.add_argument(
+        "--memory", choices=memory_tracker.BACKENDS, default="rss",
+        help="memory tracking backend of the RAM columns (tracemalloc slows the games down)"
+    )
+    parser.add_argument(
+        "--maze", default=None,
+        help=f"preset ({', '.join(maze_io.PRESETS)}) or map file to play on instead of the stock maze"
+    )
+    parser.add_argument(
+        "--nearest-food", action="store_true", help="send Pac-Bot's A* and BFS to the nearest pellet instead of the first"
+    )
+    parser.add_argument("--path-cache", action="store_true", help="reuse each agent's path while it stays valid")
+    parser.add_argument("--replay", default=None, help="append a replay of every game to this log (see replay.py)")
+    parser.add_argument(
+        "--store", nargs="?", const=result_store.DEFAULT_STORE, default=None,
+        help=f"reuse and keep results in a result store (default file: {result_store.DEFAULT_STORE})"
+    )
+    parser.add_argument(
+        "--store-max-mb", type=float, default=result_store.DEFAULT_MAX_BYTES / 2**20, help="size limit of the result store"
+    )
+    parser.add_argument(
+        "--rollouts", type=int, default=0,
+        help="pick Pac-Bot's steps by this many Monte Carlo rollouts per move instead of its search (see game_state.py)"
+    )
+    parser.add_argument(
+        "--rollout-depth", type=int, default=game_state.ROLLOUT_DEPTH, help="ticks played by each rollout"
+    )
+    parser.add_argument(
+        "--anytime-us", type=int, default=None, help="per-tick time budget of the A* searches, in microseconds"
+    )
+    parser.add_argument(
+        "--anytime-expansions", type=int, default=None, help="per-tick expansion budget of the A* searches"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=1, help="games per batch of the lockstep batched engine (1: one game at a time)"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"Running {args.runs} simulations for each Pac-Bot algorithm vs Ghost AI combinations..."
+    )
+    try:
+        ran = run_sweep(
+            args.output, args.runs, args.workers, args.seed, resume=not args.no_resume,
+            use_table=args.path_table, incremental=args.incremental_astar, track_searches=args.search_stats,
+            memory=args.memory, maze_spec=args.maze, nearest=args.nearest_food,
+            cache=args.path_cache, batch=args.batch, replay_log=args.replay, store=args.store,
+            store_max_bytes=int(args.store_max_mb * 2**20), rollouts=args.rollouts, rollout_depth=args.rollout_depth,
+            anytime=(args.anytime_us, args.anytime_expansions) if args.anytime_us or args.anytime_expansions else None
+        )
+    except result_columns.ResumeMismatch as error:  # a results file with other columns
+        raise SystemExit(f"Cannot resume: {error}")
+    except ValueError as error:  # a bad maze preset or map file, or options that do not go together
+        parser.error(str(error))
+    except OSError as error:  # a map or results file that cannot be read or written
+        parser.error(f"{error.filename}: {error.strerror}" if error.filename else str(error))
+    print(f"✅ Simulation complete. {ran} new games, results saved to {args.output}")
@@ -0,0 +1,29 @@
+# File: tests/conftest.py
+# Description: This file contains the shared fixtures of the tests: the mazes they run on and seeded query pairs.
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # the game modules
+
+from maze import build_default_maze, generate_maze  # noqa: E402
+
+MAZES = { # mazes every equivalence test runs on
+    "stock": lambda: build_default_maze(27, 40),
+    "generated": lambda: generate_maze(21, 31, seed=3, density=0.3),
+}
+QUERIES = 40  # (start, goal) pairs per maze
+
+
+@pytest.fixture(params=sorted(MAZES))
+def maze(request): # Each maze of MAZES
+    return MAZES[request.param]()
+
+
+@pytest.fixture
+def pairs(maze): # Seeded (start, goal) pairs of open [row, col] cells of the maze
+    rng = random.Random(7)
+    cells = maze.open_cells
+    return [(maze.position(rng.choice(cells)), maze.position(rng.choice(cells))) for _ in range(QUERIES)]
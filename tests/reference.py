@@ -0,0 +1,148 @@
+# File: tests/reference.py
+# Description: This file contains the scalar reference versions of the game's searches and path costs.
+# They are the original pacbot.py functions, with the maze, the ghosts and the costs passed in instead of
+# read from globals: walls is a list of [row, col] wall cells and costs maps (row, col) to an additional
+# cost. Every optimized search and engine is checked against them.
+import heapq
+import random
+from collections import deque
+
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # directions: right, down, left, up
+
+
+def stock_walls(rows, cols): # Walls of the original maze layout
+    walls = []
+    for col in range(cols): # Border walls
+        walls.append([0, col])
+        walls.append([rows - 1, col])
+    for row in range(rows):
+        walls.append([row, 0])
+        walls.append([row, cols - 1])
+
+    for row in range(2, rows - 2): # Vertical corridors
+        if row % 4 != 0:
+            walls.append([row, cols // 4])
+            walls.append([row, cols // 2])
+            walls.append([row, 3 * cols // 4])
+
+    for col in range(2, cols - 2): # Horizontal corridors
+        if col % 5 != 0:
+            walls.append([rows // 4, col])
+            walls.append([rows // 2, col])
+            walls.append([3 * rows // 4, col])
+
+    center_row = rows // 2
+    center_col = cols // 2
+    walls += [ # Central ghost box with exits
+        [center_row - 1, center_col - 1], [center_row - 1, center_col],
+        [center_row + 1, center_col - 1], [center_row + 1, center_col],
+        [center_row, center_col + 1], [center_row, center_col - 1]
+    ]
+
+    for row in range(5, rows - 5): # Add barriers to the left and right sides
+        if row % 6 == 0:
+            walls.append([row, 2])
+            walls.append([row, cols - 3])
+    return walls
+
+
+def ghost_costs(rows, cols, walls, enemies): # update_costs_based_on_ghosts_and_food: (row, col) -> cost
+    new_costs = {}
+    for row in range(rows): # Loop through the grid
+        for col in range(cols):
+            if [row, col] not in walls:  # Skip walls
+                min_distance = min( # Calculate distance to ghosts
+                    abs(row - ghost[0]) + abs(col - ghost[1]) for ghost in enemies
+                )
+                if min_distance <= 3:  # within 3 tiles of a ghost
+                    new_costs[(row, col)] = max(1, 10 - min_distance)
+    return new_costs
+
+
+def heuristic(a, b):  # Calculate the Manhattan distance between two points
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def a_star_search(start, goal, rows, cols, walls, costs=None): # A* search algorithm
+    costs = costs or {}
+    open_set = []
+    heapq.heappush(open_set, (0, tuple(start)))
+    came_from = {}
+    g_score = {tuple(start): 0}
+
+    while open_set:  # Pop the node with the lowest f_score
+        _, current = heapq.heappop(open_set)
+
+        if current == tuple(goal):
+            path = []
+            while current in came_from:
+                path.append(list(current))
+                current = came_from[current]
+            path.reverse()
+            return path
+
+        for direction in DIRECTIONS:  # Check all possible directions
+            neighbor = (current[0] + direction[0], current[1] + direction[1])
+            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and list(neighbor) not in walls:
+                tentative_g_score = g_score[current] + 1 + costs.get(neighbor, 0)
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    heapq.heappush(open_set, (tentative_g_score + heuristic(neighbor, goal), neighbor))
+    return []
+
+
+def dfs(start, goal, rows, cols, walls, rng=random): # DFS algo lvl0 to find a path from start to goal
+    stack = [tuple(start)]  # starting point on the stack
+    came_from = {tuple(start): None}  # tracking the path
+
+    while stack:
+        current = stack.pop()  # get the most recently added node (LIFO)
+        if current == tuple(goal):
+            path = []
+            while current:
+                path.append(list(current))
+                current = came_from[current]
+            path.reverse()
+            return path[1:]  # return the path skipping the starting point
+
+        directions_copy = DIRECTIONS.copy()
+        rng.shuffle(directions_copy)
+        for d in directions_copy: # Move in all directions
+            neighbor = (current[0] + d[0], current[1] + d[1])
+            if (
+                0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols
+                and list(neighbor) not in walls and neighbor not in came_from
+            ):
+                came_from[neighbor] = current
+                stack.append(neighbor)
+    return []  # no path found
+
+
+def bfs(start, goal, rows, cols, walls): # BFS algorithm lvl1 to find the shortest path from start to goal
+    queue = deque([tuple(start)])  # starting point in the queue
+    came_from = {tuple(start): None}  # Keeping track
+
+    while queue:
+        current = queue.popleft() # get the next place to check
+        if current == tuple(goal):
+            path = []
+            while current:
+                path.append(list(current))
+                current = came_from[current]
+            path.reverse()
+            return path[1:]  # return path skipping the starting point
+
+        for d in DIRECTIONS: # Move in all directions
+            neighbor = (current[0] + d[0], current[1] + d[1])
+            if (
+                0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols
+                and list(neighbor) not in walls and neighbor not in came_from
+            ):
+                came_from[neighbor] = current
+                queue.append(neighbor)
+    return []  # no path found
+
+
+def path_cost(path, costs): # Cost of a path without its start, as A* counts it
+    return sum(1 + costs.get(tuple(cell), 0) for cell in path)
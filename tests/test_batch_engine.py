@@ -0,0 +1,22 @@
+# File: tests/test_batch_engine.py
+# Description: This file checks that the lockstep batched engine plays the same games as simulations.run_game.
+import pytest
+
+import batch_engine
+import game
+import replay
+import simulations
+
+SEEDS = [0, 1, 2, 3]
+GAME_FIELDS = ["Pac-Bot AI", "Ghost AI", "Seed", "Steps Taken", "Food Eaten", "Time Survived", "Ticks"]  # not timings
+
+
+@pytest.mark.parametrize("pac_algo_index", range(len(game.algorithm)))
+@pytest.mark.parametrize("ghost_level", range(len(game.levels)))
+def test_batch_plays_the_scalar_games(pac_algo_index, ghost_level):
+    results, records = batch_engine.run_batch(pac_algo_index, ghost_level, SEEDS, record=True)
+    for seed, result, record in zip(SEEDS, results, records):
+        recorder = replay.ReplayRecorder(game.maze, pac_algo_index, ghost_level, seed)
+        expected = simulations.run_game(pac_algo_index, ghost_level, seed, recorder=recorder)
+        assert {field: result[field] for field in GAME_FIELDS} == {field: expected[field] for field in GAME_FIELDS}
+        assert record == recorder.to_bytes()  # every tick of the game, not only its totals
@@ -0,0 +1,49 @@
+# File: tests/test_cost_field.py
+# Description: This file checks the stamped ghost cost field against the original per-cell cost loop.
+import random
+
+import reference
+from cost_field import CostField
+
+
+def reference_costs(maze, ghosts): # Original costs by flat cell index
+    costs = reference.ghost_costs(maze.rows, maze.cols, maze.walls, ghosts)
+    return {row * maze.cols + col: cost for (row, col), cost in costs.items()}
+
+
+def random_ghosts(maze, rng, count=4): # Ghost cells, open or walls, often close enough to overlap
+    row, col = rng.randrange(maze.rows), rng.randrange(maze.cols)
+    return [
+        [min(max(row + rng.randint(-4, 4), 0), maze.rows - 1), min(max(col + rng.randint(-4, 4), 0), maze.cols - 1)]
+        for _ in range(count)
+    ]
+
+
+def test_rebuild_matches_reference(maze):
+    rng = random.Random(5)
+    field = CostField(maze)
+    for _ in range(30):
+        ghosts = random_ghosts(maze, rng)
+        expected = reference_costs(maze, ghosts)
+        assert field.rebuild(ghosts) == expected
+        assert {index: cost for index, cost in enumerate(field.grid) if cost} == expected
+
+
+def test_update_matches_reference_as_ghosts_move(maze):
+    rng = random.Random(6)
+    field = CostField(maze)
+    ghosts = random_ghosts(maze, rng)
+    field.rebuild(ghosts)
+    field.take_changes()
+    for _ in range(60):
+        before = dict(field.costs)
+        moved = [list(ghost) for ghost in ghosts]
+        for ghost in rng.sample(moved, rng.randint(1, len(moved))):  # some ghosts stay, some step or jump
+            ghost[:] = maze.position(rng.choice(maze.neighbors[maze.index(ghost)] or maze.open_cells))
+        expected = reference_costs(maze, moved)
+        changed = field.update(ghosts, moved)
+        assert field.costs == expected
+        assert {index: cost for index, cost in enumerate(field.grid) if cost} == expected
+        assert changed == {index for index in before.keys() | expected.keys() if before.get(index) != expected.get(index)}
+        assert field.take_changes() == changed
+        ghosts = moved
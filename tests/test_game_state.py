@@ -0,0 +1,63 @@
+# File: tests/test_game_state.py
+# Description: This file checks that GameRules plays the same ticks as game.step_game and that unmake undoes make.
+import random
+
+import pytest
+
+import game
+from game_state import GameRules, GameState
+
+TICKS = 150
+
+
+def slots(state): # Every slot of a state, in order
+    return tuple(getattr(state, slot) for slot in GameState.__slots__)
+
+
+@pytest.mark.parametrize("ghost_level", range(len(game.levels)))
+@pytest.mark.parametrize("pac_algo_index", [0, 1])  # A* and BFS Pac-Bots draw no random numbers
+def test_rules_play_the_ticks_of_step_game(pac_algo_index, ghost_level):
+    for seed in range(3):
+        random.seed(seed)
+        game.reset_game()
+        food = game.generate_food(game.FOOD_COUNT)
+        game.update_costs_based_on_ghosts_and_food(food)
+        rng = random.Random()
+        rng.setstate(random.getstate())  # the rules draw the DFS moves and respawns the live game draws next
+        rules = GameRules(game.maze, ghost_level)
+        state = GameState.from_game(food)
+        food_eaten = 0
+        for tick in range(1, TICKS + 1):
+            before = list(game.pacman_pos)
+            food, eaten, collided = game.step_game(food, pac_algo_index, ghost_level, tick % game.GHOST_MOVE_DELAY == 0)
+            food_eaten += eaten
+            rules.make(state, None if game.pacman_pos == before else game.maze.index(game.pacman_pos), rng)
+            live = GameState.from_game(food)
+            assert (state.pacman, state.ghosts, state.food) == (live.pacman, live.ghosts, live.food)
+            assert (state.tick, state.steps, state.food_eaten, state.caught) == (tick, game.steps_taken, food_eaten, collided)
+            if collided:
+                break
+
+
+def test_unmake_restores_every_slot():
+    rng = random.Random(4)
+    maze = game.maze
+    for ghost_level in range(len(game.levels)):
+        rules = GameRules(maze, ghost_level)
+        state = GameState(
+            maze.index(maze.pacman_start), [maze.index(ghost) for ghost in maze.ghost_starts],
+            [rng.choice(maze.open_cells) for _ in range(game.FOOD_COUNT)],
+        )
+        eating_moves = 0
+        while not rules.is_over(state):
+            state.food = (rng.choice(rules.moves(state)),) + state.food[1:]  # a pellet Pac-Bot can eat this tick
+            before = slots(state)
+            for move in list(rules.moves(state)) + [None]:
+                undo = rules.make(state, move, random.Random(0))
+                eating_moves += state.food_eaten != before[GameState.__slots__.index("food_eaten")]
+                rules.unmake(state, undo)
+                assert slots(state) == before
+            rules.step(state, rng.choice(rules.moves(state)), rng)
+            assert slots(state) == before  # step leaves its input alone
+            rules.make(state, rules.greedy_step(state, rng), rng)
+        assert eating_moves  # the moves that ate food were taken back too
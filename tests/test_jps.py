@@ -0,0 +1,32 @@
+# File: tests/test_jps.py
+# Description: This file checks that Jump Point Search returns paths as cheap as the original A*'s.
+import random
+
+import jps
+import reference
+
+
+def check_path(maze, start, goal, path, costs): # The JPS path is a walk of open cells from start to goal costing costs
+    expected = reference.a_star_search(start, goal, maze.rows, maze.cols, maze.walls, costs)
+    if not expected:
+        assert path == []
+        return
+    assert path[-1] == goal
+    for previous, cell in zip([start] + path, path):
+        assert abs(previous[0] - cell[0]) + abs(previous[1] - cell[1]) == 1
+        assert maze.is_open(*cell)
+    assert reference.path_cost(path, costs) == reference.path_cost(expected, costs)
+
+
+def test_jps_paths_cost_as_much_as_a_star(maze, pairs):
+    for start, goal in pairs:
+        check_path(maze, start, goal, jps.jps_search(start, goal, maze), {})
+
+
+def test_jps_paths_cost_as_much_as_a_star_with_ghost_costs(maze, pairs):
+    rng = random.Random(13)
+    for start, goal in pairs:
+        ghosts = [maze.position(rng.choice(maze.open_cells)) for _ in range(4)]
+        costs = reference.ghost_costs(maze.rows, maze.cols, maze.walls, ghosts)
+        flat_costs = {row * maze.cols + col: cost for (row, col), cost in costs.items()}
+        check_path(maze, start, goal, jps.jps_search(start, goal, maze, flat_costs), costs)
@@ -0,0 +1,59 @@
+# File: tests/test_maze_io.py
+# Description: This file round-trips mazes through the text and binary map files.
+import pytest
+
+import maze_io
+
+
+def same_maze(a, b): # Same size, walls, spawn points and neighbor table
+    assert (a.rows, a.cols) == (b.rows, b.cols)
+    assert bytes(a.passable) == bytes(b.passable)
+    assert a.pacman_start == b.pacman_start
+    assert a.ghost_starts == b.ghost_starts
+    assert list(a.neighbors) == list(b.neighbors)
+
+
+@pytest.mark.parametrize("name", ["maze.map", "maze.bin"])  # text and binary maps
+def test_maps_round_trip(maze, tmp_path, name):
+    path = str(tmp_path / name)
+    maze_io.save_maze(maze, path)
+    same_maze(maze_io.load_maze(path), maze)
+    same_maze(maze_io.open_maze(path), maze)
+
+
+def test_text_map_spawn_letters(tmp_path):
+    path = tmp_path / "small.map"
+    path.write_text("PACBOT-MAP 1\ngrid\n#####\n#P.G#\n#.#G#\n#####\n")
+    maze = maze_io.load_maze(str(path))
+    assert (maze.rows, maze.cols) == (4, 5)
+    assert maze.pacman_start == [1, 1]
+    assert maze.ghost_starts == [[1, 3], [2, 3]]
+    assert ["".join(".#"[not maze.is_open(row, col)] for col in range(5)) for row in range(4)] == [
+        "#####", "#...#", "#.#.#", "#####",
+    ]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("MAZE 1\ngrid\n#.#\n", "not a Pac-Bot text map"),
+    ("PACBOT-MAP 2\ngrid\n#.#\n", "version 2 map"),
+    ("PACBOT-MAP 1\ngrid\n#.#\n#..#\n", "row has 4 cells"),
+    ("PACBOT-MAP 1\ngrid\n#x#\n", "unknown map character"),
+])
+def test_bad_text_maps_are_refused(tmp_path, text, message):
+    path = tmp_path / "bad.map"
+    path.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        maze_io.load_maze(str(path))
+
+
+def test_truncated_binary_map_is_refused(maze, tmp_path):
+    path = tmp_path / "maze.bin"
+    maze_io.save_maze(maze, str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        maze_io.load_maze(str(path))
+
+
+def test_unknown_spec_is_neither_preset_nor_file(tmp_path):
+    with pytest.raises(ValueError, match="neither a maze preset"):
+        maze_io.open_maze(str(tmp_path / "missing.map"))
@@ -0,0 +1,161 @@
+# File: tests/test_path_cache.py
+# Description: This file checks when the path cache hands out a cached step, against a fresh search on the same costs.
+import random
+
+import pytest
+
+import game
+import reference
+from path_cache import MAX_PATH_AGE, MAX_SPLICE, PathCache
+
+
+def ghost_grid(maze, seed): # Cost grid around a few ghosts
+    rng = random.Random(seed)
+    grid = bytearray(maze.rows * maze.cols)
+    ghosts = [maze.position(rng.choice(maze.open_cells)) for _ in range(4)]
+    for (row, col), cost in reference.ghost_costs(maze.rows, maze.cols, maze.walls, ghosts).items():
+        grid[row * maze.cols + col] = cost
+    return grid
+
+
+def cheapest(maze, grid, start, goal): # Cost of a fresh A* path on the grid
+    return sum(1 + grid[maze.index(cell)] for cell in game.a_star_search(start, goal, maze, grid))
+
+
+def long_paths(maze, pairs, grid, length=10): # (start, goal, A* path) of the pairs at least length steps apart
+    paths = [(start, goal, game.a_star_search(start, goal, maze, grid)) for start, goal in pairs]
+    return [(start, goal, path) for start, goal, path in paths if len(path) >= length]
+
+
+def cached_cache(maze, grid, start, goal, path, max_age=100): # A cache holding path, the agent on its first step
+    cache = PathCache(maze, grid, max_age)
+    cache.store("agent", start, path, maze.index(goal), uses_costs=True)
+    return cache
+
+
+def follow(cache, maze, position, goal_index): # Walk the cached path until a miss, returns (cells walked, reason)
+    walked = []
+    while True:
+        step, reason = cache.next_step("agent", position, goal_index)
+        if step is None:
+            return walked, reason
+        assert abs(step[0] - position[0]) + abs(step[1] - position[1]) == 1 and maze.is_open(*step)
+        walked.append(step)
+        position = step
+
+
+def test_hits_follow_cheapest_paths_until_arrival(maze, pairs):
+    grid = ghost_grid(maze, 1)
+    for start, goal, path in long_paths(maze, pairs, grid):
+        cache = cached_cache(maze, grid, start, goal, path)
+        position = path[0]
+        step, reason = cache.next_step("agent", position, maze.index(goal))
+        while step is not None:
+            assert 1 + grid[maze.index(step)] + cheapest(maze, grid, step, goal) == cheapest(maze, grid, position, goal)
+            position = step
+            step, reason = cache.next_step("agent", position, maze.index(goal))
+        assert (position, reason) == (goal, "arrived")
+
+
+def test_leaving_the_path_evicts(maze, pairs):
+    grid = ghost_grid(maze, 2)
+    for start, goal, path in long_paths(maze, pairs, grid):
+        cache = cached_cache(maze, grid, start, goal, path)
+        assert cache.next_step("agent", path[1], maze.index(goal)) == (None, "off path")  # one step too far
+        assert cache.next_step("agent", path[0], maze.index(goal)) == (None, None)  # the entry is gone
+
+
+def test_age_limit_evicts(maze, pairs):
+    grid = ghost_grid(maze, 3)
+    start, goal, path = long_paths(maze, pairs, grid)[0]
+    cache = cached_cache(maze, grid, start, goal, path, max_age=4)
+    walked, reason = follow(cache, maze, path[0], maze.index(goal))
+    assert (walked, reason) == (path[1:4], "age")  # the stored step and 3 hits make 4 steps
+
+
+def test_cost_change_ahead_evicts_and_behind_does_not(maze, pairs):
+    for start, goal, path in long_paths(maze, pairs, ghost_grid(maze, 4)):
+        grid = ghost_grid(maze, 4)
+        cache = cached_cache(maze, grid, start, goal, path)
+        grid[maze.index(start)] += 1  # a cell already left behind
+        assert cache.next_step("agent", path[0], maze.index(goal))[0] == path[1]
+        grid[maze.index(path[5])] += 1
+        assert cache.next_step("agent", path[1], maze.index(goal)) == (None, "cost")
+
+        grid = ghost_grid(maze, 4)
+        cache = PathCache(maze, grid)
+        cache.store("agent", start, path, maze.index(goal))  # a BFS path keeps no cost snapshot
+        grid[maze.index(path[5])] += 1
+        assert cache.next_step("agent", path[0], maze.index(goal))[0] == path[1]
+
+
+def test_goal_stepping_back_onto_the_path_cuts_it(maze, pairs):
+    grid = ghost_grid(maze, 5)
+    for start, goal, path in long_paths(maze, pairs, grid):
+        new_goal = path[-3]
+        cache = cached_cache(maze, grid, start, goal, path)
+        walked, reason = follow(cache, maze, path[0], maze.index(new_goal))
+        assert (walked, reason) == (path[1:-2], "arrived")
+        assert sum(1 + grid[maze.index(cell)] for cell in walked) == cheapest(maze, grid, path[0], new_goal)
+
+
+def test_goal_moving_a_few_tiles_off_the_path_extends_it(maze, pairs):
+    grid = bytearray(maze.rows * maze.cols)  # no costs: extensions are BFS steps
+    extended = 0
+    for start, goal, path in long_paths(maze, pairs, grid):
+        on_path = {tuple(cell) for cell in path}
+        near = [
+            cell for cell in maze.open_cells
+            if tuple(maze.position(cell)) not in on_path
+            and 0 < len(reference.bfs(goal, maze.position(cell), maze.rows, maze.cols, maze.walls)) <= MAX_SPLICE
+        ]
+        for new_goal in map(maze.position, near):
+            cache = cached_cache(maze, grid, start, goal, path)
+            walked, reason = follow(cache, maze, path[0], maze.index(new_goal))
+            assert reason == "arrived" and walked[-1] == new_goal
+            assert len(walked) <= cheapest(maze, grid, path[0], new_goal) + 2 * MAX_SPLICE
+            extended += 1
+    assert extended
+
+
+def test_goal_moving_too_far_or_several_goals_evict(maze, pairs):
+    grid = ghost_grid(maze, 6)
+    for start, goal, path in long_paths(maze, pairs, grid):
+        far = [
+            cell for cell in maze.open_cells
+            if len(reference.bfs(goal, maze.position(cell), maze.rows, maze.cols, maze.walls)) > MAX_SPLICE
+            and maze.position(cell) not in path
+        ]
+        cache = cached_cache(maze, grid, start, goal, path)
+        assert cache.next_step("agent", path[0], far[0]) == (None, "goal")
+        cache = cached_cache(maze, grid, start, goal, path)
+        assert cache.next_step("agent", path[0], (maze.index(goal),)) == (None, "goal")
+
+
+@pytest.fixture
+def live_cache():
+    cache = game.use_path_cache()
+    yield cache
+    game.use_path_cache(False)
+
+
+def test_dfs_paths_get_a_random_age_limit(live_cache):
+    maze = game.maze
+    start, goal = maze.pacman_start, maze.position(maze.open_cells[-1])
+    path = game.bfs(start, goal)
+    for seed in range(20):
+        random.seed(seed)
+        expected = random.Random(seed).randint(1, MAX_PATH_AGE)
+        assert game.cached_step("dfs", start, maze.index(goal), 2, lambda: path) == path[0]
+        assert live_cache.entries["dfs"][4] == expected
+        state = random.getstate()
+        game.cached_step("a*", start, maze.index(goal), 0, lambda: path)
+        assert live_cache.entries["a*"][4] == MAX_PATH_AGE and random.getstate() == state  # A* draws nothing
+
+
+def test_partial_anytime_paths_are_not_cached(live_cache):
+    maze = game.maze
+    start, goal = maze.pacman_start, maze.position(maze.open_cells[-1])
+    partial = game.bfs(start, goal)[:3]
+    assert game.cached_step("a*", start, maze.index(goal), 0, lambda: partial) == partial[0]
+    assert "a*" not in live_cache.entries
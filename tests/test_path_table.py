@@ -0,0 +1,46 @@
+# File: tests/test_path_table.py
+# Description: This file checks the all-pairs path table against the original BFS and round-trips its file.
+import os
+
+import pytest
+
+import path_table
+import reference
+from maze import generate_maze
+
+
+@pytest.fixture
+def table(maze, tmp_path): # Path table of the maze, built into a temporary directory
+    table = path_table.load_path_table(maze, str(tmp_path))
+    yield table
+    table.close()
+
+
+def test_table_answers_like_bfs(maze, pairs, table):
+    for start, goal in pairs:
+        expected = reference.bfs(start, goal, maze.rows, maze.cols, maze.walls)
+        start_index, goal_index = maze.index(start), maze.index(goal)
+        assert [maze.position(cell) for cell in table.path(start_index, goal_index)] == expected
+        assert table.distance(start_index, goal_index) == len(expected)
+
+
+def test_table_leaves_a_wall_start_like_bfs(maze, pairs, table):
+    walls = [wall for wall in maze.walls if maze.neighbors[maze.index(wall)]]  # walls next to an open cell
+    for wall, (_, goal) in zip(walls, pairs):
+        expected = reference.bfs(wall, goal, maze.rows, maze.cols, maze.walls)
+        assert [maze.position(cell) for cell in table.path(maze.index(wall), maze.index(goal))] == expected
+
+
+def test_table_file_is_reused(maze, tmp_path, table):
+    path = path_table.table_file(maze, str(tmp_path))
+    modified = os.path.getmtime(path)
+    reopened = path_table.load_path_table(maze, str(tmp_path), build=False)
+    assert reopened is not None and reopened.count == table.count
+    reopened.close()
+    assert os.path.getmtime(path) == modified
+
+
+def test_table_of_another_layout_is_refused(maze, tmp_path, table):
+    other = generate_maze(maze.rows, maze.cols, seed=99, density=0.3)
+    with pytest.raises(ValueError, match="different maze layout"):
+        path_table.PathTable(other, path_table.table_file(maze, str(tmp_path)))
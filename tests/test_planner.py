@@ -0,0 +1,58 @@
+# File: tests/test_planner.py
+# Description: This file checks that the D* Lite planner's steps stay on the original A*'s cheapest paths.
+import random
+
+import reference
+from cost_field import CostField
+from planner import DStarLitePlanner
+
+
+def cheapest(maze, start, goals, field): # Cost of the original A* path from start to the cheapest goal
+    costs = {tuple(maze.position(index)): cost for index, cost in field.costs.items()}
+    best = None
+    for goal in goals:
+        if start == goal:
+            return 0
+        path = reference.a_star_search(start, goal, maze.rows, maze.cols, maze.walls, costs)
+        if path:
+            cost = reference.path_cost(path, costs)
+            best = cost if best is None else min(best, cost)
+    return best
+
+
+def walk(maze, seed, goal_count): # Walk an agent with the planner while ghosts wander, checking every step
+    rng = random.Random(seed)
+    field = CostField(maze)
+    ghosts = [maze.position(rng.choice(maze.open_cells)) for _ in range(4)]
+    field.rebuild(ghosts)
+    field.take_changes()
+    planner = DStarLitePlanner(maze, field.grid)
+    position = maze.position(rng.choice(maze.open_cells))
+    goals = [maze.position(rng.choice(maze.open_cells)) for _ in range(goal_count)]
+    changed = ()
+    for tick in range(40):
+        if position in goals or tick % 15 == 14:  # a new target plans from scratch
+            goals = [maze.position(rng.choice(maze.open_cells)) for _ in range(goal_count)]
+        step = planner.next_step(position, goals[0], changed, goals if goal_count > 1 else None)
+        total = cheapest(maze, position, goals, field)
+        if total is None:
+            assert step is None
+        else:
+            assert step is not None
+            assert abs(step[0] - position[0]) + abs(step[1] - position[1]) == 1
+            assert 1 + field.grid[maze.index(step)] + cheapest(maze, step, goals, field) == total
+            position = step
+        moved = [maze.position(rng.choice(maze.neighbors[maze.index(ghost)] or [maze.index(ghost)])) for ghost in ghosts]
+        field.update(ghosts, moved)
+        ghosts = moved
+        changed = field.take_changes()
+
+
+def test_planner_follows_cheapest_paths(maze):
+    for seed in range(3):
+        walk(maze, seed, 1)
+
+
+def test_planner_follows_cheapest_paths_to_several_goals(maze):
+    for seed in range(3):
+        walk(maze, seed, 3)
@@ -0,0 +1,60 @@
+# File: tests/test_replay.py
+# Description: This file round-trips game records through a replay log.
+import random
+
+import pytest
+
+import replay
+from maze import Maze
+
+
+def record_game(maze, pac_algo_index, ghost_level, seed, ticks=25): # (record, frames, food events) of a random game
+    rng = random.Random(seed)
+    recorder = replay.ReplayRecorder(maze, pac_algo_index, ghost_level, seed)
+    cells = maze.rows * maze.cols
+    frames, events = [], {}
+    for tick in range(ticks + 1):
+        frame = (rng.randrange(cells), tuple(rng.randrange(cells) for _ in range(4)))
+        recorder.frame(*frame)
+        frames.append(frame)
+        if tick % 10 == 0:
+            food = [maze.position(rng.randrange(cells)) for _ in range(3)]
+            recorder.food(tick, food)
+            events[tick] = [maze.index(pellet) for pellet in food]
+    return recorder.to_bytes(), frames, events
+
+
+def check_replay(recorded, maze, pac_algo_index, ghost_level, seed, frames, events):
+    assert (recorded.pac_algo_index, recorded.ghost_level, recorded.seed) == (pac_algo_index, ghost_level, seed)
+    assert (recorded.rows, recorded.cols, recorded.ghost_count) == (maze.rows, maze.cols, 4)
+    assert recorded.layout == replay.layout_key(maze)
+    assert recorded.ticks == len(frames) - 1
+    assert list(recorded.frames()) == frames
+    assert recorded.food_events == events
+
+
+@pytest.mark.parametrize("size", [(27, 40), (300, 300)])  # 2-byte and 4-byte cells
+def test_records_round_trip_through_a_log(tmp_path, size):
+    maze = Maze(*size)
+    log = str(tmp_path / "replays.log")
+    games = {}
+    for key in [(0, 1, 5), (3, 2, 6), (255, 0, 7)]:
+        record, frames, events = record_game(maze, *key)
+        replay.append_record(log, record)
+        games[key] = (frames, events)
+    for key, (frames, events) in games.items():
+        check_replay(replay.open_replay(log, *key), maze, *key, frames, events)
+
+
+def test_later_records_win_and_unwritten_ones_are_skipped(tmp_path):
+    maze = Maze(27, 40)
+    log = str(tmp_path / "replays.log")
+    replay.append_record(log, record_game(maze, 1, 1, 3)[0])
+    record, frames, events = record_game(maze, 1, 1, 3, ticks=40)
+    replay.append_record(log, record)
+    check_replay(replay.open_replay(log, 1, 1, 3), maze, 1, 1, 3, frames, events)
+
+    with open(replay.index_path(log), "ab") as index:  # an index entry whose record never reached the log
+        index.write(replay.INDEX_ENTRY.pack(2, 2, 9, 1 << 20, 100))
+    with pytest.raises(KeyError):
+        replay.open_replay(log, 2, 2, 9)
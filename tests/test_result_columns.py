@@ -0,0 +1,103 @@
+# File: tests/test_result_columns.py
+# Description: This file round-trips result rows through a columnar results directory and checks its summary.
+import csv
+import os
+import random
+import statistics
+
+import pytest
+
+import result_columns
+from simulations import RESULT_FIELDS
+
+
+def result_row(seed): # A result row with some missing columns, as simulations.run_game writes them
+    rng = random.Random(seed)
+    row = {field: "" for field in RESULT_FIELDS}
+    row.update({
+        "Pac-Bot AI": rng.choice(["A*", "BFS"]), "Ghost AI": rng.choice(["DFS", "JPS"]), "Seed": seed,
+        "Steps Taken": rng.randint(0, 300), "Food Eaten": rng.randint(0, 20), "Time Survived": rng.randint(0, 60),
+        "Wall Time (ms)": round(rng.uniform(1, 50), 2), "Memory Backend": "rss", "Maze": "classic",
+    })
+    return row
+
+
+def decoded(row): # A written row as ColumnReader gives it back: None for missing numbers, text stays text
+    return {
+        field: None if value == "" and field not in result_columns.CATEGORY_FIELDS else value for field, value in row.items()
+    }
+
+
+def test_rows_round_trip(tmp_path):
+    path = str(tmp_path / "results.cols")
+    rows = [result_row(seed) for seed in range(50)]
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[:20])
+        writer.flush()
+        writer.writerows(rows[20:])
+    reader = result_columns.ColumnReader(path)
+    assert list(reader.iter_rows()) == [decoded(row) for row in rows]
+    assert reader.finished_games() == {(row["Pac-Bot AI"], row["Ghost AI"], row["Seed"]) for row in rows}
+
+    csv_path = str(tmp_path / "results.csv")
+    assert result_columns.export_csv(path, csv_path) == len(rows)
+    with open(csv_path, newline="") as f:
+        exported = list(csv.DictReader(f))
+    assert exported == [{field: str(value) for field, value in row.items()} for row in rows]
+
+
+def test_summary_matches_the_rows(tmp_path):
+    path = str(tmp_path / "results.cols")
+    rows = [result_row(seed) for seed in range(200)]
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows)
+    summary = result_columns.ColumnReader(path).summary()
+    for matchup, stats in summary.matchups.items():
+        steps = [row["Steps Taken"] for row in rows if f"{row['Pac-Bot AI']} vs {row['Ghost AI']}" == matchup]
+        assert stats["Steps Taken"].count == len(steps)
+        assert stats["Steps Taken"].mean == pytest.approx(statistics.mean(steps))
+        assert stats["Steps Taken"].variance() == pytest.approx(statistics.variance(steps))
+        assert (stats["Steps Taken"].low, stats["Steps Taken"].high) == (min(steps), max(steps))
+        assert stats["Pac-Bot Nodes Expanded"].count == 0  # missing values are not counted
+
+
+def test_resume_drops_a_partial_row_and_appends(tmp_path):
+    path = str(tmp_path / "results.cols")
+    rows = [result_row(seed) for seed in range(30)]
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[:10])
+    with open(os.path.join(path, result_columns.column_file(0)), "ab") as f:  # a row cut off by a crash
+        f.write(b"\x01\x00")
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[10:])
+    reader = result_columns.ColumnReader(path)
+    assert list(reader.iter_rows()) == [decoded(row) for row in rows]
+    assert sum(stats["Steps Taken"].count for stats in reader.summary().matchups.values()) == len(rows)
+
+
+def test_resume_rebuilds_a_summary_saved_before_the_last_rows(tmp_path):
+    path = str(tmp_path / "results.cols")
+    rows = [result_row(seed) for seed in range(30)]
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[:10])
+    summary_path = os.path.join(path, result_columns.SUMMARY_FILE)
+    with open(summary_path, "rb") as f:
+        saved = f.read()
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[10:20])
+    with open(summary_path, "wb") as f:  # crash between appending the rows and saving the summary
+        f.write(saved)
+
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerows(rows[20:])
+    with result_columns.ColumnWriter(str(tmp_path / "expected.cols"), RESULT_FIELDS) as expected:
+        expected.writerows(rows)
+    assert result_columns.ColumnReader(path).summary().to_dict() == expected.summary.to_dict()
+
+
+def test_resume_refuses_other_columns(tmp_path):
+    path = str(tmp_path / "results.cols")
+    with result_columns.ColumnWriter(path, RESULT_FIELDS) as writer:
+        writer.writerow(result_row(0))
+    with pytest.raises(result_columns.ResumeMismatch):
+        result_columns.ColumnWriter(path, RESULT_FIELDS[:-1])
@@ -0,0 +1,45 @@
+# File: tests/test_searches.py
+# Description: This file checks the grid-backed BFS, A* and DFS of game.py against the original searches.
+import random
+
+import game
+import reference
+from maze import build_default_maze
+
+
+def ghost_cost_grid(maze, costs): # Flat cost grid of a reference (row, col) -> cost dict
+    grid = bytearray(maze.rows * maze.cols)
+    for (row, col), cost in costs.items():
+        grid[row * maze.cols + col] = cost
+    return grid
+
+
+def test_stock_maze_has_the_original_walls():
+    maze = build_default_maze(27, 40)
+    assert sorted(maze.walls) == sorted(map(list, {tuple(wall) for wall in reference.stock_walls(27, 40)}))
+
+
+def test_bfs_matches_reference(maze, pairs):
+    for start, goal in pairs:
+        assert game.bfs(start, goal, maze) == reference.bfs(start, goal, maze.rows, maze.cols, maze.walls)
+
+
+def test_a_star_matches_reference(maze, pairs):
+    for start, goal in pairs:
+        expected = reference.a_star_search(start, goal, maze.rows, maze.cols, maze.walls)
+        assert game.a_star_search(start, goal, maze) == expected
+
+
+def test_a_star_matches_reference_with_ghost_costs(maze, pairs):
+    rng = random.Random(11)
+    for start, goal in pairs:
+        ghosts = [maze.position(rng.choice(maze.open_cells)) for _ in range(4)]
+        costs = reference.ghost_costs(maze.rows, maze.cols, maze.walls, ghosts)
+        expected = reference.a_star_search(start, goal, maze.rows, maze.cols, maze.walls, costs)
+        assert game.a_star_search(start, goal, maze, ghost_cost_grid(maze, costs)) == expected
+
+
+def test_dfs_matches_reference_with_the_same_seed(maze, pairs):
+    for seed, (start, goal) in enumerate(pairs):
+        expected = reference.dfs(start, goal, maze.rows, maze.cols, maze.walls, random.Random(seed))
+        assert game.dfs(start, goal, maze, random.Random(seed)) == expected